@@ -156,8 +156,8 @@ class ControlPanel(QtWidgets.QMainWindow):
     def getGeneral(self):
         """Get the general settings."""
         try:
-            table = self.director.get_database_table()
-            interval = self.director.get_readout_interval()
+            table, interval = self.director.ask_rpc_batch([("get_database_table", {}),
+                                                           ("get_readout_interval", {})])
         except Exception as exc:
             self.showError(exc)
         else:
@@ -217,12 +217,13 @@ class ControlPanel(QtWidgets.QMainWindow):
     def getPID(self):
         """Get all the values for the selected PID controller."""
         try:
-            data = self.director.get_PID_settings(self.bbId.currentText())
+            panel = self.director.get_panel_data(self.bbId.currentText())
         except Exception as exc:
             self.showError(exc)
             return
+        data = panel["settings"]
+        self.lbComponents.setText(f"{panel['state']}")
         try:
-            print(data)
             self.sbSetpoint.setValue(data["setpoint"])
             self.sbKp.setValue(data["Kp"])
             self.sbKi.setValue(data["Ki"])
@@ -268,8 +269,8 @@ class ControlPanel(QtWidgets.QMainWindow):
     @pyqtSlot(str)
     def selectPID(self, name):
         """Select the PID controllerwith `name`."""
-        self.pbGetPID.clicked.emit()
         self.lbComponents.setText("")
+        self.pbGetPID.clicked.emit()
 
     # Changed PID values
     @pyqtSlot(float)
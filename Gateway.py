@@ -0,0 +1,358 @@
+#! /usr/bin/python3
+"""
+Gateway aggregating the data of many temperature controllers.
+
+The gateway subscribes to the data publishers of the controllers and keeps their latest data.
+It serves a merged view, in which every key is prefixed by the node name (for example
+'room1/temperature'), and forwards requests to the controllers, both via one intercom port
+and, if pyleco is installed, via LECO. The merged data is published again on one port.
+
+classes
+-------
+Node : name, host, port, publisher_port, max_connections
+    Connection information and latest data of one controller.
+Gateway : nodes, port, publisher_port, timeout
+    Subscribe to the nodes and serve their data.
+
+Start it with the nodes as 'name=host[:port]' arguments, for example
+`python3 Gateway.py room1=192.168.1.10 room2=192.168.1.11`.
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+import logging
+import pickle
+import socketserver
+import threading
+import time
+from typing import Any, Optional
+
+import zmq
+
+from devices import intercom
+from devices.intercom import Publisher
+
+log = logging.getLogger("Gateway")
+log.addHandler(logging.StreamHandler())
+log.setLevel(logging.INFO)
+
+PYLECO = find_spec("pyleco") is not None  # imported only when needed
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """Split a merged key 'node/key' into the node name and the key of the node."""
+    node, _, key = key.partition("/")
+    if not key:
+        raise ValueError(f"Key '{node}' does not contain a node name.")
+    return node, key
+
+
+class Node:
+    """A temperature controller connected to the gateway.
+
+    The controller closes an intercom connection after each request, therefore every forwarded
+    request opens a new connection. The number of simultaneous connections per node is limited,
+    such that many requests do not overload a controller.
+
+    :param name: Name of the node, used as prefix of its keys.
+    :param host: Host name or IP address.
+    :param port: Intercom port.
+    :param publisher_port: Port of the data publisher.
+    :param max_connections: Maximum number of simultaneous intercom connections.
+    """
+
+    def __init__(self, name: str, host: str, port: int = 22001, publisher_port: int = 11099,
+                 max_connections: int = 2, timeout: float = 5) -> None:
+        if "/" in name:
+            raise ValueError(f"Node name '{name}' must not contain '/'.")
+        self.name = name
+        self.host = host
+        self.port = port
+        self.publisher_port = publisher_port
+        self.timeout = timeout
+        self.data: dict[str, Any] = {}
+        self.last_update: Optional[float] = None
+        self.errors = 0
+        self._connections = threading.BoundedSemaphore(max_connections)  # concurrency limit
+
+    def update(self, key: str, value: Any, timestamp: Optional[float] = None) -> None:
+        """Store the published `value` of `key`."""
+        self.data[key] = value
+        self.last_update = time.time() if timestamp is None else timestamp
+
+    def sendObject(self, typ: str, content: Any) -> tuple[str, Any]:
+        """Send an intercom message with pickled `content` and return the response."""
+        with self._connections:
+            try:
+                connection = intercom.connect(self.host, self.port, self.timeout)
+                try:
+                    intercom.sendMessage(connection, typ, pickle.dumps(content))
+                    responseTyp, response = intercom.readMessage(connection)
+                finally:
+                    connection.close()
+            except Exception:
+                self.errors += 1
+                raise
+        if responseTyp in ('SET', 'DMP'):
+            return responseTyp, pickle.loads(response)
+        return responseTyp, response
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """Address, age of the data in s, and the number of communication errors."""
+        return {'host': self.host,
+                'port': self.port,
+                'age': None if self.last_update is None else time.time() - self.last_update,
+                'errors': self.errors,
+                }
+
+
+class IntercomHandler(socketserver.BaseRequestHandler):
+    """Handle one intercom request to the gateway."""
+
+    server: "IntercomServer"
+
+    def handle(self) -> None:
+        try:
+            typ, content = intercom.readMessage(self.request)
+            response = self.server.gateway.handle_intercom(typ, content)
+        except Exception as exc:
+            log.debug(f"Intercom request failed: {exc}")
+            response = 'ERR', f"{type(exc).__name__}: {exc}".encode()
+        try:
+            intercom.sendMessage(self.request, *response)
+        except OSError:
+            pass
+
+
+class IntercomServer(socketserver.ThreadingTCPServer):
+    """Intercom server of the gateway."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], gateway: "Gateway") -> None:
+        self.gateway = gateway
+        super().__init__(address, IntercomHandler)
+
+
+class Gateway:
+    """Subscribe to many controllers and serve their data.
+
+    :param nodes: List of the nodes.
+    :param port: Intercom port of the gateway, None for no intercom.
+    :param publisher_port: Port to publish the merged data, None for no publishing.
+    :param timeout: Timeout in s to wait for the nodes' answers.
+    """
+
+    def __init__(self, nodes: list[Node], port: Optional[int] = 22002,
+                 publisher_port: Optional[int] = 11098, timeout: float = 5) -> None:
+        self.nodes = {node.name: node for node in nodes}
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max(1, 2 * len(nodes)), "node")
+        self._stop = threading.Event()
+        self.context = zmq.Context.instance()
+        self.subscriber_thread = threading.Thread(target=self.subscribe, name="subscriber",
+                                                  daemon=True)
+        self.publisher = (None if publisher_port is None
+                          else Publisher(port=publisher_port, standalone=True, log=log))
+        self.server = None if port is None else IntercomServer(("", port), self)
+
+    def start(self) -> None:
+        """Start subscribing and serving."""
+        self.subscriber_thread.start()
+        if self.server is not None:
+            threading.Thread(target=self.server.serve_forever, name="intercom",
+                             daemon=True).start()
+        log.info(f"Gateway started for {len(self.nodes)} nodes.")
+
+    def stop(self) -> None:
+        """Stop subscribing and serving."""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.subscriber_thread.is_alive():
+            self.subscriber_thread.join(2)
+        self.executor.shutdown(wait=False)
+        try:
+            self.leco_listener.close()
+        except AttributeError:
+            pass  # No LECO.
+
+    def subscribe(self) -> None:
+        """Receive the data of all nodes until stopped."""
+        poller = zmq.Poller()
+        sockets = {}
+        for node in self.nodes.values():
+            socket = self.context.socket(zmq.SUB)
+            socket.connect(f"tcp://{node.host}:{node.publisher_port}")
+            socket.subscribe(b"")
+            poller.register(socket, zmq.POLLIN)
+            sockets[socket] = node
+        try:
+            while not self._stop.is_set():
+                for socket, _ in poller.poll(timeout=500):
+                    try:
+                        key, value = socket.recv_multipart(zmq.NOBLOCK)
+                        self.handle_data(sockets[socket], key.decode(), pickle.loads(value))
+                    except Exception as exc:
+                        log.debug(f"Invalid data of node '{sockets[socket].name}': {exc}")
+        finally:
+            for socket in sockets:
+                socket.close(0)
+
+    def handle_data(self, node: Node, key: str, value: Any) -> None:
+        """Store the data of a node and publish it again with the merged key."""
+        node.update(key, value)
+        if self.publisher is not None:
+            self.publisher({f"{node.name}/{key}": value})
+
+    # Merged view
+    def get_current_data(self) -> dict[str, Any]:
+        """Get the latest data of all nodes with merged keys."""
+        return {f"{name}/{key}": value for name, node in self.nodes.items()
+                for key, value in list(node.data.items())}
+
+    def get_snapshots(self) -> dict[str, dict[str, Any]]:
+        """Get the latest data of each node."""
+        return {name: dict(node.data) for name, node in self.nodes.items()}
+
+    def get_nodes(self) -> dict[str, dict[str, Any]]:
+        """Get the state of each node."""
+        return {name: node.state for name, node in self.nodes.items()}
+
+    # Forwarding
+    def fan_out(self, typ: str, contents: dict[str, Any]) -> dict[str, tuple[str, Any]]:
+        """Send `contents` (node name: content) to the nodes in parallel and return the answers.
+
+        Failed requests result in an 'ERR' answer.
+        """
+        futures = {name: self.executor.submit(self.nodes[name].sendObject, typ, content)
+                   for name, content in contents.items()}
+        responses = {}
+        for name, future in futures.items():
+            try:
+                responses[name] = future.result(self.timeout)
+            except Exception as exc:
+                responses[name] = 'ERR', f"{type(exc).__name__}: {exc}".encode()
+        return responses
+
+    def _group(self, keys) -> dict[str, list[str]]:
+        groups: dict[str, list[str]] = {}
+        for key in keys:
+            node, key = split_key(key)
+            if node not in self.nodes:
+                raise KeyError(f"Node '{node}' is unknown.")
+            groups.setdefault(node, []).append(key)
+        return groups
+
+    def get_values(self, keys: list[str]) -> dict[str, Any]:
+        """Get the values of the merged `keys` from the nodes.
+
+        The keys 'data' and 'nodes' return the merged data and the node states.
+        """
+        result = {}
+        forwarded = []
+        for key in keys:
+            if key == 'data':
+                result[key] = self.get_current_data()
+            elif key == 'nodes':
+                result[key] = self.get_nodes()
+            else:
+                forwarded.append(key)
+        for name, (typ, content) in self.fan_out('GET', self._group(forwarded)).items():
+            if typ != 'SET':
+                raise ConnectionError(f"Node '{name}': {content.decode(errors='replace')}")
+            result.update({f"{name}/{key}": value for key, value in content.items()})
+        return result
+
+    def set_values(self, data: dict[str, Any]) -> None:
+        """Set the values of the merged keys of `data` at the nodes."""
+        contents: dict[str, dict[str, Any]] = {}
+        for key, value in data.items():
+            node, key = split_key(key)
+            if node not in self.nodes:
+                raise KeyError(f"Node '{node}' is unknown.")
+            contents.setdefault(node, {})[key] = value
+        self._check(self.fan_out('SET', contents))
+
+    def execute(self, device: str, command: str) -> Any:
+        """Execute `command` at the `device` 'node/device name', for example 'room1/pid0'."""
+        node, device = split_key(device)
+        if node not in self.nodes:
+            raise KeyError(f"Node '{node}' is unknown.")
+        typ, content = self._check(self.fan_out('CMD', {node: (device, command)}))[node]
+        return content if typ == 'SET' else None
+
+    @staticmethod
+    def _check(responses: dict[str, tuple[str, Any]]) -> dict[str, tuple[str, Any]]:
+        for name, (typ, content) in responses.items():
+            if typ == 'ERR':
+                raise ConnectionError(f"Node '{name}': {content.decode(errors='replace')}")
+        return responses
+
+    def handle_intercom(self, typ: str, content: bytes) -> tuple[str, bytes]:
+        """Handle an intercom request and return the response type and content."""
+        if typ == 'GET':
+            return 'SET', pickle.dumps(self.get_values(pickle.loads(content)))
+        elif typ == 'SET':
+            self.set_values(pickle.loads(content))
+            return 'ACK', b""
+        elif typ == 'CMD':
+            result = self.execute(*pickle.loads(content))
+            return ('ACK', b"") if result is None else ('SET', pickle.dumps(result))
+        else:
+            return 'ERR', "Unknown command".encode()
+
+    # LECO
+    def setup_leco_listener(self, name: str = "Gateway", host: str = "localhost") -> None:
+        """Serve the merged view and the forwarding via LECO."""
+        from pyleco.utils.listener import Listener
+        self.leco_listener = Listener(name=name, host=host)
+        self.leco_listener.start_listen()
+        self.leco_listener.register_rpc_method(self.get_current_data)
+        self.leco_listener.register_rpc_method(self.get_snapshots)
+        self.leco_listener.register_rpc_method(self.get_nodes)
+        self.leco_listener.register_rpc_method(self.get_values)
+        self.leco_listener.register_rpc_method(self.set_values)
+        self.leco_listener.register_rpc_method(self.execute)
+
+
+def parse_node(text: str) -> Node:
+    """Create a node of the text 'name=host[:intercom port]'."""
+    name, _, address = text.partition("=")
+    if not address:
+        raise ValueError(f"Node '{text}' is not of the form 'name=host[:port]'.")
+    host, _, port = address.partition(":")
+    return Node(name, host, port=int(port) if port else 22001)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("nodes", nargs="+", help="controllers as 'name=host[:port]'")
+    parser.add_argument("-p", "--port", type=int, default=22002, help="intercom port")
+    parser.add_argument("--publisher-port", type=int, default=11098,
+                        help="port to publish the merged data")
+    parser.add_argument("-r", "--host", default="localhost",
+                        help="set the host name of this Node's Coordinator")
+    parser.add_argument("-n", "--name", default="Gateway", help="set the LECO name")
+    kwargs = parser.parse_args()
+
+    gateway = Gateway([parse_node(text) for text in kwargs.nodes], port=kwargs.port,
+                      publisher_port=kwargs.publisher_port)
+    gateway.start()
+    if PYLECO:
+        gateway.setup_leco_listener(name=kwargs.name, host=kwargs.host)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+
+if __name__ == "__main__":
+    main()
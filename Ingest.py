@@ -0,0 +1,286 @@
+#! /usr/bin/python3
+"""
+Central ingest of the data of many temperature controllers into the database.
+
+The controllers publish one snapshot per readout (setting `database/ingest`), the ingest
+subscribes to all of them and writes the rows in batches with `COPY`, one transaction per batch.
+If the database is slow or unreachable, the rows wait in a bounded queue. If that queue is full,
+new rows are dropped and counted, such that the controllers are never blocked.
+
+classes
+-------
+Ingest : database, addresses, batch_size, flush_interval, max_queue
+    Receive the snapshots and write them in batches.
+
+functions
+---------
+toCSV : rows, columns
+    Convert rows to CSV text for `COPY`.
+
+Start it with the controllers as 'host[:port]' arguments, for example
+`python3 Ingest.py 192.168.1.10 192.168.1.11:11097`.
+"""
+
+from argparse import ArgumentParser
+import csv
+import datetime
+import io
+import logging
+import math
+import pickle
+import queue
+import re
+import threading
+import time
+from typing import Any
+
+import zmq
+
+try:
+    from controllerData import connectionData  # Data to connect to database.
+except ImportError:
+    from controllerData import connectionData_sample as connectionData
+
+log = logging.getLogger("Ingest")
+log.addHandler(logging.StreamHandler())
+log.setLevel(logging.INFO)
+
+try:
+    import psycopg2
+except ModuleNotFoundError:
+    psycopg2 = None
+    log.warning("Package 'psycopg2' not found, no database access possible.")
+
+INGEST_PORT = 11097  # default port of the snapshot publishers of the controllers
+IDENTIFIER = re.compile(r"^[A-Za-z_][\w.]*$")
+
+Row = tuple[str, datetime.datetime, dict[str, Any]]  # table, timestamp, data
+
+
+def toCSV(rows: list[dict[str, Any]], columns: tuple[str, ...]) -> io.StringIO:
+    """Convert the `rows` to CSV text with `columns`. None becomes NULL."""
+    text = io.StringIO()
+    writer = csv.writer(text)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if value is None:
+                values.append("")
+            elif isinstance(value, datetime.datetime):
+                values.append(value.isoformat())
+            elif isinstance(value, float) and math.isnan(value):
+                values.append("NaN")
+            else:
+                values.append(value)
+        writer.writerow(values)
+    text.seek(0)
+    return text
+
+
+class Ingest:
+    """Receive the snapshots of the controllers and write them in batches to the database.
+
+    :param database: Connection parameters for psycopg2.
+    :param addresses: Addresses ('host:port') of the controllers' snapshot publishers.
+    :param batch_size: Maximum number of rows per transaction.
+    :param flush_interval: Maximum time in s a row waits before being written.
+    :param max_queue: Maximum number of rows waiting. Further rows are dropped.
+    """
+
+    def __init__(self, database: dict[str, Any], addresses: list[str] = [],
+                 batch_size: int = 1000, flush_interval: float = 1,
+                 max_queue: int = 100000) -> None:
+        self.database_parameters = database
+        self.addresses = addresses
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue[Row] = queue.Queue(max_queue)
+        self.pending: list[Row] = []  # rows of a failed batch to retry
+        self.statistics = {'received': 0, 'written': 0, 'dropped': 0, 'invalid': 0,
+                           'batches': 0, 'errors': 0}
+        self._stop = threading.Event()
+        self.receiver_thread = threading.Thread(target=self.receive, name="receiver",
+                                                daemon=True)
+        self.writer_thread = threading.Thread(target=self.write, name="writer", daemon=True)
+
+    def start(self) -> None:
+        """Start receiving and writing."""
+        self.receiver_thread.start()
+        self.writer_thread.start()
+        log.info(f"Ingest started for {len(self.addresses)} controllers.")
+
+    def stop(self) -> None:
+        """Stop receiving, write the remaining rows and close the database connection."""
+        self._stop.set()
+        for thread in (self.receiver_thread, self.writer_thread):
+            if thread.is_alive():
+                thread.join(self.flush_interval + 5)
+        try:
+            self.database.close()
+        except AttributeError:
+            pass  # No database connection.
+
+    # Receiving
+    def receive(self) -> None:
+        """Receive the snapshots until stopped."""
+        socket = zmq.Context.instance().socket(zmq.SUB)
+        for address in self.addresses:
+            socket.connect(f"tcp://{address}")
+        socket.subscribe(b"snapshot")
+        try:
+            while not self._stop.is_set():
+                if socket.poll(timeout=500):
+                    _, content = socket.recv_multipart()
+                    self.handle_snapshot(content)
+        finally:
+            socket.close(0)
+
+    def handle_snapshot(self, content: bytes) -> None:
+        """Queue the row of a pickled snapshot."""
+        try:
+            snapshot = pickle.loads(content)
+            row = snapshot['table'], snapshot['timestamp'], dict(snapshot['data'])
+        except Exception as exc:
+            self.statistics['invalid'] += 1
+            log.debug(f"Invalid snapshot: {exc}")
+            return
+        self.statistics['received'] += 1
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            if self.statistics['dropped'] % 1000 == 0:
+                log.warning("Ingest queue full, dropping rows.")
+            self.statistics['dropped'] += 1
+
+    # Writing
+    def connectDatabase(self) -> bool:
+        """(Re)Establish the database connection and return whether it succeeded."""
+        try:
+            self.database.close()
+            del self.database
+        except AttributeError:
+            pass  # no database present
+        if psycopg2 is None:
+            return False
+        try:
+            self.database = psycopg2.connect(**self.database_parameters, connect_timeout=5)
+        except Exception as exc:
+            log.exception("Database connection error.", exc_info=exc)
+            return False
+        return True
+
+    def collect(self) -> list[Row]:
+        """Collect the rows of the next batch, waiting at most `flush_interval`."""
+        batch, self.pending = self.pending, []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=max(remaining, 0))
+                             if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self) -> None:
+        """Write the batches until stopped and the queue is empty."""
+        while not (self._stop.is_set() and self.queue.empty() and not self.pending):
+            batch = self.collect()
+            if not batch:
+                continue
+            if not hasattr(self, 'database') and not self.connectDatabase():
+                self.pending = batch
+                if self._stop.wait(self.flush_interval):
+                    return  # Stopped without database, the rows are lost.
+                continue
+            self.writeBatch(batch)
+
+    @staticmethod
+    def group(batch: list[Row]) -> dict[tuple[str, tuple[str, ...]], list[dict[str, Any]]]:
+        """Group the rows by table and columns."""
+        groups: dict[tuple[str, tuple[str, ...]], list[dict[str, Any]]] = {}
+        for table, timestamp, data in batch:
+            columns = ("timestamp", *data.keys())
+            groups.setdefault((table, columns), []).append({"timestamp": timestamp, **data})
+        return groups
+
+    def copy(self, cursor, table: str, columns: tuple[str, ...], rows: list[dict[str, Any]]
+             ) -> None:
+        """Copy the `rows` into `table`."""
+        for name in (table, *columns):
+            if not IDENTIFIER.match(name):
+                raise ValueError(f"Invalid identifier '{name}'.")
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                           toCSV(rows, columns))
+
+    def writeBatch(self, batch: list[Row]) -> None:
+        """Write a batch in one transaction, falling back to one transaction per group."""
+        groups = self.group(batch)
+        database = self.database
+        try:
+            with database.cursor() as cursor:
+                for (table, columns), rows in groups.items():
+                    self.copy(cursor, table, columns, rows)
+            database.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as exc:
+            log.warning(f"Database connection lost: {exc}")
+            self.pending = batch
+            self.connectDatabase()
+            return
+        except Exception:
+            database.rollback()
+        else:
+            self.statistics['written'] += len(batch)
+            self.statistics['batches'] += 1
+            return
+        # A group failed, write them separately to keep the valid ones.
+        for (table, columns), rows in groups.items():
+            try:
+                with database.cursor() as cursor:
+                    self.copy(cursor, table, columns, rows)
+                database.commit()
+            except Exception as exc:
+                database.rollback()
+                self.statistics['errors'] += len(rows)
+                log.error(f"Writing {len(rows)} rows to '{table}' failed: {exc}")
+            else:
+                self.statistics['written'] += len(rows)
+        self.statistics['batches'] += 1
+
+    def get_statistics(self) -> dict[str, int]:
+        """Number of received, written, dropped and invalid rows, and the queue length."""
+        return {**self.statistics, 'queued': self.queue.qsize() + len(self.pending)}
+
+
+def parse_address(text: str) -> str:
+    """Return 'host:port' of the text 'host[:port]'."""
+    host, _, port = text.partition(":")
+    return f"{host}:{port or INGEST_PORT}"
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("controllers", nargs="+", help="controllers as 'host[:port]'")
+    parser.add_argument("-b", "--batch-size", type=int, default=1000,
+                        help="maximum number of rows per transaction")
+    parser.add_argument("-i", "--interval", type=float, default=1,
+                        help="maximum time in s between two transactions")
+    kwargs = parser.parse_args()
+
+    ingest = Ingest(connectionData.database,
+                    [parse_address(text) for text in kwargs.controllers],
+                    batch_size=kwargs.batch_size, flush_interval=kwargs.interval)
+    ingest.start()
+    try:
+        while True:
+            time.sleep(60)
+            log.info(f"Statistics: {ingest.get_statistics()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingest.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,43 +7,56 @@ Created on Mon Jun 14 11:12:51 2021 by Benedikt Moneke
 
 from argparse import ArgumentParser
 import datetime
+from importlib.util import find_spec
+import json
 import logging
 import math
+import os
+import threading
 import time
-from typing import Any, Optional, Union
+from typing import Any, Optional, TYPE_CHECKING, Union
 
 
 from qtpy import QtCore
 from qtpy.QtCore import Slot as pyqtSlot, Signal as pyqtSignal  # type: ignore
 from simple_pid import PID
-PYLECO = False
-for i in range(3):
-    try:
-        from pyleco.core.message import Message, MessageTypes
-        from pyleco.utils.qt_listener import QtListener
-    except ModuleNotFoundError:
-        break
-    except Exception:
-        """
-        Quite often on Python 3.9 on Raspberry Pi (at least one), an error is raised at the first
-        try to import pyleco:
+PYLECO = find_spec("pyleco") is not None  # imported only when needed
+if TYPE_CHECKING:
+    from pyleco.core.message import Message
 
-        `configparser.MissingSectionHeaderError: File contains no section headers.`
 
-        At second try it works, therefore a few more tries are added.
-        """
-        pass
-    else:
-        print(f"Loading LECO on try {i}")
-        PYLECO = True
-        break
+def import_leco():
+    """Import pyleco and return the QtListener class or None."""
+    for i in range(3):
+        try:
+            from pyleco.utils.qt_listener import QtListener
+        except ModuleNotFoundError:
+            return None
+        except Exception:
+            """
+            Quite often on Python 3.9 on Raspberry Pi (at least one), an error is raised at the
+            first try to import pyleco:
+
+            `configparser.MissingSectionHeaderError: File contains no section headers.`
+
+            At second try it works, therefore a few more tries are added.
+            """
+            pass
+        else:
+            log.debug(f"Loading LECO on try {i}")
+            return QtListener
+    return None
+
 
 # local packages
 try:
     from controllerData import connectionData    # Data to connect to database.
 except ImportError:
     from controllerData import connectionData_sample as connectionData
-from controllerData import listener, ioDefinition
+from controllerData import adaptiveInterval, alarms, autotuner, changeDetector, checkpoint
+from controllerData import controlGraph, listener
+from controllerData import ioDefinition, outputManager, pidConfiguration, rpcDispatcher
+from controllerData import sensorFusion, setpointSchedule, signalFilter, storagePolicy, tableSchema
 from devices.intercom import Publisher
 
 
@@ -62,6 +75,21 @@ except ModuleNotFoundError:
     psycopg2 = None
     log.warning("Package 'psycopg2' not found, no database access possible.")
 
+FULL_STATE_VERSION = 1  # version of the structure returned by `get_full_state`
+
+
+def openDatabase():
+    """Open a connection to the database for storing sensor data, None if impossible."""
+    if psycopg2 is None:
+        return None
+    try:
+        return psycopg2.connect(**connectionData.database, connect_timeout=5)
+    except AttributeError:
+        return None
+    except Exception as exc:
+        log.exception("Database connection error.", exc_info=exc)
+        return None
+
 
 class ListHandler(logging.Handler):
     """Store log entries in a list of strings.
@@ -92,9 +120,13 @@ class TemperatureController(QtCore.QObject):
     """The temperature controller itself."""
     stopSignal = pyqtSignal()
     stopApplication = pyqtSignal()
+    pidsChanged = pyqtSignal(list)  # names of the reconfigured PIDs
+    databaseConnected = pyqtSignal(object)  # new connection, opened in a thread
+    outputReconnected = pyqtSignal(str)  # name of an output, whose device reconnected
 
     def __init__(self, name: str = "TemperatureController", host: str = "localhost", **kwargs):
         super().__init__(**kwargs)
+        self.start_time = time.perf_counter()  # to measure the time to the first control tick
 
         # Configure Settings
         application = QtCore.QCoreApplication.instance()
@@ -106,8 +138,16 @@ class TemperatureController(QtCore.QObject):
 
         # General config
         self.data = {}  # Current data dictionary.
+        self.tick = 0  # number of the current control tick
+        self.tick_time = time.time()
+        self._full_state: Optional[dict[str, Any]] = None  # cached for the current tick
         self.last_value_set = time.time()
         self.tries = 0
+        self.last_database_write = time.time()
+        self.first_tick = True
+        self.tableSchema = tableSchema.TableSchema()
+        self._database_lock = threading.Lock()
+        self.databaseConnected.connect(self.setDatabase, QtCore.Qt.ConnectionType.QueuedConnection)
 
         # Store log in a list
         self.log = ListHandler(100)
@@ -117,12 +157,26 @@ class TemperatureController(QtCore.QObject):
 
         # Create objects like timers
         self.readoutTimer = QtCore.QTimer()
+        self.adaptiveInterval: Optional[adaptiveInterval.AdaptiveInterval] = None
         self.threadpool = QtCore.QThreadPool()
 
         # Initialize sensors
         self.inputOutput = ioDefinition.InputOutput(controller=self)
+        self.outputManager = outputManager.OutputManager(writer=self.setOutput)
+        # Devices reconnect in the tinkerforge callback thread, the manager is used in this one.
+        self.outputReconnected.connect(self.invalidateOutput,
+                                       QtCore.Qt.ConnectionType.QueuedConnection)
+        self.setupOutputs()
+        self.storage = storagePolicy.Decimator()
+        self.setupStorage()
+        self.filterBank = signalFilter.FilterBank()
+        self.setupFilters()
+        self.alarms = alarms.AlarmEngine()
+        self.lecoPublisher = None
+        self.setupAlarms()
 
         # PID controllers
+        self.settingsWriter = pidConfiguration.SettingsWriter()
         self.pids: dict[str, PID] = {}
         for i in range(settings.value('pids', defaultValue=2, type=int)):
             self.pids[str(i)] = PID(auto_mode=False)
@@ -130,21 +184,42 @@ class TemperatureController(QtCore.QObject):
         self.pidSensor = {}  # the main sensor of the PID
         self.pidState = {}  # state of the corresponding output: 0 off, 1 manual, 2 pid
         self.pidOutput = {}  # Output device of the pid.
+        self.pidSetpointSource: dict[str, str] = {}  # PID whose output is the setpoint
+        self.pidFeedforward: dict[str, tuple[str, float, float]] = {}  # sensor, gain, reference
+        self.sensorFusion = sensorFusion.SensorFusion()
+        self.setupFusion()
+        self.autotuners: dict[str, autotuner.RelayAutotuner] = {}  # running and finished ones
+        self.schedules: dict[str, setpointSchedule.Profile] = {}
         for key in self.pids.keys():
             self.setupPID(key)
+        self.setupSchedules()
+        self.setupCheckpoint()
 
         # Configure the listener thread for listening intercom.
         self.setupListener(settings)
-        if PYLECO:
-            print("temp name", name)
-            self.setup_leco_listener(name=name, host=host)
-
-        self.connectDatabase()
         self.publisher = Publisher(port=11099, standalone=True)
+        # Alarms on their own socket, such that the data stream contains only values.
+        self.alarmPublisher = Publisher(port=settings.value('alarms/port', 11096, int),
+                                        standalone=True)
+        self.publishDetector: Optional[changeDetector.ChangeDetector] = None
+        self.setupPublisher()
 
-        # Configure readoutTimer
+        # Configure readoutTimer and take control as soon as the event loop runs.
         self.readoutTimer.start(settings.value('readoutInterval', 5000, int))
+        self.setupReadout()
         self.readoutTimer.timeout.connect(self.readTimeout)
+        QtCore.QTimer.singleShot(0, self.readTimeout)
+
+        # Slow connections after the first control tick.
+        if PYLECO:
+            QtCore.QTimer.singleShot(0, lambda: self.setup_leco_listener(name=name, host=host))
+        if settings.value('database/ingest', False, bool):
+            # The central ingest writes the data, no own database connection.
+            self.ingestPublisher: Optional[Publisher] = Publisher(
+                port=settings.value('database/ingestPort', 11097, int), standalone=True)
+        else:
+            self.ingestPublisher = None
+            self.connectDatabaseInBackground()
         log.info("Temperature Controller initialized")
 
     def __del__(self):
@@ -162,13 +237,30 @@ class TemperatureController(QtCore.QObject):
         # Listener Signals.
         self.listener.signals.stopController.connect(self.shut_down)
         self.listener.signals.pidChanged.connect(self.setupPID)
+        self.listener.signals.pidsConfigured.connect(self.configurePIDs)
         self.listener.signals.timerChanged.connect(self.setTimerInterval)
         self.listener.signals.setOutput.connect(self.setOutput)
         self.listener.signals.sensorCommand.connect(self.sendSensorCommand)
+        self.listener.signals.outputsChanged.connect(self.setupOutputs)
+        self.listener.signals.publisherChanged.connect(self.setupPublisher)
+        self.listener.signals.storageChanged.connect(self.setupStorage)
+        self.listener.signals.readoutChanged.connect(self.setupReadout)
+        self.listener.signals.fusionChanged.connect(self.setupFusion)
+        self.listener.signals.filtersChanged.connect(self.setupFilters)
+        self.listener.signals.alarmsChanged.connect(self.setupAlarms)
+        self.listener.signals.fullStateRequested.connect(
+            self.provideFullState, QtCore.Qt.ConnectionType.BlockingQueuedConnection)
+        self.listener.signals.schedulesChanged.connect(self.setupSchedules)
 
     def setup_leco_listener(self, name: str, host: str) -> None:
         """Set up the Leco listener."""
+        QtListener = import_leco()
+        if QtListener is None:
+            log.warning("LECO could not be loaded.")
+            return
         self.leco_listener = QtListener(name=name, host=host)
+        from pyleco.utils.data_publisher import DataPublisher
+        self.lecoPublisher = DataPublisher(full_name=name, host=host)
         self.leco_listener.signals.message.connect(self.handle_message)
         self.leco_listener.start_listen()
         self.leco_listener.register_rpc_method(self.shut_down)
@@ -176,15 +268,66 @@ class TemperatureController(QtCore.QObject):
         self.leco_listener.register_rpc_method(self.get_log)
         self.leco_listener.register_rpc_method(self.reset_log)
         self.leco_listener.register_rpc_method(self.sendSensorCommand)
+        self.leco_listener.register_rpc_method(self.get_driver_statistics)
         self.leco_listener.register_rpc_method(self.setOutput)
+        self.leco_listener.register_rpc_method(self.set_output_parameters)
+        self.leco_listener.register_rpc_method(self.get_output_statistics)
+        self.leco_listener.register_rpc_method(self.set_storage_policy)
+        self.leco_listener.register_rpc_method(self.set_filter)
+        self.leco_listener.register_rpc_method(self.set_alarm)
+        self.leco_listener.register_rpc_method(self.get_alarms)
+        self.leco_listener.register_rpc_method(self.get_storage_statistics)
+        self.leco_listener.register_rpc_method(self.set_publisher_parameters)
+        self.leco_listener.register_rpc_method(self.get_publisher_statistics)
         self.leco_listener.register_rpc_method(self.set_PID_settings)
+        self.leco_listener.register_rpc_method(self.set_PIDs_configuration)
         self.leco_listener.register_rpc_method(self.get_PID_settings)
         self.leco_listener.register_rpc_method(self.reset_PID)
         self.leco_listener.register_rpc_method(self.get_current_PID_state)
+        self.leco_listener.register_rpc_method(self.get_full_state)
+        self.leco_listener.register_rpc_method(self.start_autotune)
+        self.leco_listener.register_rpc_method(self.stop_autotune)
+        self.leco_listener.register_rpc_method(self.get_autotune_result)
+        self.leco_listener.register_rpc_method(self.set_setpoint_schedule)
+        self.leco_listener.register_rpc_method(self.start_setpoint_ramp)
+        self.leco_listener.register_rpc_method(self.get_setpoint_schedule)
+        self.leco_listener.register_rpc_method(self.get_sensor_health)
         self.leco_listener.register_rpc_method(self.get_readout_interval)
+        self.leco_listener.register_rpc_method(self.get_effective_readout_interval)
         self.leco_listener.register_rpc_method(self.set_readout_interval)
         self.leco_listener.register_rpc_method(self.get_database_table)
         self.leco_listener.register_rpc_method(self.set_database_table)
+        self.leco_listener.register_rpc_method(self.set_database_schema_mode)
+        self.leco_listener.register_rpc_method(self.get_rpc_statistics)
+        self.setup_rpc_dispatcher()
+
+    def setup_rpc_dispatcher(self) -> None:
+        """Process the LECO requests in worker threads, except for the inline methods."""
+        settings = QtCore.QSettings()
+        self.rpcDispatcher = rpcDispatcher.RPCDispatcher(
+            process=self.leco_listener.message_handler.rpc.process_request,
+            send=self.send_rpc_response,
+            max_workers=settings.value('leco/workers', 4, int),
+            timeout=settings.value('leco/timeout', 10, float))
+        # Cheap read-only methods and all methods changing the state used by the readout, which
+        # have to run in the Qt thread.
+        for method in (self.get_current_data, self.get_readout_interval,
+                       self.get_effective_readout_interval, self.reset_log,
+                       self.get_output_statistics,
+                       self.get_publisher_statistics, self.get_storage_statistics,
+                       self.get_current_PID_state, self.get_full_state, self.get_sensor_health,
+                       self.get_rpc_statistics,
+                       self.set_readout_interval, self.set_filter, self.set_alarm,
+                       self.get_alarms, self.set_PID_settings,
+                       self.set_PIDs_configuration, self.reset_PID, self.start_autotune,
+                       self.stop_autotune, self.get_autotune_result, self.set_setpoint_schedule,
+                       self.start_setpoint_ramp, self.get_setpoint_schedule,
+                       self.setOutput, self.set_output_parameters, self.set_storage_policy,
+                       self.set_publisher_parameters, self.set_database_table,
+                       self.set_database_schema_mode, self.shut_down):
+            self.rpcDispatcher.configure(method.__name__, inline=True)
+        # Serial communication is slow and serialized anyway.
+        self.rpcDispatcher.configure("sendSensorCommand", limit=1, timeout=5)
 
     def set_PID_settings(self,
                          name: str,
@@ -200,10 +343,11 @@ class TemperatureController(QtCore.QObject):
                          sensors: Optional[list[str]] = None,
                          output_channel: Optional[str] = None,
                          ) -> None:
-        self._set_pid_settings_from_dict(
-            name=name,
+        self.set_PIDs_configuration({name: dict(
             lowerLimit=lower_limit,
+            lowerLimitNone=None if lower_limit is None else math.isinf(lower_limit),
             upperLimit=upper_limit,
+            upperLimitNone=None if upper_limit is None else math.isinf(upper_limit),
             Kp=Kp,
             Ki=Ki,
             Kd=Kd,
@@ -213,25 +357,65 @@ class TemperatureController(QtCore.QObject):
             state=state,
             sensors=sensors,
             output=output_channel,
-        )
+        )})
 
-    def _set_pid_settings_from_dict(self, name: str, **kwargs) -> None:
-        settings = QtCore.QSettings()
-        settings.beginGroup(f'pid{name}')
-        for key, value in kwargs.items():
-            if value is None:
-                continue
-            if key == "lowerLimit":
-                settings.setValue("lowerLimitNone", math.isinf(value))
-            elif key == "upperLimit":
-                settings.setValue("upperLimitNone", math.isinf(value))
-            settings.setValue(key, value)
-        settings.setValue("sensor", ",".join(settings.value("sensors")))
-        self.setupPID(name=name)
+    def set_PIDs_configuration(self, configuration: dict[str, dict[str, Any]]) -> None:
+        """Validate and apply the configuration of several PIDs at once.
+
+        :param configuration: PID names and their values, keys as in the settings, for example
+            `{"0": {"setpoint": 20, "Kp": 3}, "1": {"sensors": ["a", "b"]}}`.
+        :raises ValueError: If any value is invalid, in which case nothing is changed.
+        """
+        configuration = pidConfiguration.validate(configuration, self.pids.keys())
+        sources = dict(self.pidSetpointSource)
+        for name, values in configuration.items():
+            sources[name] = values.get('setpointSource', sources.get(name, ""))
+        controlGraph.evaluationOrder(self.pids.keys(), sources)
+        output_limits = {}
+        for name, values in configuration.items():
+            try:
+                output_limits[name] = pidConfiguration.limits(
+                    values, self.pids[name].output_limits,
+                    lambda key: self.settingsWriter.value(f"pid{name}/{key}", 0, float))
+            except ValueError as exc:
+                raise ValueError(f"PID '{name}': {exc}")
+        for name, values in configuration.items():
+            pidConfiguration.apply(
+                self.pids[name], values, output_limits[name],
+                self.settingsWriter.value(f"pid{name}/lastOutput", 0, float))
+            if 'state' in values:
+                self.pidState[name] = values['state']
+            if 'sensors' in values:
+                self.pidSensor[name] = values['sensors']
+            if 'output' in values:
+                self.pidOutput[name] = values['output']
+            if 'setpointSource' in values:
+                self.pidSetpointSource[name] = values['setpointSource']
+            if any(key.startswith('feedforward') for key in values):
+                sensor, gain, reference = self.pidFeedforward.get(name, ("", 0, 0))
+                self.pidFeedforward[name] = (values.get('feedforward', sensor),
+                                             values.get('feedforwardGain', gain),
+                                             values.get('feedforwardReference', reference))
+            self.settingsWriter.write({f"pid{name}/{key}": value for key, value
+                                       in pidConfiguration.toSettings(values).items()})
+        self._full_state = None
+        if configuration:
+            self.pidsChanged.emit(list(configuration.keys()))
+        if any('setpoint' in values for values in configuration.values()):
+            self.tightenReadout()
+
+    @pyqtSlot(dict)
+    def configurePIDs(self, configuration: dict[str, dict[str, Any]]) -> None:
+        """Apply the configuration of several PIDs, logging errors."""
+        try:
+            self.set_PIDs_configuration(configuration)
+        except Exception as exc:
+            log.error(f"Invalid PID configuration: {exc}")
 
     @pyqtSlot(str)
     def setupPID(self, name: str) -> None:
         """Configure the pid controller with `name`."""
+        self.settingsWriter.flush()
         pid = self.pids[name]
         settings = QtCore.QSettings()
         settings.beginGroup(f'pid{name}')
@@ -243,15 +427,279 @@ class TemperatureController(QtCore.QObject):
         pid.Kp = settings.value('Kp', defaultValue=1, type=float)
         pid.Ki = settings.value('Ki', defaultValue=0, type=float)
         pid.Kd = settings.value('Kd', defaultValue=0, type=float)
-        pid.setpoint = settings.value('setpoint', 22.2, type=float)
+        setpoint = settings.value('setpoint', 22.2, type=float)
+        if setpoint != pid.setpoint:
+            pid.setpoint = setpoint
+            self.tightenReadout()
         pid.set_auto_mode(settings.value('autoMode', True, type=bool),
                           settings.value('lastOutput', 0, type=float))
         self.pidState[name] = settings.value('state', defaultValue=0, type=int)
         sensors = settings.value('sensor', type=str).replace(' ', '').split(',')
         if sensors == ['']:
             log.warning(f"PID '{name}' does not have sensors configured.")
+        try:
+            sensorFusion.parseSensors(sensors)
+        except ValueError as exc:
+            log.error(f"Ignoring the sensor fusion of PID '{name}': {exc}")
+            sensors = [sensor.rpartition(":")[2].partition("*")[0] for sensor in sensors]
         self.pidSensor[name] = sensors
         self.pidOutput[name] = settings.value('output', f"out{name}", str)
+        source = settings.value('setpointSource', "", str)
+        try:
+            controlGraph.evaluationOrder(self.pids.keys(), {**self.pidSetpointSource,
+                                                            name: source})
+        except ValueError as exc:
+            log.error(f"Ignoring the setpoint source of PID '{name}': {exc}")
+            source = ""
+        self.pidSetpointSource[name] = source
+        self.pidFeedforward[name] = (settings.value('feedforward', "", str),
+                                     settings.value('feedforwardGain', 0, float),
+                                     settings.value('feedforwardReference', 0, float))
+        self._full_state = None
+
+    @pyqtSlot()
+    def setupReadout(self) -> None:
+        """Configure the fixed or the adaptive readout interval."""
+        settings = QtCore.QSettings()
+        interval = settings.value('readoutInterval', 5000, int) / 1000
+        settings.beginGroup('readout')
+        adaptive = settings.value('adaptive', False, bool)
+        minimum = settings.value('minInterval', interval, float)
+        parameters = dict(minimum=minimum,
+                          maximum=settings.value('maxInterval', max(60, minimum), float),
+                          tolerance=settings.value('tolerance', 0.1, float),
+                          stability=settings.value('stability', 0.01, float),
+                          factor=settings.value('factor', 1.5, float))
+        settings.endGroup()
+        if adaptive:
+            try:
+                if self.adaptiveInterval is None:
+                    self.adaptiveInterval = adaptiveInterval.AdaptiveInterval(**parameters)
+                else:
+                    self.adaptiveInterval.configure(**parameters)
+            except ValueError as exc:
+                log.error(f"Invalid adaptive readout configuration: {exc}")
+            else:
+                self._setReadoutTimer(self.adaptiveInterval.interval)
+                return
+        self.adaptiveInterval = None
+        self._setReadoutTimer(interval)
+
+    @pyqtSlot()
+    def setupSchedules(self) -> None:
+        """Load the setpoint schedules of the PIDs."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('schedules')
+        stored = {name: settings.value(name, "", str) for name in settings.childKeys()}
+        settings.endGroup()
+        self.schedules.clear()
+        for name, text in stored.items():
+            if name not in self.pids or not text:
+                continue
+            try:
+                self.schedules[name] = setpointSchedule.Profile.fromDict(json.loads(text))
+            except (ValueError, KeyError, TypeError) as exc:
+                log.error(f"Invalid setpoint schedule of PID '{name}': {exc}")
+
+    def applySchedules(self, timestamp: float) -> None:
+        """Set the setpoints of the PIDs according to their schedules."""
+        for name, profile in list(self.schedules.items()):
+            setpoint, event = profile.update(timestamp)
+            if setpoint is not None and setpoint != self.pids[name].setpoint:
+                self.pids[name].setpoint = setpoint
+                if event:
+                    self.tightenReadout()
+            if event or profile.finished(timestamp):
+                self.settingsWriter.write({f"pid{name}/setpoint": self.pids[name].setpoint})
+            if profile.finished(timestamp):
+                del self.schedules[name]
+                QtCore.QSettings().remove(f"schedules/{name}")
+                log.info(f"The setpoint schedule of PID '{name}' finished.")
+
+    @pyqtSlot()
+    def setupFusion(self) -> None:
+        """Configure the validity checks of the sensors and the outlier rejection."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('fusion')
+        self.sensorFusion.stuck_time = settings.value('stuckTime', 0, float)
+        self.sensorFusion.valid_range = (settings.value('minimum', -math.inf, float),
+                                         settings.value('maximum', math.inf, float))
+        self.sensorFusion.outlier_threshold = settings.value('outlierThreshold', 1, float)
+        settings.endGroup()
+
+    def _setReadoutTimer(self, interval: float) -> None:
+        """Set the interval (in s) of the readout timer, if it changed."""
+        interval_ms = int(interval * 1000)
+        if interval_ms != self.readoutTimer.interval():
+            self.readoutTimer.setInterval(interval_ms)
+
+    def tightenReadout(self) -> None:
+        """Return to the shortest readout interval, if it is adaptive."""
+        if self.adaptiveInterval is not None:
+            self._setReadoutTimer(self.adaptiveInterval.tighten())
+
+    def adaptReadoutInterval(self, inputs: dict[str, float]) -> None:
+        """Adapt the readout interval to the control errors and the changes of the PID inputs."""
+        if any(tuner.state == 'running' for tuner in self.autotuners.values()):
+            self.tightenReadout()  # The relay test needs a good time resolution.
+            return
+        errors = []
+        values = {}
+        for key, pid in self.pids.items():
+            value = inputs.get(key, math.nan)
+            if math.isnan(value):
+                continue
+            values[key] = value
+            if self.pidState[key] == 2:
+                errors.append(pid.setpoint - value)
+        self._setReadoutTimer(self.adaptiveInterval.update(errors, values,  # type: ignore
+                                                           time.monotonic()))
+
+    def setupCheckpoint(self) -> None:
+        """Open the checkpoint file and restore the PID states and the data of it."""
+        self.checkpoint: Optional[checkpoint.Checkpoint] = None
+        self.last_checkpoint = time.monotonic()
+        settings = QtCore.QSettings()
+        settings.beginGroup('checkpoint')
+        if not settings.value('enabled', True, bool):
+            return
+        # Next to the settings file and named like it, such that each controller has its own.
+        filename = settings.value(
+            'file', os.path.splitext(settings.fileName())[0] + ".checkpoint", str)
+        try:
+            os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+            self.checkpoint = checkpoint.Checkpoint(filename)
+            result = self.checkpoint.read()
+        except Exception as exc:
+            log.exception(f"Opening the checkpoint file '{filename}' failed.", exc_info=exc)
+            return
+        if result is None:
+            return
+        timestamp, pids, data = result
+        age = time.time() - timestamp
+        if not 0 <= age <= settings.value('maxAge', 3600, float):
+            log.info(f"Checkpoint of {age:.0f} s age is not restored.")
+            return
+        # Continue as if the last calculation happened one readout interval ago.
+        elapsed = min(age, QtCore.QSettings().value('readoutInterval', 5000, int) / 1000)
+        for name, state in pids.items():
+            if name in self.pids and self.pids[name].auto_mode:
+                checkpoint.restorePIDState(self.pids[name], state, elapsed)
+        self.data = data
+        log.info(f"Checkpoint of {age:.0f} s age restored.")
+
+    def writeCheckpoint(self) -> None:
+        """Write the PID states and the current data to the checkpoint file."""
+        if self.checkpoint is None:
+            return
+        self.last_checkpoint = time.monotonic()
+        try:
+            self.checkpoint.write({name: checkpoint.getPIDState(pid)
+                                   for name, pid in self.pids.items()}, self.data)
+        except Exception as exc:
+            log.exception("Writing the checkpoint failed.", exc_info=exc)
+
+    @pyqtSlot()
+    def setupOutputs(self) -> None:
+        """Configure deadband, write interval and slew rate of the outputs."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('outputs')
+        manager = self.outputManager
+        manager.defaults['deadband'] = settings.value('deadband', 0, float)
+        manager.defaults['minInterval'] = settings.value('minInterval', 0, float)
+        manager.defaults['maxSlew'] = (None if settings.value('maxSlewNone', True, bool)
+                                       else settings.value('maxSlew', type=float))
+        for name in settings.childGroups():
+            settings.beginGroup(name)
+            manager.configure(
+                name,
+                deadband=settings.value('deadband', type=float) if settings.contains(
+                    'deadband') else None,
+                min_interval=settings.value('minInterval', type=float) if settings.contains(
+                    'minInterval') else None,
+                max_slew=settings.value('maxSlew', type=float) if settings.contains(
+                    'maxSlew') else None,
+            )
+            settings.endGroup()
+
+    @pyqtSlot()
+    def setupStorage(self) -> None:
+        """Configure the storage policies, which values are written to the database."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('storage')
+        storage = self.storage
+        try:
+            storage.setDefaults(policy=settings.value('policy', 'all', str),
+                                n=settings.value('n', 1, int),
+                                interval=settings.value('interval', 60, float),
+                                deadband=settings.value('deadband', 0, float))
+        except ValueError as exc:
+            log.error(f"Invalid storage configuration: {exc}")
+        for name in settings.childGroups():
+            settings.beginGroup(name)
+            try:
+                storage.configure(
+                    name,
+                    policy=settings.value('policy', type=str) if settings.contains(
+                        'policy') else None,
+                    n=settings.value('n', type=int) if settings.contains('n') else None,
+                    interval=settings.value('interval', type=float) if settings.contains(
+                        'interval') else None,
+                    deadband=settings.value('deadband', type=float) if settings.contains(
+                        'deadband') else None,
+                )
+            except ValueError as exc:
+                log.error(f"Invalid storage configuration of '{name}': {exc}")
+            settings.endGroup()
+
+    @pyqtSlot()
+    def setupFilters(self) -> None:
+        """Configure the filter pipelines of the sensor channels."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('filters')
+        self.filterRaw = settings.value('raw', False, bool)
+        pipelines = {}
+        for name in settings.childGroups():
+            pipelines[name] = settings.value(f"{name}/pipeline", "", str)
+        settings.endGroup()
+        try:
+            self.filterBank.configure(pipelines)
+        except ValueError as exc:
+            log.error(f"Invalid filter configuration: {exc}")
+
+    @pyqtSlot()
+    def setupAlarms(self) -> None:
+        """Configure the alarm rules."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('alarms')
+        rules = {}
+        for name in settings.childGroups():
+            settings.beginGroup(name)
+            rules[name] = {key: settings.value(key) for key in settings.childKeys()}
+            settings.endGroup()
+        settings.endGroup()
+        try:
+            self.alarms.configure(rules)
+        except ValueError as exc:
+            log.error(f"Invalid alarm configuration: {exc}")
+
+    @pyqtSlot()
+    def setupPublisher(self) -> None:
+        """Configure whether only changed values are published, and their deadbands."""
+        settings = QtCore.QSettings()
+        settings.beginGroup('publisher')
+        if not settings.value('changeOnly', False, bool):
+            self.publishDetector = None
+            return
+        if self.publishDetector is None:
+            self.publishDetector = changeDetector.ChangeDetector()
+        detector = self.publishDetector
+        detector.deadband = settings.value('deadband', 0, float)
+        detector.keyframe_interval = settings.value('keyframeInterval', 60, float)
+        detector.deadbands.clear()
+        for name in settings.childGroups():
+            if settings.contains(f"{name}/deadband"):
+                detector.configure(name, settings.value(f"{name}/deadband", type=float))
 
     def get_PID_settings(self, pid: Union[str, int]) -> dict[str, Any]:
         PID_settings = {
@@ -269,8 +717,13 @@ class TemperatureController(QtCore.QObject):
             "sensor": ("", str),
             "output": ("", str),
             "state": (0, int),
+            "setpointSource": ("", str),
+            "feedforward": ("", str),
+            "feedforwardGain": (0, float),
+            "feedforwardReference": (0, float),
         }
         config = {}
+        self.settingsWriter.flush()
         settings = QtCore.QSettings()
         settings.beginGroup(f'pid{pid}')
         for key, setting in PID_settings.items():
@@ -290,10 +743,22 @@ class TemperatureController(QtCore.QObject):
         except AttributeError:
             pass
         self.stopSignal.emit()
-        self.listenerThread.wait(10000)  # timeout in ms
+        try:
+            self.listenerThread.wait(10000)  # timeout in ms
+        except AttributeError:
+            pass  # No listener thread.
 
+        try:
+            self.rpcDispatcher.close()
+        except AttributeError:
+            pass  # No LECO.
+        self.settingsWriter.flush()
         # Close the sensor and database
         self.inputOutput.close()
+        if self.checkpoint is not None:
+            self.writeCheckpoint()
+            self.checkpoint.close()
+            self.checkpoint = None
         try:
             self.database.close()
         except AttributeError:
@@ -308,6 +773,33 @@ class TemperatureController(QtCore.QObject):
 
     # CONNECTIONS
 
+    def connectDatabaseInBackground(self) -> None:
+        """(Re)Establish the database connection in a thread, not blocking the control loop."""
+        if not self._database_lock.acquire(blocking=False):
+            return  # Already connecting.
+
+        def connect():
+            try:
+                database = openDatabase()
+            finally:
+                self._database_lock.release()
+            if database is not None:
+                # Swap it in the Qt thread, where the old connection is used.
+                self.databaseConnected.emit(database)
+        threading.Thread(target=connect, name="connectDatabase", daemon=True).start()
+
+    @pyqtSlot(object)
+    def setDatabase(self, database) -> None:
+        """Use the connection `database` and close the previous one."""
+        try:
+            old = self.database
+        except AttributeError:
+            pass  # no database present
+        else:
+            if old is not database:
+                old.close()
+        self.database = database
+
     def connectDatabase(self):
         """(Re)Establish a connection to the database for storing sensor data."""
         try:
@@ -315,77 +807,173 @@ class TemperatureController(QtCore.QObject):
             del self.database
         except AttributeError:
             pass  # no database present
-        if psycopg2 is None:
-            return
-        try:
-            self.database = psycopg2.connect(**connectionData.database, connect_timeout=5)
-        except AttributeError:
-            pass
-        except Exception as exc:
-            log.exception("Database connection error.", exc_info=exc)
+        database = openDatabase()
+        if database is not None:
+            self.database = database
 
     # CONFIG
 
     def setTimerInterval(self, name, interval):
         """Set the interval for a timer with `name` to `interval`."""
         # it is the only timer right now.
-        self.readoutTimer.setInterval(interval)
+        if self.adaptiveInterval is None:
+            self.readoutTimer.setInterval(interval)
+        else:
+            self.setupReadout()
 
     @pyqtSlot(str)
     def sendSensorCommand(self, command: str):
         """Send a command to the sensors."""
         return self.inputOutput.executeCommand(command)
 
+    def get_driver_statistics(self) -> dict[str, dict[str, float]]:
+        """Get the number of reads, errors, and the read duration of each sensor driver."""
+        return self.inputOutput.getDriverStatistics()
+
     # OPERATION
 
     @pyqtSlot()
     def readTimeout(self) -> None:
         """Read the sensors and calculate a pid value."""
-        data = self.inputOutput.getSensors()
+        if self.first_tick:
+            self.first_tick = False
+            self.startup_duration = time.perf_counter() - self.start_time
+            log.info(f"First control tick {self.startup_duration:.3f} s after start.")
+        raw = self.inputOutput.getSensors()
+        data = self.filterBank.process(raw)
+        if self.filterRaw and data is not raw:
+            for channel in self.filterBank.channels:
+                if channel in raw:
+                    data[f'raw{channel}'] = raw[channel]
+        inputs = self.sensorFusion.fuse(data, self.pidSensor, time.monotonic())
         output = {}
-        for key in self.pids.keys():
-            for sensor in self.pidSensor[key]:
-                try:
-                    output[key] = self.pids[key](data[sensor])
-                except KeyError:
-                    pass
-                else:
-                    if self.pidState[key] == 2:
-                        self.setOutput(self.pidOutput[key], output[key])
-                        if self.last_value_set + 60 < time.time():
-                            self.settings.setValue(f"pid{key}/lastOutput",
-                                                   output[key])
-                            pass
-                    break  # Valid sensor found: stop loop.
+        store_output = self.last_value_set + 60 < time.time()
+        if self.schedules:
+            self.applySchedules(time.time())
+        try:
+            order = controlGraph.evaluationOrder(self.pids.keys(), self.pidSetpointSource)
+        except ValueError:
+            order = list(self.pids.keys())
+        for key in order:
+            source = self.pidSetpointSource.get(key)
+            if source and output.get(source) is not None:
+                self.pids[key].setpoint = output[source]  # cascade
+            value = inputs.get(key, math.nan)
+            if math.isnan(value):
+                continue  # No valid sensor.
+            tuner = self.autotuners.get(key)
+            if tuner is not None and tuner.state == 'running':
+                output[key] = self.autotuneStep(key, tuner, value)
+            else:
+                output[key] = self.pids[key](value)
+                ff_sensor, gain, reference = self.pidFeedforward.get(key, ("", 0, 0))
+                if ff_sensor and output[key] is not None:
+                    output[key] = controlGraph.feedforward(
+                        output[key], data, ff_sensor, gain, reference,
+                        self.pids[key].output_limits)
+            if self.pidState[key] == 2:
+                self.outputManager.request(self.pidOutput[key], output[key])
+                if store_output:
+                    self.settings.setValue(f"pid{key}/lastOutput", output[key])
+        if store_output:
+            self.last_value_set = time.time()
+        if self.settingsWriter.pending:
+            self.settingsWriter.flush()
+        self.outputManager.flush()
         for key in output.keys():
             data[f'pidOutput{key}'] = output[key]
         self.data = data
-        self.writeDatabase(data)
-        self.publisher(data)
+        self.tick += 1
+        self.tick_time = time.time()
+        self._full_state = None
+        if self.adaptiveInterval is not None:
+            self.adaptReadoutInterval(inputs)
+        if (time.monotonic() - self.last_checkpoint
+                >= self.settings.value('checkpoint/interval', 10, float)):
+            self.writeCheckpoint()
+        stored = self.storage.process(data, time.monotonic())
+        if stored:
+            self.writeDatabase(stored)
+        self.checkAlarms(data, output)
+        if self.publishDetector is None:
+            self.publisher(data)
+        else:
+            self.publisher(self.publishDetector.filter(data))
+
+    def checkAlarms(self, data: dict[str, Any], output: dict[str, Optional[float]]) -> None:
+        """Evaluate the alarm rules on the data, the saturation of the PID outputs and the age
+        of the last database write, and publish the changed alarms."""
+        if not self.alarms.names:
+            return
+        now = time.time()
+        values = dict(data)
+        for key, value in output.items():
+            if self.pidState[key] == 2 and value is not None:
+                values[alarms.saturationKey(key)] = float(value in self.pids[key].output_limits)
+        values[alarms.DATABASE_AGE] = now - self.last_database_write
+        events = self.alarms.evaluate(values, now)
+        if events:
+            self.publishAlarms(events)
+
+    def publishAlarms(self, events: list[dict[str, Any]]) -> None:
+        """Log the alarm `events` and publish them via the alarm publisher and LECO."""
+        for event in events:
+            if event['active']:
+                log.warning(f"Alarm '{event['name']}' raised: {event['kind']} of "
+                            f"'{event['channel']}' is {event['value']:.4g}, limit "
+                            f"{event['limit']:.4g}.")
+            else:
+                log.info(f"Alarm '{event['name']}' cleared.")
+            self.alarmPublisher.send_snapshot(event, topic="alarm")
+            if self.lecoPublisher is not None:
+                self.lecoPublisher.send_data(data={'alarm': event})
 
     @pyqtSlot(str, float)
-    def setOutput(self, name: str, value: float) -> None:
-        """Set the output with `name` to `value` if the state allows it."""
+    def setOutput(self, name: str, value: float) -> bool:
+        """Set the output with `name` to `value` if the state allows it, return success."""
         try:
-            self.inputOutput.setOutput(name, value)
+            written = self.inputOutput.setOutput(name, value)
         except KeyError:
             log.warning(f"Output '{name}' is unknown.")
+            return False
+        if written:
+            self.outputManager.record(name, value)
+        return written
+
+    @pyqtSlot(str)
+    def invalidateOutput(self, name: str) -> None:
+        """Write the output `name` again at the next tick, even if its value did not change."""
+        self.outputManager.invalidate(name)
 
     def writeDatabase(self, data: dict[str, float]):
         """Write the iterable data in the database with the timestamp."""
+        if self.ingestPublisher is not None:
+            self.publishSnapshot(data)
+            return
         try:  # Check connection to the database and reconnect if necessary.
             database = self.database
         except AttributeError:
             if self.tries < 10:
                 self.tries += 1
             else:
-                self.connectDatabase()
+                self.connectDatabaseInBackground()
                 self.tries = 0
             return  # No database connection existing.
         table = self.settings.value('database/table', defaultValue="", type=str)
         if table == "":
             log.warning("No database table is configured.")
             return
+        try:
+            self.tableSchema.mode = self.settings.value('database/schemaMode', 'drop', str)
+        except ValueError as exc:
+            log.error(f"Invalid database configuration: {exc}")
+        self.tableSchema.overflow_column = self.settings.value('database/overflowColumn',
+                                                               "overflow", str)
+        try:
+            data = self.tableSchema.adjust(database, table, data)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.connectDatabaseInBackground()  # Connection lost, reconnect.
+            return
         columns = "timestamp"
         for key in data.keys():
             columns += f", {key}"
@@ -395,42 +983,214 @@ class TemperatureController(QtCore.QObject):
                 cursor.execute(f"INSERT INTO {table} ({columns}) VALUES (%s{', %s' * length})",
                                (datetime.datetime.now(), *data.values()))
             except (psycopg2.OperationalError, psycopg2.InterfaceError):
-                self.connectDatabase()  # Connection lost, reconnect.
+                self.connectDatabaseInBackground()  # Connection lost, reconnect.
             except Exception as exc:
                 log.exception("Database write error.", exc_info=exc)
                 database.rollback()
+                if getattr(exc, 'pgcode', None) in ('42703', '42P01'):
+                    # Undefined column or table: the cached columns are outdated.
+                    self.tableSchema.invalidate(table)
             else:
                 database.commit()
+                self.last_database_write = time.time()
+
+    def publishSnapshot(self, data: dict[str, float]) -> None:
+        """Publish the data with the timestamp and the table name for the central ingest."""
+        table = self.settings.value('database/table', defaultValue="", type=str)
+        if table == "":
+            log.warning("No database table is configured.")
+            return
+        self.ingestPublisher.send_snapshot(
+            {'table': table, 'timestamp': datetime.datetime.now(), 'data': data})
+        self.last_database_write = time.time()
 
     # LECO methods
-    def handle_message(self, message: Message) -> None:
+    def handle_message(self, message: "Message") -> None:
+        from pyleco.core.message import MessageTypes
         if message.header_elements.message_type != MessageTypes.JSON:
             log.warning(f"Unknown message received {message}.")
             return
-        result = self.leco_listener.message_handler.rpc.process_request(message.payload[0])
-        self.leco_listener.communicator.send(receiver=message.sender,
-                                             conversation_id=message.conversation_id,
-                                             message_type=message.header_elements.message_type,
-                                             data=result
-                                             )
+        self.rpcDispatcher.dispatch(message.payload[0], message)
+
+    def send_rpc_response(self, result: Any, message: "Message") -> None:
+        """Send the `result` of the request `message` (from any thread)."""
+        communicator = self.leco_listener.get_communicator()
+        communicator.send(receiver=message.sender,
+                          conversation_id=message.conversation_id,
+                          message_type=message.header_elements.message_type,
+                          data=result
+                          )
+
+    def get_rpc_statistics(self) -> dict[str, int]:
+        """Get the number of inline and pooled requests, of timeouts, and of busy methods."""
+        return self.rpcDispatcher.statistics
 
     def set_database_table(self, table_name: str) -> None:
         settings = QtCore.QSettings()
         settings.setValue("database/table", table_name)
 
+    def set_database_schema_mode(self, mode: str, overflow_column: Optional[str] = None) -> None:
+        """Set what to do with keys, which are not columns of the table.
+
+        :param mode: 'drop' them, 'add' columns for them, or store them in the JSON 'overflow'
+            column.
+        :param overflow_column: Name of the overflow column.
+        """
+        if mode not in tableSchema.MODES:
+            raise ValueError(f"Unknown schema mode '{mode}'.")
+        settings = QtCore.QSettings()
+        settings.setValue("database/schemaMode", mode)
+        if overflow_column is not None:
+            settings.setValue("database/overflowColumn", overflow_column)
+        self.tableSchema.invalidate()
+
     def get_database_table(self) -> str:
         return QtCore.QSettings().value("database/table", type=str)
 
-    def set_readout_interval(self, interval: float) -> None:
-        """Set the readout interval in seconds (ms resolution)."""
+    def set_readout_interval(self, interval: Optional[float] = None,
+                             minimum: Optional[float] = None,
+                             maximum: Optional[float] = None,
+                             adaptive: Optional[bool] = None) -> None:
+        """Set the readout interval in seconds (ms resolution).
+
+        :param interval: Fixed readout interval.
+        :param minimum: Shortest adaptive interval, defaults to `interval`.
+        :param maximum: Longest adaptive interval.
+        :param adaptive: Whether to adapt the interval to the control errors.
+        """
         settings = QtCore.QSettings()
-        interval_ms = int(interval * 1000)
-        settings.setValue("readoutInterval", interval_ms)
-        self.readoutTimer.setInterval(interval_ms)
+        if interval is not None:
+            settings.setValue("readoutInterval", int(interval * 1000))
+        for key, value in (('minInterval', minimum), ('maxInterval', maximum),
+                           ('adaptive', adaptive)):
+            if value is not None:
+                settings.setValue(f"readout/{key}", value)
+        self.setupReadout()
 
     def get_readout_interval(self) -> float:
         return QtCore.QSettings().value("readoutInterval", type=int) / 1000
 
+    def get_effective_readout_interval(self) -> float:
+        """Get the current readout interval in s, which differs from the fixed one if adaptive."""
+        return self.readoutTimer.interval() / 1000
+
+    def set_output_parameters(self, name: Optional[str] = None,
+                              deadband: Optional[float] = None,
+                              min_interval: Optional[float] = None,
+                              max_slew: Optional[float] = None) -> None:
+        """Set the write parameters of output `name` or, if None, the defaults of all outputs.
+
+        :param deadband: Changes up to this value are not written.
+        :param min_interval: Minimum time in s between two writes.
+        :param max_slew: Maximum change per second, infinity for no limit.
+        """
+        settings = QtCore.QSettings()
+        settings.beginGroup('outputs' if name is None else f'outputs/{name}')
+        if deadband is not None:
+            settings.setValue('deadband', deadband)
+        if min_interval is not None:
+            settings.setValue('minInterval', min_interval)
+        if max_slew is not None:
+            if name is None:
+                settings.setValue('maxSlewNone', math.isinf(max_slew))
+            settings.setValue('maxSlew', max_slew)
+        settings.endGroup()
+        self.setupOutputs()
+
+    def get_output_statistics(self) -> dict[str, dict[str, int]]:
+        """Get the number of written and suppressed writes for each output."""
+        return self.outputManager.statistics
+
+    def set_storage_policy(self, name: Optional[str] = None,
+                           policy: Optional[str] = None,
+                           n: Optional[int] = None,
+                           interval: Optional[float] = None,
+                           deadband: Optional[float] = None) -> None:
+        """Set the storage policy of channel `name` or, if None, the default of all channels.
+
+        :param policy: 'all', 'every', 'mean', 'min', 'max', or 'change'.
+        :param n: Store every `n`th value for 'every'.
+        :param interval: Interval in s for 'mean', 'min', 'max' and the keyframes of 'change'.
+        :param deadband: Changes up to this value are not stored for 'change'.
+        """
+        if policy is not None and policy not in storagePolicy.POLICIES:
+            raise ValueError(f"Unknown storage policy '{policy}'.")
+        settings = QtCore.QSettings()
+        settings.beginGroup('storage' if name is None else f'storage/{name}')
+        for key, value in (('policy', policy), ('n', n), ('interval', interval),
+                           ('deadband', deadband)):
+            if value is not None:
+                settings.setValue(key, value)
+        settings.endGroup()
+        self.setupStorage()
+
+    def set_filter(self, name: str, pipeline: str = "") -> None:
+        """Set the filter pipeline of channel `name`, for example "median:5, ema:0.3".
+
+        Empty `pipeline` removes the filters. The state of all filters is reset.
+        """
+        signalFilter.parsePipeline(pipeline)
+        settings = QtCore.QSettings()
+        if pipeline:
+            settings.setValue(f"filters/{name}/pipeline", pipeline)
+        else:
+            settings.remove(f"filters/{name}")
+        self.setupFilters()
+
+    def set_alarm(self, name: str, kind: Optional[str] = None, channel: str = "",
+                  limit: float = 0, hysteresis: float = 0, delay: float = 0) -> None:
+        """Set the alarm rule `name` or remove it, if `kind` is None.
+
+        :param kind: 'high', 'low', 'rate', 'stale', 'saturation', or 'database'.
+        :param channel: Data key to watch, the PID name for 'saturation'.
+        :param limit: Limit of the value, the rate (per s) or the age (in s).
+        :param hysteresis: The alarm clears once the value is this much within the limit.
+        :param delay: The condition has to hold this long (in s) to raise the alarm.
+        """
+        settings = QtCore.QSettings()
+        settings.remove(f"alarms/{name}")
+        if kind is not None:
+            rule = alarms.validateRule(name, dict(kind=kind, channel=channel, limit=limit,
+                                                  hysteresis=hysteresis, delay=delay))
+            for key, value in rule.items():
+                settings.setValue(f"alarms/{name}/{key}", value)
+        self.setupAlarms()
+
+    def get_alarms(self) -> dict[str, dict[str, Any]]:
+        """Get the events of the active alarms by their name."""
+        return self.alarms.active
+
+    def get_storage_statistics(self) -> dict[str, int]:
+        """Get the number of received and stored values."""
+        return self.storage.statistics
+
+    def set_publisher_parameters(self, name: Optional[str] = None,
+                                 deadband: Optional[float] = None,
+                                 keyframe_interval: Optional[float] = None,
+                                 change_only: Optional[bool] = None) -> None:
+        """Set the publishing parameters of channel `name` or, if None, of all channels.
+
+        :param deadband: Changes up to this value are not published.
+        :param keyframe_interval: Time in s between two publications of all channels.
+        :param change_only: Whether to publish only changed channels.
+        """
+        settings = QtCore.QSettings()
+        settings.beginGroup('publisher' if name is None else f'publisher/{name}')
+        if deadband is not None:
+            settings.setValue('deadband', deadband)
+        if keyframe_interval is not None:
+            settings.setValue('keyframeInterval', keyframe_interval)
+        if change_only is not None:
+            settings.setValue('changeOnly', change_only)
+        settings.endGroup()
+        self.setupPublisher()
+
+    def get_publisher_statistics(self) -> dict[str, int]:
+        """Get the number of published and suppressed values, and of keyframes."""
+        if self.publishDetector is None:
+            return {}
+        return self.publishDetector.statistics
+
     def get_current_data(self) -> dict[str, float]:
         """Get current sensor and output data."""
         return self.data
@@ -439,12 +1199,165 @@ class TemperatureController(QtCore.QObject):
         if isinstance(pid, int):
             pid = str(pid)
         self.pids[pid].reset()
+        self._full_state = None
 
     def get_current_PID_state(self, pid: Union[int, str] = 0) -> tuple[float, float, float]:
         if isinstance(pid, int):
             pid = str(pid)
         return self.pids[pid].components
 
+    def get_full_state(self) -> dict[str, Any]:
+        """Get the settings, components and output of all PIDs, and the current data.
+
+        The state is created once per control tick, `version` is the format version and `tick`
+        the number of the control tick.
+        """
+        state = self._full_state
+        if state is not None:
+            return state
+        tick = self.tick
+        pids = {}
+        for name, pid in self.pids.items():
+            lower, upper = pid.output_limits
+            pids[name] = {
+                'setpoint': pid.setpoint, 'Kp': pid.Kp, 'Ki': pid.Ki, 'Kd': pid.Kd,
+                'lowerLimit': lower, 'upperLimit': upper, 'autoMode': pid.auto_mode,
+                'sensors': self.pidSensor.get(name, []), 'output': self.pidOutput.get(name),
+                'state': self.pidState.get(name, 0), 'components': pid.components,
+                'value': self.data.get(f"pidOutput{name}"),
+                'setpointSource': self.pidSetpointSource.get(name, ""),
+                'feedforward': self.pidFeedforward.get(name, ("", 0, 0)),
+            }
+        state = {'version': FULL_STATE_VERSION, 'tick': tick, 'timestamp': self.tick_time,
+                 'pids': pids, 'data': self.data}
+        if tick == self.tick:
+            self._full_state = state
+        return state
+
+    @pyqtSlot(object)
+    def provideFullState(self, container: dict[str, Any]) -> None:
+        """Store the full state in the `container` for a request of another thread."""
+        container['fullState'] = self.get_full_state()
+
+    # Autotuning
+    def start_autotune(self, pid: Union[int, str], amplitude: float,
+                       bias: Optional[float] = None, hysteresis: float = 0.1, cycles: int = 3,
+                       timeout: float = 3 * 3600, max_deviation: float = math.inf) -> None:
+        """Start a relay test of `pid` around its setpoint, replacing its output meanwhile.
+
+        The parameters are those of :class:`autotuner.RelayAutotuner`.
+
+        :param amplitude: Relay amplitude, negative for reverse acting loops (cooling).
+        :param bias: Output around which to switch, defaults to the last output.
+        """
+        pid = str(pid)
+        controller = self.pids[pid]
+        if self.pidState[pid] != 2:
+            raise ValueError(f"PID '{pid}' does not control its output (state 2).")
+        if bias is None:
+            bias = self.data.get(f"pidOutput{pid}")
+            if bias is None or math.isnan(bias):
+                bias = self.settings.value(f"pid{pid}/lastOutput", 0, float)
+        self.autotuners[pid] = autotuner.RelayAutotuner(
+            setpoint=controller.setpoint, bias=bias, amplitude=amplitude,
+            output_limits=controller.output_limits, hysteresis=hysteresis, cycles=cycles,
+            timeout=timeout, max_deviation=max_deviation)
+        log.info(f"Autotuning of PID '{pid}' started.")
+
+    def autotuneStep(self, pid: str, tuner: autotuner.RelayAutotuner, value: float) -> float:
+        """Get the output of the relay test and hand control back to the PID when finished."""
+        output = tuner.step(value, time.monotonic())
+        if tuner.state != 'running':
+            self._endAutotune(pid, tuner)
+        return output
+
+    def _endAutotune(self, pid: str, tuner: autotuner.RelayAutotuner) -> None:
+        # Bumpless transfer: continue from the relay's output.
+        controller = self.pids[pid]
+        controller.set_auto_mode(False)
+        controller.set_auto_mode(True, last_output=tuner.output)
+        if tuner.state == 'done':
+            log.info(f"Autotuning of PID '{pid}' finished: {tuner.result()}")
+        else:
+            log.warning(f"Autotuning of PID '{pid}' {tuner.state}: {tuner.message}")
+
+    def stop_autotune(self, pid: Union[int, str]) -> None:
+        """Abort the autotuning of `pid`."""
+        pid = str(pid)
+        tuner = self.autotuners.get(pid)
+        if tuner is not None and tuner.state == 'running':
+            tuner.state = 'aborted'
+            tuner.message = "Stopped by the user."
+            self._endAutotune(pid, tuner)
+
+    def get_autotune_result(self, pid: Union[int, str], rule: str = 'classic',
+                            apply: bool = False) -> dict[str, Any]:
+        """Get the state of the autotuning of `pid` and, if done, the suggested gains.
+
+        :param rule: Tuning rule, see :data:`autotuner.RULES`.
+        :param apply: Apply the suggested gains to the PID.
+        """
+        pid = str(pid)
+        try:
+            tuner = self.autotuners[pid]
+        except KeyError:
+            raise ValueError(f"PID '{pid}' has not been autotuned.")
+        status = tuner.status()
+        if tuner.state == 'done':
+            result = tuner.result(rule)
+            status.update(result)
+            if apply:
+                self.set_PIDs_configuration(
+                    {pid: {key: result[key] for key in ('Kp', 'Ki', 'Kd')}})
+        elif apply:
+            raise ValueError(f"Autotuning of PID '{pid}' is {tuner.state}.")
+        return status
+
+    def get_sensor_health(self) -> dict[str, dict[str, Any]]:
+        """Get the health of the sensors used by the PIDs: whether the last reading was valid,
+        the reason otherwise, the time in s since the value changed and the number of invalid
+        readings."""
+        return self.sensorFusion.get_health()
+
+    def set_setpoint_schedule(self, pid: Union[int, str],
+                              points: Optional[list[tuple[Union[str, float], float]]] = None,
+                              ramp: bool = False, period: Optional[str] = None) -> None:
+        """Set the setpoint schedule of `pid` or remove it, if `points` is None.
+
+        :param points: List of times and setpoints. The times are "HH:MM" (or "Mon HH:MM" for
+            weekly schedules) or s since the start of the period, or for a single run s from now.
+        :param ramp: Ramp linearly between the points instead of stepping.
+        :param period: 'daily', 'weekly' or None for a single run.
+        """
+        pid = str(pid)
+        if pid not in self.pids:
+            raise ValueError(f"PID '{pid}' does not exist.")
+        settings = QtCore.QSettings()
+        if points is None:
+            self.schedules.pop(pid, None)
+            settings.remove(f"schedules/{pid}")
+            return
+        profile = setpointSchedule.Profile(
+            [setpointSchedule.parseTime(t, period) for t, _ in points],
+            [float(setpoint) for _, setpoint in points], ramp=ramp, period=period)
+        self.schedules[pid] = profile
+        settings.setValue(f"schedules/{pid}", json.dumps(profile.toDict()))
+        self.applySchedules(time.time())
+
+    def start_setpoint_ramp(self, pid: Union[int, str], target: float, rate: float) -> None:
+        """Ramp the setpoint of `pid` from the current one to `target` with `rate` per minute."""
+        pid = str(pid)
+        if pid not in self.pids:
+            raise ValueError(f"PID '{pid}' does not exist.")
+        profile = setpointSchedule.ramp(self.pids[pid].setpoint, target, rate)
+        self.schedules[pid] = profile
+        QtCore.QSettings().setValue(f"schedules/{pid}", json.dumps(profile.toDict()))
+
+    def get_setpoint_schedule(self, pid: Union[int, str]) -> Optional[dict[str, Any]]:
+        """Get the setpoint schedule of `pid` (times in s) or None."""
+        profile = self.schedules.get(str(pid))
+        return None if profile is None else profile.toDict()
+
     def get_log(self) -> list[str]:
         return self.log.log
 
@@ -74,6 +74,10 @@ class Controller:
                 f"{name}/sensor", f"{name}/autoMode", f"{name}/lastOutput", f"{name}/state", f"{name}/output"]
         return self.sendObject('GET', keys)
 
+    def get_full_state(self):
+        """Get the settings, components and output of all pids and the current data."""
+        return self.sendObject('GET', ['fullState'])['fullState']
+
     def get_compontents(self, id):
         """Get the components of the pid controller."""
         key = f"pid{id}"
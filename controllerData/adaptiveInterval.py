@@ -0,0 +1,84 @@
+"""
+Adaptive readout interval depending on the control error and the stability of the sensors.
+
+classes
+-------
+AdaptiveInterval : minimum, maximum, tolerance, stability, factor
+    Stretch the readout interval while everything is calm, tighten it otherwise.
+"""
+
+from typing import Iterable
+
+
+class AdaptiveInterval:
+    """Determine the readout interval according to the control errors and sensor changes.
+
+    While all errors are within `tolerance` and all sensors change slower than `stability`,
+    the interval is multiplied by `factor` at every readout up to `maximum`. A larger error,
+    a faster change, or :meth:`tighten` (for example due to a setpoint change) returns to the
+    `minimum`.
+
+    :param minimum: Shortest interval in s.
+    :param maximum: Longest interval in s.
+    :param tolerance: Largest absolute control error considered calm.
+    :param stability: Largest absolute rate of change (per s) of a sensor considered stable.
+    :param factor: Factor by which the interval grows per calm readout.
+    """
+
+    def __init__(self, minimum: float = 5, maximum: float = 60, tolerance: float = 0.1,
+                 stability: float = 0.01, factor: float = 1.5) -> None:
+        self.configure(minimum=minimum, maximum=maximum, tolerance=tolerance,
+                       stability=stability, factor=factor)
+        self.interval = self.minimum
+        self.last: dict[str, tuple[float, float]] = {}  # sensor: (value, timestamp)
+
+    def configure(self, minimum: float = 5, maximum: float = 60, tolerance: float = 0.1,
+                  stability: float = 0.01, factor: float = 1.5) -> None:
+        """Set the parameters, the current interval is kept within the new bounds."""
+        if minimum <= 0 or maximum < minimum:
+            raise ValueError(f"Invalid interval bounds {minimum} s to {maximum} s.")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.stability = stability
+        self.factor = max(factor, 1)
+        self.interval = min(max(getattr(self, 'interval', minimum), minimum), maximum)
+
+    def tighten(self) -> float:
+        """Return to the shortest interval."""
+        self.interval = self.minimum
+        return self.interval
+
+    def stable(self, values: dict[str, float], timestamp: float) -> bool:
+        """Whether all `values` changed slower than the stability since the last call."""
+        stable = True
+        for name, value in values.items():
+            try:
+                last, last_time = self.last[name]
+            except KeyError:
+                stable = False  # No history yet.
+                continue
+            try:
+                rate = abs(value - last) / max(timestamp - last_time, 1e-9)
+            except TypeError:
+                continue
+            if not rate <= self.stability:  # also for NaN
+                stable = False
+        self.last = {name: (value, timestamp) for name, value in values.items()}
+        return stable
+
+    def update(self, errors: Iterable[float], values: dict[str, float],
+               timestamp: float) -> float:
+        """Return the next interval in s.
+
+        :param errors: Current control errors of the controlling PIDs.
+        :param values: Current values of the sensors used for control.
+        :param timestamp: Time of the readout in s.
+        """
+        calm = all(abs(error) <= self.tolerance for error in errors)  # NaN is not calm
+        stable = self.stable(values, timestamp)
+        if calm and stable:
+            self.interval = min(self.interval * self.factor, self.maximum)
+        else:
+            self.interval = self.minimum
+        return self.interval
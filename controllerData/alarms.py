@@ -0,0 +1,158 @@
+"""
+Alarms, which monitor the data for limit violations with hysteresis and debouncing.
+
+classes
+-------
+AlarmEngine : rules
+    Evaluate the alarm rules on each data snapshot and report the changes.
+
+functions
+---------
+validateRule : name, rule
+    Validate and normalize an alarm rule.
+
+A rule is a dictionary with the keys 'kind', 'channel', 'limit', 'hysteresis' and 'delay'. The
+kinds are
+
+- 'high': The value of the channel exceeds the limit.
+- 'low': The value of the channel falls below the limit.
+- 'rate': The absolute rate of change (per s) of the channel exceeds the limit.
+- 'stale': The value of the channel did not change (or was missing) for longer than limit s.
+- 'saturation': The output of the PID `channel` has been at its output limits.
+- 'database': The last database write is older than limit s.
+
+An alarm is raised, once the condition holds for `delay` s, and it is cleared, once the value is
+back by `hysteresis` within the limit. Missing values do not change the alarm, except for 'stale'.
+"""
+
+import math
+from typing import Any, Optional
+
+import numpy as np
+
+KINDS = ('high', 'low', 'rate', 'stale', 'saturation', 'database')
+DATABASE_AGE = 'databaseAge'  # data key of the time since the last database write
+
+
+def saturationKey(pid: str) -> str:
+    """Return the data key of the saturation of `pid`."""
+    return f"pidSaturated{pid}"
+
+
+def validateRule(name: str, rule: dict[str, Any]) -> dict[str, Any]:
+    """Validate the `rule` and return it with all keys.
+
+    :raises ValueError: If the rule is invalid.
+    """
+    kind = rule.get('kind')
+    if kind not in KINDS:
+        raise ValueError(f"Alarm '{name}': unknown kind {kind!r}, use one of {KINDS}.")
+    channel = str(rule.get('channel') or "")
+    if not channel and kind != 'database':
+        raise ValueError(f"Alarm '{name}': a channel is required.")
+    try:
+        values = {key: float(rule.get(key) or 0) for key in ('limit', 'hysteresis', 'delay')}
+    except (TypeError, ValueError):
+        raise ValueError(f"Alarm '{name}': limit, hysteresis and delay have to be numbers.")
+    if values['hysteresis'] < 0 or values['delay'] < 0:
+        raise ValueError(f"Alarm '{name}': hysteresis and delay must not be negative.")
+    return {'kind': kind, 'channel': channel, **values}
+
+
+class AlarmEngine:
+    """Evaluate many alarm rules at once.
+
+    The rules are evaluated together as arrays, such that the effort per snapshot hardly grows
+    with the number of rules.
+
+    :param rules: Alarm names and their rules.
+    """
+
+    def __init__(self, rules: Optional[dict[str, dict[str, Any]]] = None) -> None:
+        self.active: dict[str, dict[str, Any]] = {}  # events of the active alarms
+        self.configure(rules or {})
+
+    def configure(self, rules: dict[str, dict[str, Any]]) -> None:
+        """Set the `rules`, active alarms of unchanged rules remain active.
+
+        :raises ValueError: If any rule is invalid, the old ones remain.
+        """
+        rules = {name: validateRule(name, rule) for name, rule in rules.items()}
+        old = getattr(self, 'rules', {})
+        self.active = {name: event for name, event in self.active.items()
+                       if rules.get(name) == old.get(name)}
+        self.rules = rules
+        self.names = list(rules)
+        keys = {name: self._key(rule) for name, rule in rules.items()}
+        self.channels = list(dict.fromkeys(keys.values()))
+        index = {channel: i for i, channel in enumerate(self.channels)}
+        self.index = np.array([index[keys[name]] for name in self.names], dtype=int)
+        self.kinds = np.array([KINDS.index(rule['kind']) for rule in rules.values()], dtype=int)
+        self.limits = np.array([rule['limit'] for rule in rules.values()])
+        self.hysteresis = np.array([rule['hysteresis'] for rule in rules.values()])
+        self.delays = np.array([rule['delay'] for rule in rules.values()])
+        self.low = self.kinds == KINDS.index('low')
+        self.rate = self.kinds == KINDS.index('rate')
+        self.stale = self.kinds == KINDS.index('stale')
+        self.states = np.array([name in self.active for name in self.names], dtype=bool)
+        self.pending = np.full(len(self.names), math.nan)  # since when the condition holds
+        self.last = np.full(len(self.channels), math.nan)  # last valid value
+        self.last_time = np.full(len(self.channels), math.nan)
+        self.changed = np.full(len(self.channels), math.nan)  # time of the last change
+
+    @staticmethod
+    def _key(rule: dict[str, Any]) -> str:
+        """Return the data key the `rule` watches."""
+        if rule['kind'] == 'saturation':
+            return saturationKey(rule['channel'])
+        elif rule['kind'] == 'database':
+            return DATABASE_AGE
+        return rule['channel']
+
+    def evaluate(self, data: dict[str, Any], timestamp: float) -> list[dict[str, Any]]:
+        """Evaluate the rules on `data` at `timestamp` (in s) and return the alarm events.
+
+        An event contains the alarm 'name', whether it is 'active', the 'kind', 'channel',
+        'limit', the 'value' and the 'timestamp'.
+        """
+        if not self.names:
+            return []
+        values = np.full(len(self.channels), math.nan)
+        for i, channel in enumerate(self.channels):
+            try:
+                values[i] = data[channel]
+            except (KeyError, TypeError, ValueError):
+                pass
+        valid = np.isfinite(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = (values - self.last) / (timestamp - self.last_time)
+        changed = valid & ((values != self.last) | np.isnan(self.changed))
+        self.changed = np.where(changed, timestamp, self.changed)
+        self.changed = np.where(np.isnan(self.changed), timestamp, self.changed)
+        self.last = np.where(valid, values, self.last)
+        self.last_time = np.where(valid, timestamp, self.last_time)
+
+        measure = values[self.index]
+        measure = np.where(self.rate, np.abs(rates[self.index]), measure)
+        measure = np.where(self.stale, timestamp - self.changed[self.index], measure)
+        with np.errstate(invalid='ignore'):
+            violated = np.where(self.low, measure < self.limits, measure > self.limits)
+            back = np.where(self.low, measure >= self.limits + self.hysteresis,
+                            measure <= self.limits - self.hysteresis)
+        self.pending = np.where(violated & np.isnan(self.pending), timestamp, self.pending)
+        self.pending = np.where(violated, self.pending, math.nan)
+        raised = ~self.states & violated & (timestamp - self.pending >= self.delays)
+        cleared = self.states & back
+        self.states = (self.states | raised) & ~cleared
+        events = []
+        for i in np.flatnonzero(raised | cleared):
+            name = self.names[i]
+            event = {'name': name, 'active': bool(raised[i]), **self.rules[name],
+                     'value': float(measure[i]), 'timestamp': timestamp}
+            del event['hysteresis'], event['delay']
+            if raised[i]:
+                self.active[name] = event
+            else:
+                self.active.pop(name, None)
+            events.append(event)
+        return events
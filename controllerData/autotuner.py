@@ -0,0 +1,161 @@
+"""
+Relay autotuning of a PID loop.
+
+classes
+-------
+RelayAutotuner : setpoint, bias, amplitude, output_limits, hysteresis, cycles, timeout
+    Drive a loop with a relay and derive PID gains from the resulting oscillation.
+
+functions
+---------
+gains : Ku, Tu, rule
+    Calculate the PID gains from the ultimate gain and period.
+
+The relay switches the output between `bias + amplitude` and `bias - amplitude` whenever the
+process value crosses the setpoint (with hysteresis). After a few cycles the period `Tu` and
+the amplitude `a` of the oscillation yield the ultimate gain `Ku = 4 d / (pi a)`, with `d` the
+relay amplitude. The tuning rules turn them into gains (Åström and Hägglund).
+"""
+
+import math
+from typing import Any, Optional
+
+# rule: (Kp / Ku, Ti / Tu, Td / Tu), Ti=None for no integral part
+RULES: dict[str, tuple[float, Optional[float], float]] = {
+    'classic': (0.6, 0.5, 0.125),  # Ziegler-Nichols
+    'some overshoot': (0.33, 0.5, 0.33),
+    'no overshoot': (0.2, 0.5, 0.33),
+    'PI': (0.45, 1 / 1.2, 0),
+    'P': (0.5, None, 0),
+}
+
+
+def gains(Ku: float, Tu: float, rule: str = 'classic') -> dict[str, float]:
+    """Calculate the PID gains for the ultimate gain `Ku` and period `Tu` (in s)."""
+    try:
+        kp, ti, td = RULES[rule]
+    except KeyError:
+        raise ValueError(f"Unknown tuning rule '{rule}', use one of {list(RULES)}.")
+    Kp = kp * Ku
+    return {'Kp': Kp, 'Ki': 0 if ti is None else Kp / (ti * Tu), 'Kd': Kp * td * Tu}
+
+
+class RelayAutotuner:
+    """Relay feedback test of one loop.
+
+    Call :meth:`step` with every reading, it returns the output to set. The test is finished,
+    when `state` is 'done' or 'failed'.
+
+    :param setpoint: The process value around which to oscillate.
+    :param bias: Output around which the relay switches, for example the last PID output.
+    :param amplitude: Relay amplitude. Negative for reverse acting loops (cooling), where a
+        higher output decreases the process value.
+    :param output_limits: The relay outputs are limited to these (lower, upper) limits.
+    :param hysteresis: Noise band around the setpoint.
+    :param cycles: Number of oscillation periods to measure (after the first one).
+    :param timeout: Maximum duration of the test in s.
+    :param max_deviation: Abort, if the process value deviates more from the setpoint.
+    """
+
+    def __init__(self, setpoint: float, bias: float, amplitude: float,
+                 output_limits: tuple[Optional[float], Optional[float]] = (None, None),
+                 hysteresis: float = 0.1, cycles: int = 3, timeout: float = 3 * 3600,
+                 max_deviation: float = math.inf) -> None:
+        if amplitude == 0:
+            raise ValueError("The relay amplitude must not be zero.")
+        self.setpoint = setpoint
+        self.hysteresis = abs(hysteresis)
+        self.cycles = max(int(cycles), 1)
+        self.timeout = timeout
+        self.max_deviation = max_deviation
+        self.reverse = amplitude < 0
+        lower, upper = output_limits
+        self.high = self._limit(bias + abs(amplitude), lower, upper)
+        self.low = self._limit(bias - abs(amplitude), lower, upper)
+        if self.high <= self.low:
+            raise ValueError("The output limits leave no room for the relay.")
+        self.state = 'running'
+        self.message = ""
+        self.start: Optional[float] = None
+        self.heating: Optional[bool] = None  # whether the relay drives the value up
+        self.switches: list[float] = []  # times of the switches to driving up
+        self.extremes: list[float] = []  # maximum and minimum of each half period
+        self.extreme: Optional[float] = None
+        self.history: list[tuple[float, float, float]] = []  # timestamp, value, output
+
+    @staticmethod
+    def _limit(value: float, lower: Optional[float], upper: Optional[float]) -> float:
+        if lower is not None:
+            value = max(value, lower)
+        if upper is not None:
+            value = min(value, upper)
+        return value
+
+    @property
+    def output(self) -> float:
+        """The current relay output."""
+        return self.high if self.heating != self.reverse else self.low
+
+    def step(self, value: float, timestamp: float) -> float:
+        """Process a reading and return the output."""
+        if self.start is None:
+            self.start = timestamp
+            self.heating = value < self.setpoint
+        if self.state != 'running':
+            return self.output
+        if math.isnan(value):
+            return self.output
+        if abs(value - self.setpoint) > self.max_deviation:
+            self._fail(f"Deviation {value - self.setpoint:.3g} exceeds the maximum.")
+        elif timestamp - self.start > self.timeout:
+            self._fail("No stable oscillation within the timeout.")
+        elif self.heating and value > self.setpoint + self.hysteresis:
+            self._switch(False, value)
+        elif not self.heating and value < self.setpoint - self.hysteresis:
+            self._switch(True, value, timestamp)
+        else:
+            if self.extreme is None:
+                self.extreme = value
+            self.extreme = max(self.extreme, value) if self.heating else min(self.extreme, value)
+        self.history.append((timestamp, value, self.output))
+        return self.output
+
+    def _switch(self, heating: bool, value: float, timestamp: Optional[float] = None) -> None:
+        if self.extreme is not None and self.switches:
+            self.extremes.append(self.extreme)  # Only complete half periods.
+        self.extreme = value
+        self.heating = heating
+        if timestamp is not None:
+            self.switches.append(timestamp)
+            if len(self.switches) > self.cycles + 1:
+                self.state = 'done'
+
+    def _fail(self, message: str) -> None:
+        self.state = 'failed'
+        self.message = message
+
+    def result(self, rule: str = 'classic') -> dict[str, Any]:
+        """Return the ultimate gain and period and the suggested gains for `rule`.
+
+        :raises ValueError: If the test is not (successfully) finished.
+        """
+        if self.state != 'done':
+            raise ValueError(f"Autotuning is {self.state}. {self.message}".strip())
+        periods = [b - a for a, b in zip(self.switches[1:], self.switches[2:])]
+        Tu = sum(periods) / len(periods)
+        maxima = self.extremes[0::2] if self.extremes[0] > self.extremes[1] else \
+            self.extremes[1::2]
+        minima = self.extremes[1::2] if self.extremes[0] > self.extremes[1] else \
+            self.extremes[0::2]
+        amplitude = (sum(maxima) / len(maxima) - sum(minima) / len(minima)) / 2
+        d = (self.high - self.low) / 2
+        Ku = 4 * d / (math.pi * amplitude)
+        result = gains(Ku, Tu, rule)
+        if self.reverse:
+            result = {key: -value for key, value in result.items()}
+        return {'Ku': Ku, 'Tu': Tu, 'amplitude': amplitude, **result}
+
+    def status(self) -> dict[str, Any]:
+        """Return the state, the message and the number of measured periods."""
+        return {'state': self.state, 'message': self.message,
+                'periods': max(len(self.switches) - 2, 0), 'cycles': self.cycles}
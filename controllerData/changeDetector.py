@@ -0,0 +1,73 @@
+"""
+Detection of changed channels with deadbands and periodic keyframes.
+
+classes
+-------
+ChangeDetector : deadband, keyframe_interval
+    Filter data dictionaries for values, which changed more than a deadband.
+"""
+
+import math
+import time
+from typing import Any, Optional
+
+
+class ChangeDetector:
+    """Pass only the channels, whose value changed more than their deadband since last passed.
+
+    Every `keyframe_interval` all channels are passed, such that late subscribers get all values.
+
+    :param deadband: Default deadband of all channels.
+    :param keyframe_interval: Time in s between two keyframes, 0 for every call.
+    """
+
+    def __init__(self, deadband: float = 0, keyframe_interval: float = 60) -> None:
+        self.deadband = deadband
+        self.keyframe_interval = keyframe_interval
+        self.deadbands: dict[str, float] = {}  # deadbands of specific channels
+        self.last: dict[str, Any] = {}  # last passed values
+        self.last_keyframe = -math.inf
+        self.statistics = {'passed': 0, 'suppressed': 0, 'keyframes': 0}
+
+    def configure(self, name: str, deadband: Optional[float]) -> None:
+        """Set the deadband of channel `name`, None for the default."""
+        if deadband is None:
+            self.deadbands.pop(name, None)
+        else:
+            self.deadbands[name] = deadband
+
+    def changed(self, name: str, value: Any) -> bool:
+        """Whether `value` of channel `name` differs from the last passed value."""
+        try:
+            last = self.last[name]
+        except KeyError:
+            return True
+        try:
+            difference = abs(value - last)
+        except TypeError:
+            return value != last
+        if math.isnan(difference):
+            # NaN to NaN is no change, NaN to a number or vice versa is one.
+            return not (isinstance(value, float) and isinstance(last, float)
+                        and math.isnan(value) and math.isnan(last))
+        return difference > self.deadbands.get(name, self.deadband)
+
+    def filter(self, data: dict[str, Any], timestamp: Optional[float] = None) -> dict[str, Any]:
+        """Return the changed channels of `data` or all of them, if a keyframe is due."""
+        now = time.monotonic() if timestamp is None else timestamp
+        if now - self.last_keyframe >= self.keyframe_interval:
+            self.last_keyframe = now
+            self.statistics['keyframes'] += 1
+            self.statistics['passed'] += len(data)
+            self.last.update(data)
+            return dict(data)
+        changes = {name: value for name, value in data.items() if self.changed(name, value)}
+        self.last.update(changes)
+        self.statistics['passed'] += len(changes)
+        self.statistics['suppressed'] += len(data) - len(changes)
+        return changes
+
+    def reset(self) -> None:
+        """Forget the passed values, the next call returns a keyframe."""
+        self.last.clear()
+        self.last_keyframe = -math.inf
@@ -0,0 +1,188 @@
+"""
+Crash-safe checkpoint of the controller state in a memory-mapped file.
+
+classes
+-------
+Checkpoint : filename, slot_size
+    Write and read checkpoints of the PID internals and the last data.
+
+functions
+---------
+getPIDState : pid
+    Get the internal state of a PID controller.
+restorePIDState : pid, state, elapsed
+    Restore the internal state of a PID controller.
+
+The file contains two slots, which are written alternately. Each slot consists of a header
+(magic, version, sequence number, wall clock time, payload length, crc32) and the payload.
+A torn write invalidates only the slot being written, the other one still contains the previous
+checkpoint.
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Optional
+import zlib
+
+from simple_pid import PID
+
+log = logging.getLogger("TemperatureController")
+
+MAGIC = b"TCCP"
+VERSION = 1
+HEADER = struct.Struct("<4sHQdII")  # magic, version, sequence, timestamp, length, crc32
+NAME = struct.Struct("<B")  # length of a utf-8 encoded name
+COUNT = struct.Struct("<H")
+PID_STATE = struct.Struct("<dddd")  # integral, last input, last output, last error
+VALUE = struct.Struct("<d")
+
+# Attributes of a simple_pid PID, which are stored. None is stored as NaN.
+PID_ATTRIBUTES = ("_integral", "_last_input", "_last_output", "_last_error")
+
+
+def getPIDState(pid: PID) -> tuple[float, ...]:
+    """Get the internal state of `pid`."""
+    values = (getattr(pid, attribute, None) for attribute in PID_ATTRIBUTES)
+    return tuple(math.nan if value is None else float(value) for value in values)
+
+
+def restorePIDState(pid: PID, state: tuple[float, ...], elapsed: float) -> None:
+    """Restore the internal `state` of `pid` as if the last calculation was `elapsed` s ago."""
+    for attribute, value in zip(PID_ATTRIBUTES, state):
+        setattr(pid, attribute, None if math.isnan(value) else value)
+    if math.isnan(state[0]):
+        pid._integral = 0
+    pid._last_time = pid.time_fn() - elapsed
+
+
+def _pack_name(name: str) -> bytes:
+    encoded = name.encode()[:255]
+    return NAME.pack(len(encoded)) + encoded
+
+
+def _unpack_name(buffer: bytes, offset: int) -> tuple[str, int]:
+    (length,) = NAME.unpack_from(buffer, offset)
+    offset += NAME.size
+    return bytes(buffer[offset:offset + length]).decode(errors="replace"), offset + length
+
+
+def encode(pids: dict[str, tuple[float, ...]], data: dict[str, float]) -> bytes:
+    """Encode the PID states and the data to the payload."""
+    parts = [COUNT.pack(len(pids))]
+    for name, state in pids.items():
+        parts.append(_pack_name(name))
+        parts.append(PID_STATE.pack(*state))
+    values = {}
+    for key, value in data.items():
+        try:
+            values[key] = float(value)
+        except (TypeError, ValueError):
+            pass  # Only numbers are stored.
+    parts.append(COUNT.pack(len(values)))
+    for key, value in values.items():
+        parts.append(_pack_name(key))
+        parts.append(VALUE.pack(value))
+    return b"".join(parts)
+
+
+def decode(payload: bytes) -> tuple[dict[str, tuple[float, ...]], dict[str, float]]:
+    """Decode the payload to the PID states and the data."""
+    offset = 0
+    pids = {}
+    (count,) = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        name, offset = _unpack_name(payload, offset)
+        pids[name] = PID_STATE.unpack_from(payload, offset)
+        offset += PID_STATE.size
+    data = {}
+    (count,) = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        key, offset = _unpack_name(payload, offset)
+        (data[key],) = VALUE.unpack_from(payload, offset)
+        offset += VALUE.size
+    return pids, data
+
+
+class Checkpoint:
+    """Checkpoints in a memory-mapped file with two alternating slots.
+
+    :param filename: Path of the checkpoint file, it is created if necessary.
+    :param slot_size: Size of one slot in bytes.
+    """
+
+    def __init__(self, filename: str, slot_size: int = 16384) -> None:
+        self.filename = filename
+        self.slot_size = slot_size
+        size = 2 * slot_size
+        self.file = open(filename, "a+b")
+        if os.fstat(self.file.fileno()).st_size != size:
+            self.file.truncate(0)  # Unknown layout, start anew.
+            self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        latest = self._latest()
+        self.sequence = 0 if latest is None else latest[0]
+        self.slot = 1 if latest is None else latest[1]  # slot of the latest checkpoint
+
+    def _read_slot(self, slot: int) -> Optional[tuple[int, float, bytes]]:
+        """Return sequence, timestamp and payload of a valid `slot`, otherwise None."""
+        start = slot * self.slot_size
+        magic, version, sequence, timestamp, length, crc = HEADER.unpack_from(self.map, start)
+        if magic != MAGIC or version != VERSION or length > self.slot_size - HEADER.size:
+            return None
+        payload = self.map[start + HEADER.size:start + HEADER.size + length]
+        if zlib.crc32(payload, zlib.crc32(struct.pack("<Qd", sequence, timestamp))) != crc:
+            return None
+        return sequence, timestamp, payload
+
+    def _latest(self) -> Optional[tuple[int, int, float, bytes]]:
+        """Return sequence, slot, timestamp and payload of the newest valid checkpoint."""
+        latest = None
+        for slot in (0, 1):
+            result = self._read_slot(slot)
+            if result is not None and (latest is None or result[0] > latest[0]):
+                latest = result[0], slot, result[1], result[2]
+        return latest
+
+    def write(self, pids: dict[str, tuple[float, ...]], data: dict[str, float],
+              timestamp: Optional[float] = None) -> bool:
+        """Write a checkpoint of the PID states and the data, return whether it succeeded."""
+        payload = encode(pids, data)
+        if len(payload) > self.slot_size - HEADER.size:
+            log.warning(f"Checkpoint of {len(payload)} bytes is too large for the slot.")
+            return False
+        timestamp = time.time() if timestamp is None else timestamp
+        sequence = self.sequence + 1
+        slot = 1 - self.slot
+        start = slot * self.slot_size
+        crc = zlib.crc32(payload, zlib.crc32(struct.pack("<Qd", sequence, timestamp)))
+        self.map[start + HEADER.size:start + HEADER.size + len(payload)] = payload
+        HEADER.pack_into(self.map, start, MAGIC, VERSION, sequence, timestamp, len(payload), crc)
+        self.map.flush(start - start % mmap.ALLOCATIONGRANULARITY,
+                       start % mmap.ALLOCATIONGRANULARITY + self.slot_size)
+        self.sequence = sequence
+        self.slot = slot
+        return True
+
+    def read(self) -> Optional[tuple[float, dict[str, tuple[float, ...]], dict[str, float]]]:
+        """Read the newest valid checkpoint and return timestamp, PID states and data."""
+        latest = self._latest()
+        if latest is None:
+            return None
+        _, _, timestamp, payload = latest
+        try:
+            pids, data = decode(payload)
+        except (struct.error, UnicodeDecodeError) as exc:
+            log.warning(f"Invalid checkpoint: {exc}")
+            return None
+        return timestamp, pids, data
+
+    def close(self) -> None:
+        """Close the file."""
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,63 @@
+"""
+Composition of the PIDs with cascades and feedforward.
+
+functions
+---------
+evaluationOrder : names, sources
+    Order the PIDs such that each one is evaluated after the PID setting its setpoint.
+feedforward : output, data, sensor, gain, reference, output_limits
+    Add the feedforward of a disturbance sensor to a PID output.
+
+In a cascade the output of an outer PID is the setpoint of an inner PID (the inner PID's
+`setpointSource`). The feedforward adds `gain * (value - reference)` of a sensor, for example
+the outside temperature, to the output of a PID, such that a disturbance is compensated before
+it reaches the controlled sensor.
+"""
+
+from graphlib import CycleError, TopologicalSorter
+import math
+from typing import Any, Iterable, Optional
+
+
+def evaluationOrder(names: Iterable[str], sources: dict[str, str]) -> list[str]:
+    """Order the PIDs `names` such that each one follows the PID giving its setpoint.
+
+    :param sources: PID names and the name of the PID whose output is their setpoint, an empty
+        string for an own setpoint.
+    :raises ValueError: If a source does not exist or the cascades contain a cycle.
+    """
+    names = list(names)
+    if not any(sources.get(name) for name in names):
+        return names
+    graph: dict[str, set[str]] = {}
+    for name in names:
+        source = sources.get(name)
+        if source and source not in names:
+            raise ValueError(f"The setpoint source '{source}' of PID '{name}' does not exist.")
+        graph[name] = {source} if source else set()
+    try:
+        return list(TopologicalSorter(graph).static_order())
+    except CycleError as exc:
+        raise ValueError(f"The cascade of the PIDs {exc.args[1]} is a cycle.")
+
+
+def feedforward(output: float, data: dict[str, Any], sensor: str, gain: float,
+                reference: float = 0,
+                output_limits: tuple[Optional[float], Optional[float]] = (None, None)) -> float:
+    """Add the feedforward of `sensor` in `data` to `output` and limit the result.
+
+    If the sensor value is missing or invalid, the output is returned unchanged.
+    """
+    try:
+        value = float(data[sensor])
+    except (KeyError, TypeError, ValueError):
+        return output
+    if math.isnan(value):
+        return output
+    output += gain * (value - reference)
+    lower, upper = output_limits
+    if lower is not None:
+        output = max(output, lower)
+    if upper is not None:
+        output = min(output, upper)
+    return output
@@ -0,0 +1,101 @@
+"""
+Conversion of raw sensor values to physical quantities.
+
+classes
+-------
+LookupTable : function, size
+    Precomputed conversion of integer raw values (for example ADC counts).
+
+functions
+---------
+thermistor : raw
+    Convert Arduino ADC counts of a thermistor divider to temperatures in °C.
+register_curve : name, function
+    Register a calibration curve under `name`.
+get_curve : name
+    Get a registered calibration curve.
+convert : name, raw
+    Convert `raw` values with the calibration curve `name`.
+
+All conversions accept scalars or arrays and return numpy arrays.
+"""
+
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+# Steinhart-Hart parameters of the thermistor: lower bound of the resistance ratio, parameters.
+# The parameters are scaled by 1e-3, 1e-4, 1e-6, and 1e-8 respectively.
+THERMISTOR_PARAMETERS = (
+    (3.277, (3.357042, 2.5214848, 3.3743283, -6.4957311)),
+    (0.06816, (3.354017, 2.5617244, 2.1400943, -7.2405219)),
+    (0, (3.3536166, 2.53772, 0.85433271, -8.7912262)),
+)
+_SCALES = np.array((1e-3, 1e-4, 1e-6, 1e-8))
+
+
+def thermistor(raw: npt.ArrayLike, full_scale: float = 1024) -> np.ndarray:
+    """Convert the Arduino ADC counts `raw` to temperatures in °C.
+
+    Values outside of the measurement range (0 < raw < `full_scale`) result in NaN.
+    """
+    relative = np.asarray(raw, dtype=float) / full_scale
+    valid = (relative > 0) & (relative < 1)
+    relative = np.where(valid, relative, 0.5)
+    ratio = relative / (1 - relative)
+    conditions = [ratio >= bound for bound, _ in THERMISTOR_PARAMETERS]
+    pars = np.array([parameters for _, parameters in THERMISTOR_PARAMETERS]) * _SCALES
+    a, b, c, d = (np.select(conditions, pars[:, i]) for i in range(4))
+    ln = np.log(ratio)
+    temperature = 1 / (a + ln * (b + ln * (c + ln * d))) - 273.15
+    return np.where(valid, temperature, np.nan)
+
+
+class LookupTable:
+    """Conversion of integer raw values via a precomputed table.
+
+    Integer values are looked up exactly, other values are interpolated linearly.
+    Values outside of the table result in NaN.
+
+    :param function: Conversion function to tabulate, it has to accept arrays.
+    :param size: Number of entries, for example 1024 for a 10 bit ADC.
+    """
+
+    def __init__(self, function: Callable[[np.ndarray], np.ndarray], size: int = 1024) -> None:
+        self.function = function
+        self.size = size
+        self.table = np.asarray(function(np.arange(size)), dtype=float)
+
+    def __call__(self, raw: npt.ArrayLike) -> np.ndarray:
+        raw = np.asarray(raw, dtype=float)
+        valid = (raw >= 0) & (raw <= self.size - 1)
+        index = np.where(valid, raw, 0)
+        integer = index.astype(int)
+        if np.array_equal(integer, index):
+            result = self.table[integer]
+        else:
+            result = np.interp(index, np.arange(self.size), self.table)
+        return np.where(valid, result, np.nan)
+
+
+curves: dict[str, Callable[[npt.ArrayLike], np.ndarray]] = {}
+
+
+def register_curve(name: str, function: Callable[[npt.ArrayLike], np.ndarray]) -> None:
+    """Register the calibration curve `function` under `name`."""
+    curves[name] = function
+
+
+def get_curve(name: str) -> Callable[[npt.ArrayLike], np.ndarray]:
+    """Get the calibration curve `name`."""
+    return curves[name]
+
+
+def convert(name: str, raw: npt.ArrayLike) -> np.ndarray:
+    """Convert `raw` values with the calibration curve `name`."""
+    return curves[name](raw)
+
+
+register_curve("thermistor", thermistor)
+register_curve("thermistorTable", LookupTable(thermistor, 1024))  # 10 bit Arduino ADC
@@ -0,0 +1,144 @@
+"""
+Mapping of tinkerforge devices to named inputs and outputs.
+
+classes
+-------
+Rule
+    A single mapping rule.
+DeviceMap : rules
+    Indexed lookup of the rules for connected devices.
+
+The rules are dictionaries with the keys:
+
+- 'name': Name of the channel, may contain the fields '{uid}' and '{position}',
+  for example 'out{position}'.
+- 'uid', 'position', 'type': Criteria to match, at least one of 'uid' and 'type' is necessary.
+  'type' is the device identifier (int) or the class name, for example 'BrickletAnalogOutV3'.
+- 'kind': 'output', 'input', or 'device' (default, the device is only mapped).
+- 'method': Method to set an output or to read an input. Defaults depend on the type.
+- 'factor': The value is multiplied by it before setting or after reading.
+
+A uid rule takes precedence over a type rule with position, which takes precedence over a type
+rule without position. Among equal rules, the first one wins.
+"""
+
+import logging
+from typing import Any, Optional, Union
+
+log = logging.getLogger("TemperatureController")
+
+
+# Device identifiers of known device types.
+DEVICE_TYPES = {
+    'BrickHAT': 111,
+    'BrickletAirQuality': 297,
+    'BrickletAnalogInV3': 295,
+    'BrickletAnalogOutV3': 2115,
+    'BrickletOneWire': 2123,
+    'BrickletTemperatureV2': 2113,
+}
+
+# Default method and factor for inputs and outputs of some device types.
+DEFAULT_METHODS = {
+    # identifier: (method, factor)
+    295: ('get_voltage', 1e-3),  # mV to V
+    2113: ('get_temperature', 1e-2),  # 1/100 °C to °C
+    2115: ('set_output_voltage', 1e3),  # V to mV
+}
+
+# Rules of the original layout.
+DEFAULT_RULES = [
+    {'name': 'HAT', 'type': 'BrickHAT'},
+    {'name': 'airQuality', 'type': 'BrickletAirQuality'},
+    {'name': 'out0', 'type': 'BrickletAnalogOutV3', 'position': 'a', 'kind': 'output'},
+    {'name': 'out1', 'type': 'BrickletAnalogOutV3', 'kind': 'output'},
+]
+
+
+class Rule:
+    """A mapping rule, see the module documentation for the parameters."""
+
+    def __init__(self, name: str, uid: Optional[str] = None, position: Optional[str] = None,
+                 type: Union[int, str, None] = None, kind: str = 'device',
+                 method: Optional[str] = None, factor: Optional[float] = None) -> None:
+        if uid is None and type is None:
+            raise ValueError(f"Rule '{name}' needs a 'uid' or a 'type'.")
+        if kind not in ('device', 'input', 'output'):
+            raise ValueError(f"Rule '{name}' has an invalid kind '{kind}'.")
+        self.name = name
+        self.uid = uid
+        self.position = position
+        self.type = DEVICE_TYPES.get(type, type) if isinstance(type, str) else type
+        self.kind = kind
+        self.method = method
+        self.factor = factor
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, uid={self.uid!r}, type={self.type!r})"
+
+    def resolve(self, uid: Optional[str], position: Optional[str], device_identifier: Optional[int]
+                ) -> tuple[str, "Rule"]:
+        """Return the channel name and a rule with filled in defaults for this device."""
+        name = self.name.format(uid=uid, position=position)
+        method, factor = DEFAULT_METHODS.get(device_identifier, (None, 1))
+        if self.method is None and method is None and self.kind != 'device':
+            raise ValueError(f"Rule '{self.name}' needs a 'method'.")
+        rule = Rule(name, uid=uid, position=position, type=device_identifier, kind=self.kind,
+                    method=self.method or method,
+                    factor=factor if self.factor is None else self.factor)
+        return name, rule
+
+
+class DeviceMap:
+    """Look up, which channel a connected device provides.
+
+    :param rules: List of rule dictionaries, defaults to :data:`DEFAULT_RULES`.
+    """
+
+    def __init__(self, rules: Optional[list[dict[str, Any]]] = None) -> None:
+        self.by_uid: dict[str, Rule] = {}
+        self.by_position: dict[tuple[int, str], Rule] = {}
+        self.by_type: dict[int, Rule] = {}
+        self.inputs: dict[str, Rule] = {}  # input channels of connected devices
+        self.outputs: dict[str, Rule] = {}  # output channels, static names even if not connected
+        for parameters in DEFAULT_RULES if rules is None else rules:
+            rule = Rule(**parameters)
+            if rule.uid is not None:
+                self.by_uid.setdefault(rule.uid, rule)
+            elif rule.position is not None:
+                self.by_position.setdefault((rule.type, rule.position), rule)
+            else:
+                self.by_type.setdefault(rule.type, rule)
+            if rule.kind == 'output' and "{" not in rule.name:
+                self.outputs[rule.name] = rule.resolve(rule.uid, rule.position, rule.type)[1]
+
+    def match(self, uid: str, position: str, device_identifier: int) -> Optional[Rule]:
+        """Find the rule matching the device."""
+        try:
+            return self.by_uid[uid]
+        except KeyError:
+            pass
+        try:
+            return self.by_position[device_identifier, position]
+        except KeyError:
+            return self.by_type.get(device_identifier)
+
+    def assign(self, uid: str, position: str, device_identifier: int) -> Optional[str]:
+        """Assign the device to a channel and return the channel name (or None)."""
+        rule = self.match(uid, position, device_identifier)
+        if rule is None:
+            return None
+        try:
+            name, resolved = rule.resolve(uid, position, device_identifier)
+        except ValueError as exc:
+            log.error(f"Device {uid} not assigned: {exc}")
+            return None
+        if resolved.kind == 'output':
+            self.outputs[name] = resolved
+        elif resolved.kind == 'input':
+            self.inputs[name] = resolved
+        return name
+
+    def release(self, name: str) -> None:
+        """Remove the input channel `name` of a disconnected device."""
+        self.inputs.pop(name, None)
@@ -0,0 +1,290 @@
+"""
+Sensor driver plugins.
+
+classes
+-------
+Driver : inputOutput, name, **kwargs
+    Base class for a driver of one device.
+ArduinoDriver : port, channels
+    Thermistors read by an Arduino.
+WDEDriver : port, channels
+    ELV USB-WDE weather sensor receiver.
+DriverScheduler : drivers
+    Read the drivers according to their interval, blocking ones in parallel.
+
+functions
+---------
+load_drivers : config, inputOutput
+    Create the drivers of a configuration list.
+readArduino : arduino, channels, curve, timeout
+    Read and convert the values of an Arduino.
+
+Drivers are configured in the `drivers` list in *sensors.py*, each entry is a dictionary with
+the driver type in 'driver' and the keyword arguments of the driver, for example
+`{'driver': 'arduino', 'name': 'south', 'port': "/dev/ArduinoSouth"}`.
+The type is the name of a built-in driver, of an entry point in the group
+:data:`ENTRY_POINT_GROUP`, or a 'module:Class' path.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from importlib import import_module
+from importlib.metadata import entry_points
+import logging
+import math
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from . import conversion, serialSessions, wdeReader
+
+log = logging.getLogger("TemperatureController")
+
+ENTRY_POINT_GROUP = "temperature_controller.drivers"
+
+
+class Driver:
+    """Base class for a sensor driver, handling one device.
+
+    Subclasses declare their channels, the poll interval, and whether reading blocks.
+
+    :param inputOutput: The InputOutput instance.
+    :param name: Name of the driver instance, defaults to the class name.
+    """
+
+    channels: dict[str, str] = {}  # channel name: unit
+    outputs: tuple[str, ...] = ()  # names of the outputs
+    interval: float = 0  # minimum time in s between two reads, 0 for every readout
+    blocking: bool = False  # whether reading blocks (I/O), such drivers are read in parallel
+    timeout: float = 2  # maximum time in s to wait for a blocking read
+
+    def __init__(self, inputOutput=None, name: Optional[str] = None, **kwargs) -> None:
+        self.inputOutput = inputOutput
+        self.name = name or type(self).__name__
+        super().__init__(**kwargs)
+
+    def setup(self) -> None:
+        """Open the connection to the device."""
+        pass
+
+    def read(self) -> dict[str, float]:
+        """Read the device and return a dictionary of the channels."""
+        raise NotImplementedError
+
+    def set_output(self, name: str, value: float) -> None:
+        """Set the output `name` to `value`."""
+        raise NotImplementedError
+
+    def execute(self, command: str) -> Any:
+        """Execute a device specific `command`."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close the connection to the device."""
+        pass
+
+
+def readArduino(arduino, channels=('cold', 'main', 'aux', 'setpoint'),
+                curve="thermistorTable", timeout=2):
+    """Read the arduino `arduino` (a serial session) with readout priority and convert the
+    values of the `channels` with the calibration `curve`. Errors are raised."""
+    raw = arduino.query("r", priority=serialSessions.READOUT, timeout=timeout).split("\t")
+    try:
+        temperatures = conversion.convert(curve, np.asarray(raw[:len(channels)], dtype=float))
+    except ValueError as exc:
+        raise ValueError(f"Invalid Arduino data {raw}: {exc}")
+    return dict(zip(channels, temperatures.tolist()))
+
+
+class ArduinoDriver(Driver):
+    """Thermistors read by an Arduino via a serial session.
+
+    :param port: Serial port of the Arduino.
+    :param channels: Names of the channels in the order of the Arduino response.
+    :param curve: Name of the calibration curve.
+    """
+
+    blocking = True
+
+    def __init__(self, port: str, channels: tuple[str, ...] = ('cold', 'main', 'aux', 'setpoint'),
+                 curve: str = "thermistorTable", **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.port = port
+        self.channel_names = channels
+        self.channels = {channel: "°C" for channel in channels}
+        self.curve = curve
+
+    def setup(self) -> None:
+        import pyvisa
+        resource = pyvisa.ResourceManager().open_resource(f"ASRL{self.port}::INSTR")
+        resource.read_termination = "\r\n"
+        resource.write_termination = "\n"
+        resource.timeout = 1000
+        self.session = serialSessions.SerialSession(resource, name=self.port)
+
+    def read(self) -> dict[str, float]:
+        return readArduino(self.session, channels=self.channel_names, curve=self.curve,
+                           timeout=self.timeout)
+
+    def execute(self, command: str) -> Any:
+        return self.session.query(command, priority=serialSessions.USER, timeout=5)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class WDEDriver(Driver):
+    """ELV USB-WDE weather receiver, read in the background.
+
+    :param port: Serial port of the receiver.
+    :param channels: Dictionary of the channel names and their field index.
+    """
+
+    def __init__(self, port: str = "/dev/ttyUSB0", channels: dict[str, int] = wdeReader.CHANNELS,
+                 **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.port = port
+        self.field_indices = channels
+        self.channels = {channel: "°C" if "humidity" not in channel else "%"
+                         for channel in channels}
+
+    def setup(self) -> None:
+        import pyvisa
+        resource = pyvisa.ResourceManager().open_resource(f"ASRL{self.port}::INSTR")
+        resource.read_termination = '\r\n'
+        resource.timeout = 1000
+        self.reader = wdeReader.WDEReader(resource, self.field_indices)
+        self.reader.start()
+
+    def read(self) -> dict[str, float]:
+        return self.reader.get_data()
+
+    def close(self) -> None:
+        self.reader.close()
+
+
+DRIVERS: dict[str, type[Driver]] = {
+    'arduino': ArduinoDriver,
+    'wde': WDEDriver,
+}
+
+
+def get_driver_class(driver: str) -> type[Driver]:
+    """Get the driver class by its built-in name, its entry point name, or its path."""
+    try:
+        return DRIVERS[driver]
+    except KeyError:
+        pass
+    if ":" in driver:
+        module, name = driver.split(":", maxsplit=1)
+        return getattr(import_module(module), name)
+    try:
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10
+        eps = entry_points().get(ENTRY_POINT_GROUP, [])  # type: ignore
+    for entry_point in eps:
+        if entry_point.name == driver:
+            return entry_point.load()
+    raise KeyError(f"Driver '{driver}' is unknown.")
+
+
+def load_drivers(config: list[dict[str, Any]], inputOutput=None) -> list[Driver]:
+    """Create and set up the drivers of the `config` list, skipping failing ones."""
+    drivers = []
+    for entry in config:
+        kwargs = dict(entry)
+        driver = kwargs.pop('driver', None)
+        try:
+            instance = get_driver_class(driver)(inputOutput=inputOutput, **kwargs)
+            instance.setup()
+        except Exception as exc:
+            log.exception(f"Setting up driver {entry} failed.", exc_info=exc)
+        else:
+            drivers.append(instance)
+    return drivers
+
+
+class DriverScheduler:
+    """Read the drivers according to their intervals, blocking ones in parallel threads.
+
+    The values of drivers, which are not due, are taken from their last reading.
+
+    :param drivers: List of drivers.
+    """
+
+    def __init__(self, drivers: list[Driver]) -> None:
+        self.drivers = {driver.name: driver for driver in drivers}
+        self.outputs = {output: driver for driver in drivers for output in driver.outputs}
+        self.last_read: dict[str, float] = {name: -math.inf for name in self.drivers}
+        self.pending: dict[str, Future] = {}  # blocking reads in progress
+        self.cache: dict[str, dict[str, float]] = {name: {} for name in self.drivers}
+        self.statistics: dict[str, dict[str, float]] = {
+            name: {'reads': 0, 'errors': 0, 'durationLast': math.nan, 'durationMax': 0}
+            for name in self.drivers}
+        workers = sum(driver.blocking for driver in drivers)
+        self.executor = ThreadPoolExecutor(workers, "driver") if workers else None
+
+    def _read(self, driver: Driver) -> dict[str, float]:
+        start = time.perf_counter()
+        statistic = self.statistics[driver.name]
+        try:
+            data = driver.read()
+        except Exception as exc:
+            statistic['errors'] += 1
+            log.warning(f"Reading driver '{driver.name}' failed: {exc}")
+            data = {}
+        duration = time.perf_counter() - start
+        statistic['reads'] += 1
+        statistic['durationLast'] = duration
+        statistic['durationMax'] = max(statistic['durationMax'], duration)
+        return data
+
+    def read(self) -> dict[str, float]:
+        """Read the due drivers and return the data of all drivers."""
+        now = time.monotonic()
+        submitted = []
+        for name, driver in self.drivers.items():
+            if now - self.last_read[name] < driver.interval or name in self.pending:
+                continue
+            self.last_read[name] = now
+            if driver.blocking and self.executor is not None:
+                self.pending[name] = self.executor.submit(self._read, driver)
+                submitted.append(name)
+            else:
+                self.cache[name] = self._read(driver)
+        if submitted:
+            # Wait only for the reads of this tick, a hung driver must not stall every tick.
+            timeout = max(self.drivers[name].timeout for name in submitted)
+            wait([self.pending[name] for name in submitted], timeout=timeout)
+        for name, future in list(self.pending.items()):
+            if future.done():
+                self.cache[name] = future.result()
+                del self.pending[name]
+            else:
+                # Keep it pending, do not start another read in parallel.
+                if name in submitted:
+                    log.warning(f"Driver '{name}' did not answer in time.")
+                self.cache[name] = {}
+        data: dict[str, float] = {}
+        for values in self.cache.values():
+            data.update(values)
+        return data
+
+    def set_output(self, name: str, value: float) -> None:
+        """Set the output `name` to `value`, raise KeyError if no driver has that output."""
+        self.outputs[name].set_output(name, value)
+
+    def execute(self, command: str) -> Any:
+        """Execute a command of the form 'driver name: command'."""
+        name, command = command.split(":", maxsplit=1)
+        return self.drivers[name.strip()].execute(command.strip())
+
+    def close(self) -> None:
+        """Close all drivers."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        for name, driver in self.drivers.items():
+            try:
+                driver.close()
+            except Exception as exc:
+                log.exception(f"Closing driver '{name}' failed.", exc_info=exc)
@@ -9,6 +9,7 @@ InputOutput
 Created on Mon Jun 14 16:25:43 2021 by Benedikt Moneke
 """
 
+from importlib import import_module
 import logging
 from typing import Any
 
@@ -17,28 +18,41 @@ try:
 except ImportError:
     from . import sensors_sample as sensors
 
+from .deviceMap import DeviceMap
+from .drivers import DriverScheduler, load_drivers
+from .tinkerforgeSupervisor import Supervisor
+
 log = logging.getLogger("TemperatureController")
 
-try:  # Tinkerforge for sensors/output
+try:  # Tinkerforge for sensors/output, the device modules are imported when needed.
     from tinkerforge.ip_connection import IPConnection, Error as tfError
-    from tinkerforge.brick_hat import BrickHAT
-    from tinkerforge.bricklet_air_quality import BrickletAirQuality
-    from tinkerforge.bricklet_analog_in_v3 import BrickletAnalogInV3
-    from tinkerforge.bricklet_analog_out_v3 import BrickletAnalogOutV3
-    from tinkerforge.bricklet_one_wire import BrickletOneWire
-    from tinkerforge.bricklet_temperature_v2 import BrickletTemperatureV2
 except ModuleNotFoundError:
     log.error("Tinkerforge modules not found.")
     tf = False
 else:
     tf = True
-    devices = {111: BrickHAT,
-               297: BrickletAirQuality,
-               295: BrickletAnalogInV3,
-               2115: BrickletAnalogOutV3,
-               2123: BrickletOneWire,
-               2113: BrickletTemperatureV2,
-               }
+    devices = {  # identifier: device class or (module, class name) to import it
+        111: ("brick_hat", "BrickHAT"),
+        297: ("bricklet_air_quality", "BrickletAirQuality"),
+        295: ("bricklet_analog_in_v3", "BrickletAnalogInV3"),
+        2115: ("bricklet_analog_out_v3", "BrickletAnalogOutV3"),
+        2123: ("bricklet_one_wire", "BrickletOneWire"),
+        2113: ("bricklet_temperature_v2", "BrickletTemperatureV2"),
+    }
+
+
+def getDeviceClass(device_identifier: int):
+    """Get the tinkerforge device class, importing its module if necessary."""
+    try:
+        device = devices[device_identifier]
+    except KeyError:
+        from tinkerforge.device_factory import get_device_class  # imports all devices
+        device = devices[device_identifier] = get_device_class(device_identifier)
+    if isinstance(device, tuple):
+        module, name = device
+        device = devices[device_identifier] = getattr(
+            import_module(f"tinkerforge.{module}"), name)
+    return device
 
 
 class InputOutput:
@@ -53,6 +67,8 @@ class InputOutput:
             sensors.setup(self)
         except Exception as exc:
             log.exception("Input-output init failed.", exc_info=exc)
+        self.driverScheduler = DriverScheduler(
+            load_drivers(getattr(sensors, 'drivers', []), inputOutput=self))
 
     def setupTinkerforge(self) -> None:
         """Create the tinkerforge connection."""
@@ -60,11 +76,17 @@ class InputOutput:
             return
         self.tfDevices = {}  # dictionary for the bricklets
         self.tfMap = {}  # dictionary for mapping the devices to tasks
+        try:
+            self.deviceMap = DeviceMap(getattr(sensors, 'deviceMap', None))
+        except Exception as exc:
+            log.exception("Invalid device map, using the default one.", exc_info=exc)
+            self.deviceMap = DeviceMap()
         tfCon = IPConnection()
-        tfCon.connect("localhost", 4223)  # values for local installation
         self.tfCon = tfCon
         tfCon.register_callback(IPConnection.CALLBACK_ENUMERATE, self.deviceConnected)
-        tfCon.enumerate()  # ask all bricklets/bricklets to announce themselves
+        # Connect (values for local installation) and enumerate in the background.
+        self.tfSupervisor = Supervisor(self, "localhost", 4223)
+        self.tfSupervisor.start()
 
     def deviceConnected(self, uid, connected_uid, position, hardware_version,
                         firmware_version, device_identifier, enumeration_type) -> None:
@@ -73,16 +95,24 @@ class InputOutput:
             # Types: AVAILABLE 0, CONNECTED 1, DISCONNECTED 2
             log.info(f"Device {'connected' if enumeration_type else 'available'}: {uid} at {position} of type {device_identifier}.")  # noqa
             if uid not in self.tfDevices.keys():
-                self.tfDevices[uid] = devices[device_identifier](uid, self.tfCon)
-            if device_identifier == BrickHAT.DEVICE_IDENTIFIER:
-                self.tfMap['HAT'] = uid
-            elif device_identifier == BrickletAnalogOutV3.DEVICE_IDENTIFIER:
-                if position == 'a':
-                    self.tfMap['out0'] = uid
-                else:
-                    self.tfMap['out1'] = uid
-            elif device_identifier == BrickletAirQuality.DEVICE_IDENTIFIER:
-                self.tfMap['airQuality'] = uid
+                try:
+                    self.tfDevices[uid] = getDeviceClass(device_identifier)(uid, self.tfCon)
+                except (ImportError, KeyError, ValueError):
+                    log.warning(f"Device {uid} has an unknown type {device_identifier}.")
+                    return
+            name = self.deviceMap.assign(uid, position, device_identifier)
+            if name is None:
+                return
+            self.tfMap[name] = uid
+            try:
+                self.tfSupervisor.announced(name)
+            except AttributeError:
+                pass  # No supervisor.
+            if name in self.deviceMap.outputs:
+                try:  # Write the output again, even if the value did not change.
+                    self.controller.outputReconnected.emit(name)
+                except AttributeError:
+                    pass
         else:
             # Only uid and enumeration_type have valid values.
             log.info(f"Device {uid} disconnected.")
@@ -91,8 +121,21 @@ class InputOutput:
             except KeyError:
                 pass
             else:
-                if uid in self.tfMap.values():
-                    self.tfMap = {key: val for key, val in self.tfMap.items() if val != uid}
+                for name in [key for key, val in self.tfMap.items() if val == uid]:
+                    del self.tfMap[name]
+                    self.deviceMap.release(name)
+
+    def deviceLost(self, name: str) -> None:
+        """Remove the device mapped to `name` and try to recover it in the background."""
+        try:
+            del self.tfDevices[self.tfMap[name]]
+        except KeyError:
+            pass
+        self.tfMap.pop(name, None)
+        try:
+            self.tfSupervisor.device_lost(name)
+        except AttributeError:
+            pass  # No supervisor.
 
     def close(self) -> None:
         """Close the connection."""
@@ -100,14 +143,24 @@ class InputOutput:
             sensors.close(self)
         except Exception as exc:
             log.exception("Sensors close failed.", exc_info=exc)
+        try:
+            self.driverScheduler.close()
+        except AttributeError:
+            pass  # No drivers.
         try:  # Deactivate Watchdog.
             self.tfDevices[self.tfMap['HAT']].set_sleep_mode(0, 0, False, False, False)
         except (AttributeError, KeyError):
             log.error("No HAT brick found, watchdog is not deactivated.")
+        try:
+            self.tfSupervisor.stop()
+        except AttributeError:
+            pass  # Not existent
         try:
             self.tfCon.disconnect()
         except AttributeError:
             pass  # Not existent
+        except tfError:
+            pass  # Not connected
 
     # Methods
     def getSensors(self) -> dict[str, float]:
@@ -118,36 +171,77 @@ class InputOutput:
             # turn indicator on
         except (AttributeError, KeyError):
             pass
+        data = {}
+        try:  # Read the tinkerforge inputs of the device map.
+            inputs = list(self.deviceMap.inputs.items())
+        except AttributeError:
+            inputs = []
+        for name, rule in inputs:
+            try:
+                device = self.tfDevices[self.tfMap[name]]
+                data[name] = getattr(device, rule.method)() * rule.factor
+            except KeyError:
+                pass  # Not connected.
+            except AttributeError:
+                log.error(f"Input '{name}' has no method '{rule.method}'.")
+            except tfError as exc:
+                if exc.value in (tfError.TIMEOUT, tfError.NOT_CONNECTED):
+                    self.deviceLost(name)
+        try:  # Read the drivers.
+            data.update(self.driverScheduler.read())
+        except AttributeError:
+            pass  # No drivers.
         try:  # Read the sensors.
-            data = sensors.getData(self)
-            assert isinstance(data, dict)
+            sensorData = sensors.getData(self)
+            assert isinstance(sensorData, dict)
         except (AssertionError, NotImplementedError):
-            return {}
+            pass
         except Exception as exc:
             log.exception("Get sensors failed.", exc_info=exc)
-            return {}
         else:
-            return data
+            data.update(sensorData)
+        return data
 
-    def setOutput(self, name: str, value: float) -> None:
-        """Set the output with `name` to `value` (for tinkerforge in V)."""
-        if name in ("out0", "out1"):
+    def setOutput(self, name: str, value: float) -> bool:
+        """Set the output with `name` to `value` (for tinkerforge in V), return success."""
+        try:
+            rule = self.deviceMap.outputs[name]
+        except (AttributeError, KeyError):
             try:
-                self.tfDevices[self.tfMap[name]].set_output_voltage(value * 1000)
+                self.driverScheduler.set_output(name, value)
             except (AttributeError, KeyError):
-                log.warning(f"Output '{name}' is not connected.")
-            except tfError as exc:
-                if exc.value in (tfError.TIMEOUT, tfError.NOT_CONNECTED):
-                    del self.tfDevices[self.tfMap[name]]
-                    del self.tfMap[name]
-        else:
+                pass
+            else:
+                return True
             try:
                 sensors.setOutput(self, name, value)
             except NotImplementedError as exc:
                 raise KeyError(exc)
+            return True
+        try:
+            getattr(self.tfDevices[self.tfMap[name]], rule.method)(value * rule.factor)
+        except (AttributeError, KeyError):
+            log.warning(f"Output '{name}' is not connected.")
+        except tfError as exc:
+            if exc.value in (tfError.TIMEOUT, tfError.NOT_CONNECTED):
+                self.deviceLost(name)
+        else:
+            return True
+        return False
+
+    def getDriverStatistics(self) -> dict[str, dict[str, float]]:
+        """Return the number of reads, errors and the read duration of each driver."""
+        try:
+            return self.driverScheduler.statistics
+        except AttributeError:
+            return {}
 
     def executeCommand(self, command: str) -> Any:
-        """Send `command` to sensors."""
+        """Send `command` to sensors or, if it is 'driver name: command', to a driver."""
+        try:
+            return self.driverScheduler.execute(command)
+        except (AttributeError, KeyError, ValueError, NotImplementedError):
+            pass  # Not a driver command.
         try:
             return sensors.executeCommand(self, command)
         except NotImplementedError:
@@ -23,9 +23,22 @@ except ModuleNotFoundError:
     from PyQt5.QtCore import pyqtSignal
 
 from devices import intercom
+from controllerData import pidConfiguration
 
 log = logging.getLogger("TemperatureController")
 
+# Settings groups and the names of the signals emitted, if any key of that group changed.
+GROUP_SIGNALS = {
+    'outputs': 'outputsChanged',
+    'publisher': 'publisherChanged',
+    'storage': 'storageChanged',
+    'readout': 'readoutChanged',
+    'fusion': 'fusionChanged',
+    'filters': 'filtersChanged',
+    'alarms': 'alarmsChanged',
+    'schedules': 'schedulesChanged',
+}
+
 
 class Listener(QtCore.QObject):
     """Listening on incoming intercom for new connections."""
@@ -37,7 +50,7 @@ class Listener(QtCore.QObject):
         Parameters
         ----------
         host : str
-            Address to listen at. If 'None', try to determine it.
+            Address to listen at. If 'None', listen on all interfaces.
         port : int
             Port to listen at.
         threadpool : QThreadpool
@@ -49,11 +62,8 @@ class Listener(QtCore.QObject):
         self.signals = self.ListenerSignals()
         self.controller = controller
         assert port >= 0, "No valid port number specified."
-        if host is None:  # figure out our IP
-            sock = socket.socket(type=socket.SOCK_DGRAM)
-            sock.connect(("8.8.8.8", 80))  # just a reliable server
-            host = sock.getsockname()[0]
-            sock.close()
+        if host is None:
+            host = ""  # all interfaces, no need to figure out our IP
         log.info(f"Listener initialized at {host}:{port}.")
         listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # die Adresse sofort wieder benutzen, nicht den 2 Minuten Timer nach Stop des vorherigen Servers warten
@@ -72,9 +82,19 @@ class Listener(QtCore.QObject):
         """Signals for the listener."""
         stopController = pyqtSignal()
         pidChanged = pyqtSignal(str)
+        pidsConfigured = pyqtSignal(dict)
+        readoutChanged = pyqtSignal()
         timerChanged = pyqtSignal(str, int)
         setOutput = pyqtSignal(str, float)
         sensorCommand = pyqtSignal(str)
+        outputsChanged = pyqtSignal()
+        publisherChanged = pyqtSignal()
+        storageChanged = pyqtSignal()
+        fusionChanged = pyqtSignal()
+        filtersChanged = pyqtSignal()
+        alarmsChanged = pyqtSignal()
+        schedulesChanged = pyqtSignal()
+        fullStateRequested = pyqtSignal(object)  # dictionary to store the full state in
 
     def __del__(self):
         """On deletion close connection."""
@@ -144,33 +164,66 @@ class ConnectionHandler(QtCore.QRunnable):
         """Write the content in the settings and emit an appropriate signal."""
         data = pickle.loads(content)
         assert isinstance(data, dict), "The content has to be a dictionary."
+        # Known PID keys are validated here and applied at once by the controller.
+        pidConfig: dict[str, dict] = {}
+        for key, value in data.items():
+            group, _, name = key.partition("/")
+            if group.startswith('pid') and name in pidConfiguration.KEYS:
+                pidConfig.setdefault(group.replace("pid", "", 1), {})[name] = value
+        if pidConfig:
+            try:
+                normalized = pidConfiguration.validate(pidConfig, self.controller.pids.keys())
+            except ValueError as exc:
+                intercom.sendMessage(self.connection, 'ERR', str(exc).encode('ascii', 'replace'))
+                return
+            # Readable immediately, the controller applies them with the next event loop.
+            self.controller.settingsWriter.write(
+                {f"pid{name}/{key}": value for name, values in normalized.items()
+                 for key, value in pidConfiguration.toSettings(values).items()})
         settings = QtCore.QSettings()
         pidChanged = {}
+        groupsChanged = set()
         for key, value in data.items():
+            group, _, name = key.partition("/")
+            if group.startswith('pid'):
+                if name not in pidConfiguration.KEYS:
+                    settings.setValue(key, value)
+                    pidChanged[group] = True
+                continue
             settings.setValue(key, value)
-            if key.startswith('pid'):
-                pidChanged[key.split("/")[0]] = True
+            if name and group in GROUP_SIGNALS:
+                groupsChanged.add(group)
             elif key == 'readoutInterval':
                 self.signals.timerChanged.emit('readoutTimer', value)
             elif key == 'logLevel':
                 log.setLevel(value)
+        if pidConfig:
+            self.signals.pidsConfigured.emit(pidConfig)
         for key in pidChanged.keys():
             self.signals.pidChanged.emit(key.replace("pid", ""))
+        for group, signal in GROUP_SIGNALS.items():
+            if group in groupsChanged:
+                getattr(self.signals, signal).emit()
         intercom.sendMessage(self.connection, 'ACK')
 
     def getValue(self, content: bytes) -> None:
         """Get some value."""
         keys = pickle.loads(content)
         assert hasattr(keys, '__iter__'), "The content has to be an iterable."
-        settings = QtCore.QSettings()
         data = {}
         for key in keys:
             if key == 'log':
                 data[key] = self.controller.log.log
             elif key == 'data':
                 data[key] = self.controller.data
+            elif key == 'fullState':
+                # Created in the Qt thread, which blocks this one until it is stored.
+                container: dict = {}
+                self.signals.fullStateRequested.emit(container)
+                data[key] = container.get(key)
             else:
-                data[key] = settings.value(key)
+                # Including the pending values of the settings writer.
+                data[key] = self.controller.settingsWriter.value(key)
         intercom.sendMessage(self.connection, 'SET', pickle.dumps(data))
 
     def delValue(self, content):
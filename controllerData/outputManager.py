@@ -0,0 +1,99 @@
+"""
+Deduplication and rate limiting of output writes.
+
+classes
+-------
+OutputManager
+    Collect the output values of a readout tick and write only relevant changes.
+"""
+
+import time
+from typing import Callable, Optional
+
+
+class OutputManager:
+    """Collect requested output values and write them in one batch per tick.
+
+    A value is only written, if it differs more than the deadband from the last written value.
+    Additionally the write rate (minimum interval between writes) and the slew rate (maximum
+    change per second) may be limited for each channel.
+
+    :param writer: Method called with name and value to actually write an output, it returns
+        whether the write succeeded.
+    :param deadband: Default deadband for all channels.
+    :param min_interval: Default minimum time in s between two writes of a channel.
+    :param max_slew: Default maximum change per second, None for no limit.
+    """
+
+    def __init__(self, writer: Callable[[str, float], bool], deadband: float = 0,
+                 min_interval: float = 0, max_slew: Optional[float] = None) -> None:
+        self.writer = writer
+        self.defaults = {'deadband': deadband, 'minInterval': min_interval, 'maxSlew': max_slew}
+        self.channels: dict[str, dict] = {}  # channel specific configuration
+        self.pending: dict[str, float] = {}  # requested values of the current tick
+        self.last_value: dict[str, float] = {}  # last value written
+        self.last_time: dict[str, float] = {}  # time of the last write
+        self.statistics: dict[str, dict[str, int]] = {}
+
+    def configure(self, name: str, deadband: Optional[float] = None,
+                  min_interval: Optional[float] = None, max_slew: Optional[float] = None
+                  ) -> None:
+        """Configure the channel `name`, None values use the defaults."""
+        self.channels[name] = {
+            'deadband': deadband, 'minInterval': min_interval, 'maxSlew': max_slew}
+
+    def _get(self, name: str, key: str):
+        value = self.channels.get(name, {}).get(key)
+        return self.defaults[key] if value is None else value
+
+    def request(self, name: str, value: float) -> None:
+        """Request to set output `name` to `value` at the next flush."""
+        if name in self.pending:
+            self._count(name, 'suppressed')  # superseded in the same tick
+        self.pending[name] = value
+
+    def flush(self) -> None:
+        """Write all pending values, which are not suppressed."""
+        pending, self.pending = self.pending, {}
+        now = time.monotonic()
+        for name, value in pending.items():
+            try:
+                last = self.last_value[name]
+            except KeyError:
+                pass  # Never written, write in any case.
+            else:
+                if abs(value - last) <= self._get(name, 'deadband'):
+                    self._count(name, 'suppressed')
+                    continue
+                elapsed = now - self.last_time[name]
+                if elapsed < self._get(name, 'minInterval'):
+                    self._count(name, 'suppressed')
+                    continue
+                max_slew = self._get(name, 'maxSlew')
+                if max_slew is not None:
+                    step = max_slew * elapsed
+                    value = min(max(value, last - step), last + step)
+            if self.writer(name, value):
+                self.record(name, value, now)
+                self._count(name, 'written')
+            else:
+                self._count(name, 'failed')  # Not recorded, such that it is retried.
+
+    def record(self, name: str, value: float, timestamp: Optional[float] = None) -> None:
+        """Record that output `name` has been set to `value`, for example manually."""
+        self.last_value[name] = value
+        self.last_time[name] = time.monotonic() if timestamp is None else timestamp
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Forget the last value of output `name` (or all), such that it is written again."""
+        if name is None:
+            self.last_value.clear()
+            self.last_time.clear()
+        else:
+            self.last_value.pop(name, None)
+            self.last_time.pop(name, None)
+
+    def _count(self, name: str, counter: str) -> None:
+        statistic = self.statistics.setdefault(name, {'written': 0, 'suppressed': 0,
+                                                      'failed': 0})
+        statistic[counter] += 1
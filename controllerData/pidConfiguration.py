@@ -0,0 +1,208 @@
+"""
+Validation and bulk application of the configuration of many PIDs.
+
+classes
+-------
+SettingsWriter
+    Collect settings and write them at once (write-behind).
+
+functions
+---------
+validate : configuration, names
+    Validate and normalize the configuration of several PIDs.
+limits : values, current, stored
+    Determine the output limits of a PID after applying the values.
+apply : pid, values, output_limits, last_output
+    Apply the values to a PID instance.
+toSettings : values
+    Convert the values of one PID to the keys of the settings.
+
+The configuration is a dictionary of PID names and their values, the keys of the values are
+those of the settings (without the 'pid<name>/' prefix), see :data:`KEYS`.
+"""
+
+import math
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from qtpy import QtCore
+from simple_pid import PID
+
+from .sensorFusion import parseSensors
+
+# key: type
+KEYS: dict[str, type] = {
+    'setpoint': float,
+    'Kp': float,
+    'Ki': float,
+    'Kd': float,
+    'lowerLimit': float,
+    'lowerLimitNone': bool,
+    'upperLimit': float,
+    'upperLimitNone': bool,
+    'autoMode': bool,
+    'lastOutput': float,
+    'state': int,
+    'sensors': list,
+    'sensor': str,
+    'output': str,
+    'setpointSource': str,
+    'feedforward': str,
+    'feedforwardGain': float,
+    'feedforwardReference': float,
+}
+STATES = (0, 1, 2)  # off, manual, pid
+
+
+def _validateValue(name: str, key: str, value: Any) -> Any:
+    """Convert the `value` of `key` to its type or raise a ValueError."""
+    typ = KEYS[key]
+    if typ is float:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"PID '{name}': '{key}' has to be a number, not {value!r}.")
+        if math.isnan(value) or (math.isinf(value) and key not in ('lowerLimit', 'upperLimit')):
+            raise ValueError(f"PID '{name}': '{key}' has to be finite, not {value}.")
+    elif typ is int:
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"PID '{name}': '{key}' has to be an integer, not {value!r}.")
+        if value not in STATES:
+            raise ValueError(f"PID '{name}': invalid state {value}, allowed are {STATES}.")
+    elif typ is bool:
+        if isinstance(value, str):
+            value = value.lower() in ("true", "1")
+        value = bool(value)
+    elif typ is list:
+        if isinstance(value, str):
+            value = value.replace(",", " ").split()
+        value = [str(sensor) for sensor in value]
+        try:
+            parseSensors(value)
+        except ValueError as exc:
+            raise ValueError(f"PID '{name}': invalid sensors, {exc}")
+    else:
+        value = str(value)
+    return value
+
+
+def validate(configuration: dict[str, dict[str, Any]], names: Iterable[str]
+             ) -> dict[str, dict[str, Any]]:
+    """Validate and normalize the `configuration` of the PIDs.
+
+    None values are ignored, 'sensor' is converted to the list 'sensors' and an infinite limit
+    to the corresponding 'None' key.
+
+    :param names: Names of the existing PIDs.
+    :raises ValueError: If any PID or value is invalid. Nothing is applied in that case.
+    """
+    names = set(names)
+    normalized: dict[str, dict[str, Any]] = {}
+    for name, values in configuration.items():
+        name = str(name)
+        if name not in names:
+            raise ValueError(f"PID '{name}' does not exist.")
+        if not isinstance(values, dict):
+            raise ValueError(f"PID '{name}': the values have to be a dictionary.")
+        result: dict[str, Any] = {}
+        for key, value in values.items():
+            if value is None:
+                continue
+            if key not in KEYS:
+                raise ValueError(f"PID '{name}': unknown key '{key}'.")
+            value = _validateValue(name, key, value)
+            if key == 'sensor':
+                key, value = 'sensors', _validateValue(name, 'sensors', value)
+            elif key == 'setpointSource' and value and (value not in names or value == name):
+                raise ValueError(f"PID '{name}': invalid setpoint source '{value}'.")
+            elif key in ('lowerLimit', 'upperLimit') and math.isinf(value):
+                result[f"{key}None"] = True
+                continue
+            result[key] = value
+        lower, upper = result.get('lowerLimit'), result.get('upperLimit')
+        if lower is not None and upper is not None and lower > upper:
+            raise ValueError(f"PID '{name}': lower limit {lower} exceeds upper limit {upper}.")
+        normalized[name] = result
+    return normalized
+
+
+def _limit(values: dict[str, Any], key: str, current: Optional[float],
+           stored: Callable[[str], float]) -> Optional[float]:
+    none = values.get(f"{key}None")
+    limit = values.get(key)
+    if none is None:
+        if limit is None or current is None:
+            return current  # The stored limit is not active.
+        return limit
+    if none:
+        return None
+    return stored(key) if limit is None else limit
+
+
+def limits(values: dict[str, Any], current: tuple[Optional[float], Optional[float]],
+           stored: Callable[[str], float]) -> tuple[Optional[float], Optional[float]]:
+    """Determine the output limits of a PID after applying the validated `values`.
+
+    :param current: Current output limits of the PID.
+    :param stored: Returns the stored value of a limit key, if the values do not contain it.
+    :raises ValueError: If the lower limit exceeds the upper one.
+    """
+    lower = _limit(values, 'lowerLimit', current[0], stored)
+    upper = _limit(values, 'upperLimit', current[1], stored)
+    if lower is not None and upper is not None and lower > upper:
+        raise ValueError(f"Lower limit {lower} exceeds upper limit {upper}.")
+    return lower, upper
+
+
+def apply(pid: PID, values: dict[str, Any], output_limits: tuple[Optional[float], Optional[float]],
+          last_output: float) -> None:
+    """Apply the validated `values` to the `pid` instance."""
+    pid.output_limits = output_limits
+    for key in ('Kp', 'Ki', 'Kd', 'setpoint'):
+        if key in values:
+            setattr(pid, key, values[key])
+    if 'autoMode' in values:
+        pid.set_auto_mode(values['autoMode'], values.get('lastOutput', last_output))
+
+
+def toSettings(values: dict[str, Any]) -> dict[str, Any]:
+    """Convert the validated `values` of a PID to the keys of the settings."""
+    result = dict(values)
+    if 'sensors' in result:
+        result['sensor'] = ",".join(result.pop('sensors'))
+    return result
+
+
+class SettingsWriter:
+    """Collect values for the QSettings and write them at once."""
+
+    def __init__(self) -> None:
+        self.pending: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def write(self, values: dict[str, Any]) -> None:
+        """Schedule the `values` (settings key: value) for writing."""
+        with self._lock:
+            self.pending.update(values)
+
+    def value(self, key: str, defaultValue: Any = None, type: Optional[type] = None) -> Any:
+        """Get the value of `key`, a pending one or the one of the settings."""
+        with self._lock:
+            if key in self.pending:
+                return self.pending[key]
+        if type is None:
+            return QtCore.QSettings().value(key, defaultValue)
+        return QtCore.QSettings().value(key, defaultValue, type)
+
+    def flush(self) -> int:
+        """Write the pending values and return their number."""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if pending:
+            settings = QtCore.QSettings()
+            for key, value in pending.items():
+                settings.setValue(key, value)
+            settings.sync()
+        return len(pending)
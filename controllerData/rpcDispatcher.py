@@ -0,0 +1,204 @@
+"""
+Dispatch of JSON-RPC requests to a pool of worker threads.
+
+classes
+-------
+RPCDispatcher : process, send, max_workers, timeout
+    Process requests in worker threads with per-method limits and timeouts.
+
+functions
+---------
+errorResponse : request, code, message
+    Create the JSON-RPC error response for a request.
+
+Methods marked as inline (cheap read-only ones or those, which have to run in the Qt thread)
+are processed immediately in the calling thread, a batch as soon as it contains any of them.
+All other requests are processed by the workers, the response is sent from the worker. If a
+request does not finish in time, an error response is sent instead and the late result is
+discarded.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional, Union
+
+log = logging.getLogger("TemperatureController")
+
+# JSON-RPC error codes in the server error range.
+TIMEOUT = -32001
+BUSY = -32002
+SERVER_ERROR = -32000
+
+
+def errorResponse(request: Any, code: int, message: str) -> Optional[str]:
+    """Create the error response (JSON) for the parsed `request`, None for notifications."""
+    requests = request if isinstance(request, list) else [request]
+    errors = [{"jsonrpc": "2.0", "id": item["id"], "error": {"code": code, "message": message}}
+              for item in requests if isinstance(item, dict) and item.get("id") is not None]
+    if not errors:
+        return None
+    return json.dumps(errors if isinstance(request, list) else errors[0])
+
+
+def methodNames(request: Any) -> list[str]:
+    """Return the names of the methods called by the parsed `request`."""
+    requests = request if isinstance(request, list) else [request]
+    return [item.get("method", "") for item in requests if isinstance(item, dict)]
+
+
+class Request:
+    """A request in progress."""
+
+    def __init__(self, payload: Union[str, bytes], parsed: Any, context: Any,
+                 deadline: float) -> None:
+        self.payload = payload
+        self.parsed = parsed
+        self.context = context
+        self.deadline = deadline
+        self.answered = False
+
+
+class RPCDispatcher:
+    """Process JSON-RPC requests in a pool of worker threads.
+
+    :param process: Processes a JSON-RPC request and returns the response.
+    :param send: Sends the response, called with the response and the context of the request.
+    :param max_workers: Number of worker threads.
+    :param timeout: Default timeout in s.
+    """
+
+    def __init__(self, process: Callable[[Union[str, bytes]], Any],
+                 send: Callable[[Any, Any], None], max_workers: int = 4,
+                 timeout: float = 10) -> None:
+        self.process = process
+        self.send = send
+        self.timeout = timeout
+        self.inline: set[str] = set()
+        self.limits: dict[str, threading.BoundedSemaphore] = {}
+        self.timeouts: dict[str, float] = {}
+        self.statistics = {'inline': 0, 'pooled': 0, 'timeouts': 0, 'busy': 0}
+        self._statistics_lock = threading.Lock()  # updated from several threads
+        self.executor = ThreadPoolExecutor(max_workers, "rpc")
+        self._lock = threading.Lock()
+        self._deadlines: list[tuple[float, int, Request]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stop = False
+        self.watchdog = threading.Thread(target=self._watch, name="rpc watchdog", daemon=True)
+        self.watchdog.start()
+
+    def configure(self, name: str, inline: Optional[bool] = None, limit: Optional[int] = None,
+                  timeout: Optional[float] = None) -> None:
+        """Configure the method `name`.
+
+        :param inline: Process it immediately in the calling thread.
+        :param limit: Maximum number of simultaneous calls.
+        :param timeout: Timeout in s.
+        """
+        if inline is not None:
+            if inline:
+                self.inline.add(name)
+            else:
+                self.inline.discard(name)
+        if limit is not None:
+            self.limits[name] = threading.BoundedSemaphore(limit)
+        if timeout is not None:
+            self.timeouts[name] = timeout
+
+    def dispatch(self, payload: Union[str, bytes], context: Any = None) -> None:
+        """Process the request `payload` and send the response with `context`."""
+        try:
+            parsed = json.loads(payload)
+        except ValueError:
+            parsed = None
+        names = methodNames(parsed)
+        if not names or any(name in self.inline for name in names):
+            # A batch with any inline method is processed inline as a whole, such that methods
+            # bound to the calling thread never run in a worker. Invalid requests result in
+            # the appropriate error response.
+            self._count('inline')
+            response = self.process(payload)
+            if response is not None:
+                self.send(response, context)
+            return
+        timeout = max(self.timeouts.get(name, self.timeout) for name in names)
+        request = Request(payload, parsed, context, time.monotonic() + timeout)
+        with self._condition:
+            heapq.heappush(self._deadlines, (request.deadline, next(self._counter), request))
+            self._condition.notify()
+        self._count('pooled')
+        self.executor.submit(self._run, request, sorted(set(names)))
+
+    def _count(self, key: str) -> None:
+        """Increment the statistics counter `key`."""
+        with self._statistics_lock:
+            self.statistics[key] += 1
+
+    def _answer(self, request: Request, response: Any) -> None:
+        """Send the `response` unless the request is already answered."""
+        with self._lock:
+            if request.answered:
+                return
+            request.answered = True
+        if response is None:
+            return  # Notifications are not answered.
+        try:
+            self.send(response, request.context)
+        except Exception as exc:
+            log.exception("Sending the RPC response failed.", exc_info=exc)
+
+    def _run(self, request: Request, names: list[str]) -> None:
+        """Process the `request` in a worker thread."""
+        acquired = []
+        try:
+            for name in names:
+                semaphore = self.limits.get(name)
+                if semaphore is None:
+                    continue
+                if not semaphore.acquire(timeout=max(request.deadline - time.monotonic(), 0)):
+                    self._count('busy')
+                    self._answer(request, errorResponse(request.parsed, BUSY,
+                                                        f"Method '{name}' is busy."))
+                    return
+                acquired.append(semaphore)
+            if request.answered:
+                return  # Timed out while waiting.
+            response = self.process(request.payload)
+        except Exception as exc:
+            log.exception("Processing the RPC request failed.", exc_info=exc)
+            response = errorResponse(request.parsed, SERVER_ERROR, str(exc))
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+        self._answer(request, response)
+
+    def _watch(self) -> None:
+        """Answer requests, which exceed their deadline, with a timeout error."""
+        while True:
+            with self._condition:
+                while not self._stop and not self._deadlines:
+                    self._condition.wait()
+                if self._stop:
+                    return
+                deadline, _, request = self._deadlines[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and not request.answered:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._deadlines)
+            if not request.answered:
+                self._count('timeouts')
+                log.warning(f"RPC request {methodNames(request.parsed)} timed out.")
+                self._answer(request, errorResponse(request.parsed, TIMEOUT, "Timeout."))
+
+    def close(self) -> None:
+        """Stop the workers and the watchdog."""
+        with self._condition:
+            self._stop = True
+            self._condition.notify()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,181 @@
+"""
+Fusion of redundant sensors to the input values of the PIDs.
+
+classes
+-------
+SensorFusion : stuck_time, valid_range, outlier_threshold
+    Track the health of the sensors and combine the sensors of each PID.
+
+functions
+---------
+parseSensors : sensors
+    Parse the sensor list of a PID into the mode, the names and the weights.
+
+The sensor list of a PID may start with a mode, separated by a colon, and each sensor may have
+a weight after an asterisk, for example "mean:a*2, b, c". The modes are
+
+- 'first': The first valid sensor (default, a fallback chain).
+- 'median': The median of the valid sensors.
+- 'mean': The weighted mean of the valid sensors.
+- 'reject': The weighted mean of the valid sensors, which deviate at most `outlier_threshold`
+  from their median.
+
+A sensor is invalid, if it is missing, not a finite number, outside of the valid range, or if its
+value did not change for `stuck_time`.
+"""
+
+import math
+from typing import Any, Optional
+
+import numpy as np
+
+MODES = ('first', 'median', 'mean', 'reject')
+
+
+def parseSensors(sensors: list[str]) -> tuple[str, list[str], list[float]]:
+    """Parse the sensor list of a PID into the mode, the sensor names and their weights."""
+    mode = 'first'
+    names: list[str] = []
+    weights: list[float] = []
+    for i, entry in enumerate(sensors):
+        entry = entry.strip()
+        if i == 0 and ":" in entry:
+            mode, _, entry = entry.partition(":")
+            mode = mode.strip()
+            if mode not in MODES:
+                raise ValueError(f"Unknown sensor fusion mode '{mode}'.")
+            entry = entry.strip()
+        if not entry:
+            continue
+        name, _, weight = entry.partition("*")
+        names.append(name.strip())
+        weights.append(float(weight) if weight else 1.0)
+    return mode, names, weights
+
+
+class SensorFusion:
+    """Track the health of the sensors and combine the sensors of each PID.
+
+    The combination is vectorized over all PIDs: the sensor values are arranged in a matrix with
+    one row per PID.
+
+    :param stuck_time: A sensor, whose value does not change for this time in s, is invalid.
+        0 disables the detection.
+    :param valid_range: Values outside of this (minimum, maximum) range are invalid.
+    :param outlier_threshold: Maximum deviation from the median for the 'reject' mode.
+    """
+
+    def __init__(self, stuck_time: float = 0,
+                 valid_range: tuple[float, float] = (-math.inf, math.inf),
+                 outlier_threshold: float = 1) -> None:
+        self.stuck_time = stuck_time
+        self.valid_range = valid_range
+        self.outlier_threshold = outlier_threshold
+        self.health: dict[str, dict[str, Any]] = {}
+        self._configuration: Optional[tuple] = None
+        self._sensors: list[str] = []  # all sensors used
+        self._pids: list[str] = []
+        self._modes = np.zeros(0, dtype=int)
+        self._index = np.zeros((0, 0), dtype=int)  # into the sensor vector, -1 for padding
+        self._weights = np.zeros((0, 0))
+
+    def compile(self, pidSensors: dict[str, list[str]]) -> None:
+        """Arrange the sensors of the PIDs (name: sensor list) in the matrices."""
+        configuration = tuple((pid, tuple(sensors)) for pid, sensors in pidSensors.items())
+        if configuration == self._configuration:
+            return
+        parsed = {}
+        for pid, sensors in pidSensors.items():
+            try:
+                parsed[pid] = parseSensors(sensors)
+            except ValueError as exc:
+                raise ValueError(f"PID '{pid}': {exc}")
+        sensors_index: dict[str, int] = {}
+        for _, names, _ in parsed.values():
+            for name in names:
+                sensors_index.setdefault(name, len(sensors_index))
+        width = max((len(names) for _, names, _ in parsed.values()), default=0)
+        self._pids = list(parsed)
+        self._sensors = list(sensors_index)
+        self._modes = np.array([MODES.index(mode) for mode, _, _ in parsed.values()], dtype=int)
+        self._index = np.full((len(parsed), width), -1, dtype=int)
+        self._weights = np.zeros((len(parsed), width))
+        for row, (_, names, weights) in enumerate(parsed.values()):
+            self._index[row, :len(names)] = [sensors_index[name] for name in names]
+            self._weights[row, :len(weights)] = weights
+        self._configuration = configuration
+
+    def values(self, data: dict[str, Any], timestamp: float) -> np.ndarray:
+        """Return the values of the used sensors, NaN for invalid ones, and update their health."""
+        minimum, maximum = self.valid_range
+        values = np.full(len(self._sensors), math.nan)
+        for i, name in enumerate(self._sensors):
+            health = self.health.setdefault(name, {'valid': False, 'reason': "new",
+                                                   'unchanged': 0, 'invalid': 0,
+                                                   'changed': timestamp, 'last': None})
+            try:
+                value = float(data[name])
+            except KeyError:
+                reason = "missing"
+            except (TypeError, ValueError):
+                reason = "not a number"
+            else:
+                if value != health['last']:
+                    health['last'] = value
+                    health['changed'] = timestamp
+                health['unchanged'] = timestamp - health['changed']
+                if not math.isfinite(value):
+                    reason = "not finite"
+                elif not minimum <= value <= maximum:
+                    reason = "out of range"
+                elif self.stuck_time > 0 and health['unchanged'] > self.stuck_time:
+                    reason = "stuck"
+                else:
+                    reason = ""
+                    values[i] = value
+            if reason:
+                health['invalid'] += 1
+            health['valid'] = not reason
+            health['reason'] = reason
+        return values
+
+    def fuse(self, data: dict[str, Any], pidSensors: dict[str, list[str]],
+             timestamp: float) -> dict[str, float]:
+        """Return the input value of each PID, NaN if no sensor is valid.
+
+        :param data: The sensor data.
+        :param pidSensors: The sensor lists of the PIDs.
+        :param timestamp: Time of the readout in s.
+        """
+        self.compile(pidSensors)
+        vector = np.append(self.values(data, timestamp), math.nan)  # the last one as padding
+        if not self._index.size:
+            return {pid: math.nan for pid in self._pids}
+        matrix = vector[self._index]  # index -1 is the padding
+        valid = ~np.isnan(matrix)
+        any_valid = valid.any(axis=1)
+        first = matrix[np.arange(len(self._pids)), valid.argmax(axis=1)]
+        median = np.full(len(self._pids), math.nan)
+        if any_valid.any():
+            median[any_valid] = np.nanmedian(matrix[any_valid], axis=1)
+        with np.errstate(invalid='ignore'):
+            kept = valid & (np.abs(matrix - median[:, None]) <= self.outlier_threshold)
+        mean = self._weightedMean(matrix, valid)
+        rejected = self._weightedMean(matrix, kept)
+        result = np.select([self._modes == 1, self._modes == 2, self._modes == 3],
+                           [median, mean, rejected], default=first)
+        return dict(zip(self._pids, result.tolist()))
+
+    def _weightedMean(self, matrix: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Weighted mean of the rows of `matrix` considering only the `mask`ed values."""
+        weights = np.where(mask, self._weights, 0)
+        total = weights.sum(axis=1)
+        sums = (np.where(mask, matrix, 0) * weights).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, sums / total, math.nan)
+
+    def get_health(self) -> dict[str, dict[str, Any]]:
+        """Return the health of each sensor: whether it is valid, the reason otherwise, the time
+        in s since its value changed, and the number of invalid readings."""
+        return {name: {key: health[key] for key in ('valid', 'reason', 'unchanged', 'invalid')}
+                for name, health in self.health.items()}
@@ -21,14 +21,28 @@ setOutput : self, output, value
 executeCommand : self, command
     Handle the string `command`, for example change some device settings.
 
+Optional attributes
+-------------------
+deviceMap : list of dict
+    Rules, which tinkerforge device provides which input or output,
+    see `deviceMap.py` for the format.
+drivers : list of dict
+    Driver plugins to read, see `drivers.py` for the format.
+
 
 All the other methods here are examples for routines outsourced from above
 necessary or optional methods.
 """
 
-import math
+import logging
 from typing import Any
 
+from . import conversion, serialSessions, wdeReader
+from .deviceMap import DEFAULT_RULES
+from .drivers import readArduino
+
+log = logging.getLogger("TemperatureController")
+
 # Necessary for tinkerforge
 try:
     from tinkerforge.ip_connection import Error as tfError
@@ -36,17 +50,33 @@ except ModuleNotFoundError:
     tfError = BaseException
 
 
+# Tinkerforge device map, the default rules and for example a temperature bricklet with its uid
+# as an input:
+# {'name': 'room', 'uid': "abc", 'type': 'BrickletTemperatureV2', 'kind': 'input'},
+deviceMap = [
+    *DEFAULT_RULES,
+]
+
+
+# Driver plugins, for example:
+# {'driver': 'arduino', 'name': 'south', 'port': "/dev/ArduinoSouth"},
+# {'driver': 'wde', 'port': "/dev/ttyUSB0"},
+drivers = []
+
+
 # Main methods setup, getData, close.
 def setup(self) -> None:
     """Configure the sensors."""
     raise NotImplementedError
     self.rm = pyvisa.ResourceManager()
+    # Serial sessions serialize the access of the readout and of user commands.
+    self.serial = serialSessions.SessionManager(self.rm)
     try:
-        self.south = setupArduino(self.rm, "/dev/ArduinoSouth")
+        self.south = self.serial.open("/dev/ArduinoSouth", setupArduino)
     except Exception:
         pass  # Setup failed, so no device stored.
     try:
-        self.north = setupArduino(self.rm, "/dev/ArduinoNorth")
+        self.north = self.serial.open("/dev/ArduinoNorth", setupArduino)
     except Exception:
         pass  # Setup failed, so no device stored.
     try:
@@ -90,14 +120,16 @@ def setOutput(self, output: str, value: float) -> None:
 def executeCommand(self, command: str) -> Any:
     """Execute `command`, sending it to the arduino."""
     raise NotImplementedError
-    return self.south.query(command)
+    if command == "statistics":
+        return self.serial.statistics()  # latency etc. of the serial ports
+    return self.south.query(command, priority=serialSessions.USER, timeout=5)
 
 
 def close(self) -> None:
     """Close the connections."""
     raise NotImplementedError
     try:
-        self.south.close()
+        self.serial.close()  # Closes the Arduinos
     except AttributeError:
         pass  # Not existent
     try:
@@ -122,9 +154,8 @@ def getAirQuality(self):
     try:
         iaq, iaqa, temp, humidity, pressure = bricklet.get_all_values()
     except tfError as exc:
-        if exc.value == tfError.TIMEOUT:
-            del self.tfDevices[self.tfMap['airQuality']]
-            del self.tfMap['airQuality']
+        if exc.value in (tfError.TIMEOUT, tfError.NOT_CONNECTED):
+            self.deviceLost('airQuality')
         return {}
     else:
         return {  # 'airQuality': iaq,
@@ -152,47 +183,30 @@ def setupArduino(resourceManager, port):
 
 
 def getArduinoData(arduino):
+    """Read the arduino `arduino` (a serial session), logging errors."""
     try:
-        raw = arduino.query("r").split("\t")
+        return readArduino(arduino)
     except AttributeError:
         return {}
-    else:
-        data = {'cold': raw[0],
-                'main': raw[1],
-                'aux': raw[2],
-                'setpoint': raw[3]
-                }
-        for key in data.keys():
-            data[key] = calculateTemperature(data[key])
-        return data
+    except Exception as exc:
+        log.warning(f"Arduino readout failed: {exc}")
+        return {}
 
 
 def setSetpoint(self, temperature):
     """Set the arduino setpoint to `temperature`."""
     setpoint = calculateSetpoint(temperature)
-    self.south.query(f"s{setpoint}")
+    self.south.query(f"s{setpoint}", priority=serialSessions.USER)
 
 
 def calculateTemperature(voltage):
-    """Convert the Arduino `voltage` in mV to a temperature in °C."""
+    """Convert the Arduino `voltage` in ADC counts (of 1024) to a temperature in °C."""
     try:
         voltage = float(voltage)
-    except Exception as exc:
-        print(exc)
+    except ValueError as exc:
+        log.warning(f"Invalid Arduino value: {exc}")
         raise
-    voltage /= 1024  # to get a relative voltage to the maximum
-    # now according to a Labview program:
-    voltage = voltage / (1 - voltage)
-    if voltage >= 3.277:
-        pars = [3.357042, 2.5214848, 3.3743283, -6.4957311]
-    elif voltage >= 0.06816:
-        pars = [3.354017, 2.5617244, 2.1400943, -7.2405219]
-    else:
-        pars = [3.3536166, 2.53772, 0.85433271, -8.7912262]
-    return 1 / (pars[0] * 1E-3
-                + pars[1] * 1E-4 * math.log(voltage)
-                + pars[2] * 1E-6 * (math.log(voltage))**2
-                + pars[3] * 1E-8 * (math.log(voltage))**3) - 273.15
+    return float(conversion.thermistor(voltage))
 
 
 def calculateSetpoint(temperature):
@@ -203,22 +217,18 @@ def calculateSetpoint(temperature):
 
 # Methods for ELV USB-WDE weather sensor receiver
 def setupWDE(resourceManager):
-    """Initialize the ELV wde weather sensor receiver."""
-    wde = resourceManager.open_resource("ASRL/dev/ttyUSB0::INSTR")
-    wde.read_termination = '\r\n'
-    while wde.bytes_in_buffer:
-        wde.read()
+    """Initialize the ELV wde weather sensor receiver, reading in the background."""
+    resource = resourceManager.open_resource("ASRL/dev/ttyUSB0::INSTR")
+    resource.read_termination = '\r\n'
+    resource.timeout = 1000
+    wde = wdeReader.WDEReader(resource)
+    wde.start()
     return wde
 
 
 def getWDEData(wde):
-    """Read the wde sensor data."""
-    data = {}
-    if wde.bytes_in_buffer:
-        raw = wde.read().replace(',', '.').split(';')
-        if raw[2+1]:
-            data['experiment'] = float(raw[2+1])
-        if raw[2+5]:
-            data['outside'] = float(raw[2+5])
-            data['humidityout'] = float(raw[10+5])
-    return data
+    """Get the latest wde sensor data, without waiting for the device."""
+    try:
+        return wde.get_data()
+    except AttributeError:
+        return {}
@@ -0,0 +1,147 @@
+"""
+Serialized access to serial (VISA) devices shared by several threads.
+
+classes
+-------
+SerialSession : resource, name
+    Execute the queries to one device one after the other in a worker thread.
+SessionManager : resourceManager
+    Keep one session per port open.
+
+Queries with a lower priority number are executed first, such that the readout
+(:data:`READOUT`) is not delayed by user commands (:data:`USER`).
+"""
+
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+log = logging.getLogger("TemperatureController")
+
+# Priorities
+READOUT = 0
+USER = 10
+
+
+class SerialSession:
+    """Execute queries to the `resource` serialized in a worker thread.
+
+    :param resource: Opened pyvisa resource (or anything else with `query` and `close`).
+    :param name: Name for the statistics and the log.
+    """
+
+    def __init__(self, resource, name: str = "") -> None:
+        self.resource = resource
+        self.name = name
+        self.queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()  # keeps the order within one priority
+        self._closed = False
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.
+        self.latency_max = 0.
+        self.latency_last = 0.
+        self.thread = threading.Thread(target=self.run, name=f"SerialSession {name}",
+                                       daemon=True)
+        self.thread.start()
+
+    def submit(self, command: str, priority: int = USER) -> Future:
+        """Queue the query `command` and return a future for the response."""
+        if self._closed:
+            raise ConnectionError(f"Session '{self.name}' is closed.")
+        future: Future = Future()
+        self.queue.put((priority, next(self._counter), command, future, time.perf_counter()))
+        return future
+
+    def query(self, command: str, priority: int = USER, timeout: Optional[float] = None
+              ) -> Any:
+        """Query `command` and return the response, waiting at most `timeout` s.
+
+        A query, which timed out before it started, is cancelled and not sent anymore.
+        """
+        future = self.submit(command, priority)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Query '{command}' to '{self.name}' timed out.")
+
+    def run(self) -> None:
+        """Execute the queued queries until closed."""
+        while True:
+            priority, _, command, future, queued = self.queue.get()
+            if command is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled, for example after a timeout
+            try:
+                response = self.resource.query(command)
+            except Exception as exc:
+                self.errors += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(response)
+            latency = time.perf_counter() - queued
+            self.count += 1
+            self.latency_sum += latency
+            self.latency_last = latency
+            self.latency_max = max(self.latency_max, latency)
+
+    @property
+    def statistics(self) -> dict[str, Any]:
+        """Number of queries, errors, and the latency (including waiting) in s."""
+        return {'count': self.count,
+                'errors': self.errors,
+                'queued': self.queue.qsize(),
+                'latencyMean': self.latency_sum / self.count if self.count else math.nan,
+                'latencyMax': self.latency_max,
+                'latencyLast': self.latency_last,
+                }
+
+    def close(self, timeout: float = 5) -> None:
+        """Finish the queued queries and close the resource."""
+        self._closed = True
+        self.queue.put((math.inf, next(self._counter), None, None, 0))
+        self.thread.join(timeout)
+        self.resource.close()
+
+
+class SessionManager:
+    """Keep one open session per port.
+
+    :param resourceManager: pyvisa ResourceManager.
+    """
+
+    def __init__(self, resourceManager) -> None:
+        self.resourceManager = resourceManager
+        self.sessions: dict[str, SerialSession] = {}
+
+    def open(self, port: str, setup: Callable[[Any, str], Any]) -> SerialSession:
+        """Return the session of `port`, opening the resource with `setup` if necessary.
+
+        :param setup: Called with the resource manager and the port, returns the resource.
+        """
+        try:
+            return self.sessions[port]
+        except KeyError:
+            session = SerialSession(setup(self.resourceManager, port), name=port)
+            self.sessions[port] = session
+            return session
+
+    def statistics(self) -> dict[str, dict[str, Any]]:
+        """Statistics of all sessions."""
+        return {port: session.statistics for port, session in self.sessions.items()}
+
+    def close(self) -> None:
+        """Close all sessions."""
+        for port, session in self.sessions.items():
+            try:
+                session.close()
+            except Exception as exc:
+                log.exception(f"Closing '{port}' failed.", exc_info=exc)
+        self.sessions.clear()
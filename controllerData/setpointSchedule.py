@@ -0,0 +1,150 @@
+"""
+Setpoint schedules and ramps executed by the controller.
+
+classes
+-------
+Profile : times, setpoints, ramp, period, start
+    A sequence of setpoints at times, stepped or ramped, once or repeated.
+
+functions
+---------
+parseTime : value, period
+    Convert a time of a schedule ("HH:MM", "Mon HH:MM" or seconds) to seconds.
+ramp : setpoint, target, rate, start
+    Create a profile ramping from `setpoint` to `target` with `rate` per minute.
+
+A daily schedule repeats the setpoints every day at the given local times, a weekly one every
+week starting on Monday. Without period the times are seconds after `start` and the profile ends
+with its last point. The profile keeps the index of the current point and the time of the next
+event, such that the setpoint is looked up anew only, when the next point is reached.
+"""
+
+from bisect import bisect_right
+import math
+import time
+from typing import Any, Optional, Sequence, Union
+
+PERIODS = {'daily': 86400, 'weekly': 7 * 86400}
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def parseTime(value: Union[str, float], period: Optional[str] = None) -> float:
+    """Convert a time ("HH:MM[:SS]", "Mon HH:MM" for weekly schedules, or s) to seconds."""
+    if not isinstance(value, str):
+        return float(value)
+    day, _, clock = value.strip().rpartition(" ")
+    seconds = 0.
+    if day:
+        if period != 'weekly' or day[:3].lower() not in DAYS:
+            raise ValueError(f"Invalid day in '{value}', days are allowed for weekly schedules.")
+        seconds = DAYS.index(day[:3].lower()) * 86400
+    try:
+        numbers = [float(part) for part in clock.split(":")]
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', use 'HH:MM'.")
+    if len(numbers) == 1:
+        return seconds + numbers[0]  # plain seconds
+    if len(numbers) > 3:
+        raise ValueError(f"Invalid time '{value}', use 'HH:MM'.")
+    return seconds + sum(factor * number for factor, number in zip((3600, 60, 1), numbers))
+
+
+class Profile:
+    """Setpoints at times, stepped or linearly ramped in between.
+
+    :param times: Times of the setpoints in s, since `start` or since the start of the period.
+    :param setpoints: The setpoints.
+    :param ramp: Interpolate linearly between the setpoints instead of stepping.
+    :param period: 'daily', 'weekly' or None for a single run.
+    :param start: Timestamp of the begin of a single run.
+    """
+
+    def __init__(self, times: Sequence[float], setpoints: Sequence[float], ramp: bool = False,
+                 period: Optional[str] = None, start: Optional[float] = None) -> None:
+        if not times or len(times) != len(setpoints):
+            raise ValueError("A profile needs the same, positive number of times and setpoints.")
+        if any(b <= a for a, b in zip(times, times[1:])):
+            raise ValueError("The times have to increase.")
+        if any(not math.isfinite(setpoint) for setpoint in setpoints):
+            raise ValueError("The setpoints have to be finite.")
+        if period is not None:
+            if period not in PERIODS:
+                raise ValueError(f"Unknown period '{period}', use one of {list(PERIODS)}.")
+            if times[0] < 0 or times[-1] >= PERIODS[period]:
+                raise ValueError(f"The times have to be within the {period} period.")
+        self.times = tuple(float(t) for t in times)
+        self.setpoints = tuple(float(setpoint) for setpoint in setpoints)
+        self.ramp = ramp
+        self.period = period
+        self.start = time.time() if start is None else start
+        self.index = -1  # current point, -1 before the first one
+        self.begin = math.inf  # timestamp of the current point
+        self.next_event = -math.inf  # timestamp of the next point
+
+    @classmethod
+    def fromDict(cls, data: dict[str, Any]) -> "Profile":
+        return cls(times=data['times'], setpoints=data['setpoints'], ramp=data.get('ramp', False),
+                   period=data.get('period'), start=data.get('start'))
+
+    def toDict(self) -> dict[str, Any]:
+        return {'times': list(self.times), 'setpoints': list(self.setpoints), 'ramp': self.ramp,
+                'period': self.period, 'start': self.start}
+
+    def _origin(self, timestamp: float) -> float:
+        """Return the timestamp of the start of the current period or of the single run."""
+        if self.period is None:
+            return self.start
+        local = timestamp + time.localtime(timestamp).tm_gmtoff
+        if self.period == 'weekly':
+            local += 3 * 86400  # 1970-01-01 was a Thursday
+        return timestamp - local % PERIODS[self.period]
+
+    def _locate(self, timestamp: float) -> None:
+        """Find the current point and the time of the next one."""
+        origin = self._origin(timestamp)
+        index = bisect_right(self.times, timestamp - origin) - 1
+        if self.period is None:
+            self.index = index
+            self.begin = origin + self.times[index] if index >= 0 else -math.inf
+            self.next_event = origin + self.times[index + 1] if index + 1 < len(self.times) \
+                else math.inf
+            return
+        length = PERIODS[self.period]
+        if index < 0:  # The last point of the previous period is still valid.
+            index = len(self.times) - 1
+            origin -= length
+        self.index = index
+        self.begin = origin + self.times[index]
+        self.next_event = origin + (self.times[index + 1] if index + 1 < len(self.times)
+                                    else self.times[0] + length)
+
+    def update(self, timestamp: float) -> tuple[Optional[float], bool]:
+        """Return the setpoint at `timestamp` (None before the first point) and whether a new
+        point has been reached."""
+        event = False
+        if not self.begin <= timestamp < self.next_event:
+            old = self.index
+            self._locate(timestamp)
+            event = self.index != old
+        if self.index < 0:
+            return None, event
+        setpoint = self.setpoints[self.index]
+        if self.ramp and math.isfinite(self.next_event):
+            following = self.setpoints[(self.index + 1) % len(self.setpoints)]
+            fraction = (timestamp - self.begin) / (self.next_event - self.begin)
+            setpoint += fraction * (following - setpoint)
+        return setpoint, event
+
+    def finished(self, timestamp: float) -> bool:
+        """Whether a single run reached its last point."""
+        return self.period is None and timestamp >= self.start + self.times[-1]
+
+
+def ramp(setpoint: float, target: float, rate: float, start: Optional[float] = None) -> Profile:
+    """Create a profile ramping from `setpoint` to `target` with `rate` (per minute)."""
+    if rate <= 0:
+        raise ValueError("The ramp rate has to be positive.")
+    duration = abs(target - setpoint) / rate * 60
+    if duration == 0:
+        return Profile([0], [target], start=start)
+    return Profile([0, duration], [setpoint, target], ramp=True, start=start)
@@ -0,0 +1,191 @@
+"""
+Streaming filters, which smooth the noisy sensor values before they reach the PIDs.
+
+classes
+-------
+FilterBank : pipelines
+    Apply the filter pipelines of all channels to a data dictionary.
+
+functions
+---------
+parsePipeline : pipeline
+    Parse a pipeline string into the filter names and their parameters.
+lowpass : ratio
+    Calculate the coefficients of a Butterworth lowpass biquad.
+
+A pipeline is a comma separated sequence of filters with a parameter after a colon, for example
+"median:5, ema:0.3". The filters are
+
+- 'ema': Exponential moving average with the weight (0, 1] of the new value.
+- 'median': Median of the last n values.
+- 'biquad': Second order Butterworth lowpass with the cutoff frequency as a fraction (0, 0.5)
+  of the readout rate.
+
+Each filter keeps a fixed amount of state per channel. The channels are processed together: the
+nth filter of all pipelines with the same type is one array operation. Values, which are not
+finite, pass unchanged without modifying the state.
+"""
+
+import math
+from typing import Any, Optional
+
+import numpy as np
+
+FILTERS = ('ema', 'median', 'biquad')
+
+
+def parsePipeline(pipeline: str) -> list[tuple[str, float]]:
+    """Parse the `pipeline` string into a list of filter names and parameters."""
+    result = []
+    for entry in pipeline.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, parameter = entry.partition(":")
+        name = name.strip()
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter '{name}', use one of {FILTERS}.")
+        try:
+            value = float(parameter)
+        except ValueError:
+            raise ValueError(f"The filter '{name}' needs a numeric parameter, not '{parameter}'.")
+        if name == 'ema' and not 0 < value <= 1:
+            raise ValueError(f"The weight {value} of 'ema' has to be in (0, 1].")
+        elif name == 'median' and (value < 1 or value != int(value)):
+            raise ValueError(f"The length {value} of 'median' has to be a positive integer.")
+        elif name == 'biquad' and not 0 < value < 0.5:
+            raise ValueError(f"The cutoff ratio {value} of 'biquad' has to be in (0, 0.5).")
+        result.append((name, value))
+    return result
+
+
+def lowpass(ratio: float) -> tuple[float, float, float, float, float]:
+    """Calculate the coefficients (b0, b1, b2, a1, a2) of a Butterworth lowpass biquad with the
+    cutoff frequency `ratio` times the sampling frequency (bilinear transform)."""
+    k = math.tan(math.pi * ratio)
+    norm = 1 / (1 + math.sqrt(2) * k + k * k)
+    b0 = k * k * norm
+    return b0, 2 * b0, b0, 2 * (k * k - 1) * norm, (1 - math.sqrt(2) * k + k * k) * norm
+
+
+class _Stage:
+    """One filter type at one position of the pipelines of several channels."""
+
+    def __init__(self, channels: list[int], parameters: list[float]) -> None:
+        self.channels = np.array(channels, dtype=int)
+        self.started = np.zeros(len(channels), dtype=bool)
+
+    def process(self, vector: np.ndarray) -> None:
+        """Filter the finite values of the channels in the `vector` in place."""
+        values = vector[self.channels]
+        finite = np.isfinite(values)
+        if finite.any():
+            vector[self.channels[finite]] = self.filter(finite, values[finite])
+
+    def filter(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Filter the `values` of the `mask`ed channels and return the result."""
+        raise NotImplementedError
+
+
+class _EMA(_Stage):
+    def __init__(self, channels: list[int], parameters: list[float]) -> None:
+        super().__init__(channels, parameters)
+        self.alpha = np.array(parameters)
+        self.state = np.zeros(len(channels))
+
+    def filter(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        state = np.where(self.started[mask], self.state[mask], values)
+        state += self.alpha[mask] * (values - state)
+        self.state[mask] = state
+        self.started[mask] = True
+        return state
+
+
+class _Median(_Stage):
+    def __init__(self, channels: list[int], parameters: list[float]) -> None:
+        super().__init__(channels, parameters)
+        self.length = np.array(parameters, dtype=int)
+        self.buffer = np.full((len(channels), int(self.length.max())), math.nan)  # ring buffers
+        self.position = np.zeros(len(channels), dtype=int)
+
+    def filter(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        rows = np.flatnonzero(mask)
+        self.buffer[rows, self.position[rows]] = values
+        self.position[rows] = (self.position[rows] + 1) % self.length[rows]
+        return np.nanmedian(self.buffer[rows], axis=1)
+
+
+class _Biquad(_Stage):
+    def __init__(self, channels: list[int], parameters: list[float]) -> None:
+        super().__init__(channels, parameters)
+        self.coefficients = np.array([lowpass(ratio) for ratio in parameters]).T
+        self.z1 = np.zeros(len(channels))
+        self.z2 = np.zeros(len(channels))
+
+    def filter(self, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        b0, b1, b2, a1, a2 = self.coefficients[:, mask]
+        new = ~self.started[mask]
+        # Start in the steady state of the first value (unity gain at DC).
+        z1 = np.where(new, values * (1 - b0), self.z1[mask])
+        z2 = np.where(new, values * (b2 - a2), self.z2[mask])
+        output = b0 * values + z1  # transposed direct form II
+        self.z1[mask] = b1 * values - a1 * output + z2
+        self.z2[mask] = b2 * values - a2 * output
+        self.started[mask] = True
+        return output
+
+
+STAGES: dict[str, type[_Stage]] = {'ema': _EMA, 'median': _Median, 'biquad': _Biquad}
+
+
+class FilterBank:
+    """Filter the values of the channels with their pipelines.
+
+    :param pipelines: Channel names and their pipeline strings.
+    """
+
+    def __init__(self, pipelines: Optional[dict[str, str]] = None) -> None:
+        self.configure(pipelines or {})
+
+    def configure(self, pipelines: dict[str, str]) -> None:
+        """Set the pipelines (channel: pipeline string) and reset the state of all filters.
+
+        :raises ValueError: If any pipeline is invalid, the old ones remain.
+        """
+        parsed = {}
+        for channel, pipeline in pipelines.items():
+            try:
+                filters = parsePipeline(pipeline)
+            except ValueError as exc:
+                raise ValueError(f"Channel '{channel}': {exc}")
+            if filters:
+                parsed[channel] = filters
+        self.channels = list(parsed)
+        groups: dict[tuple[int, str], tuple[list[int], list[float]]] = {}
+        for i, filters in enumerate(parsed.values()):
+            for position, (name, parameter) in enumerate(filters):
+                channels, parameters = groups.setdefault((position, name), ([], []))
+                channels.append(i)
+                parameters.append(parameter)
+        self.stages = [STAGES[name](channels, parameters) for (_, name), (channels, parameters)
+                       in sorted(groups.items(), key=lambda item: item[0][0])]
+
+    def process(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return `data` with the filtered values of the configured channels, a copy if there
+        are any. Missing channels and values, which are not numbers, are not filtered.
+        """
+        if not self.channels:
+            return data
+        vector = np.full(len(self.channels), math.nan)
+        for i, channel in enumerate(self.channels):
+            try:
+                vector[i] = data[channel]
+            except (KeyError, TypeError, ValueError):
+                pass
+        for stage in self.stages:
+            stage.process(vector)
+        filtered = dict(data)
+        for channel, value in zip(self.channels, vector.tolist()):
+            if channel in filtered and not math.isnan(value):
+                filtered[channel] = value
+        return filtered
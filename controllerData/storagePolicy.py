@@ -0,0 +1,180 @@
+"""
+Storage policies, which decide which values are written to the database.
+
+classes
+-------
+Policy
+    Base class of the policies of one channel.
+All
+    Store every value.
+Every : n
+    Store every nth value.
+Aggregate : function, interval
+    Store the mean, minimum, or maximum of the values of an interval.
+Change : deadband, interval
+    Store a value only if it changed more than the deadband.
+Decimator : policy, n, interval, deadband
+    Apply the policies of all channels to a data dictionary.
+
+functions
+---------
+createPolicy : policy, n, interval, deadband
+    Create a policy instance by its name.
+
+The policy names are 'all', 'every', 'mean', 'min', 'max', and 'change'. The 'change' policy
+stores a value only if it changed more than `deadband` and all of them every `interval`.
+"""
+
+import math
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from .changeDetector import ChangeDetector
+
+POLICIES = ('all', 'every', 'mean', 'min', 'max', 'change')
+
+
+class Policy:
+    """Decide whether the values of a channel are stored."""
+
+    def add(self, value: Any, timestamp: float) -> tuple[bool, Any]:
+        """Add a `value` and return whether to store and what to store."""
+        raise NotImplementedError
+
+
+class All(Policy):
+    """Store every value."""
+
+    def add(self, value: Any, timestamp: float) -> tuple[bool, Any]:
+        return True, value
+
+
+class Every(Policy):
+    """Store the first and then every `n`th value."""
+
+    def __init__(self, n: int = 1) -> None:
+        self.n = max(int(n), 1)
+        self.count = 0
+
+    def add(self, value: Any, timestamp: float) -> tuple[bool, Any]:
+        store = self.count % self.n == 0
+        self.count += 1
+        return store, value
+
+
+class Aggregate(Policy):
+    """Store the aggregate of the values of each `interval` (in s) at its end.
+
+    NaN values are ignored. If a value is not a number, the last value is stored instead.
+
+    :param function: Aggregating function of a numpy array, for example `np.mean`.
+    """
+
+    def __init__(self, function: Callable[[np.ndarray], Any], interval: float = 60) -> None:
+        self.function = function
+        self.interval = interval
+        self.values: list[Any] = []
+        self.start: Optional[float] = None
+
+    def add(self, value: Any, timestamp: float) -> tuple[bool, Any]:
+        if self.start is None:
+            self.start = timestamp
+        self.values.append(value)
+        if timestamp - self.start < self.interval:
+            return False, None
+        values, self.values = self.values, []
+        self.start = timestamp
+        try:
+            array = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            return True, values[-1]
+        array = array[~np.isnan(array)]
+        return True, float(self.function(array)) if array.size else math.nan
+
+
+class Change(Policy):
+    """Store a value if it changed more than `deadband` and every `interval` (in s)."""
+
+    def __init__(self, deadband: float = 0, interval: float = 60) -> None:
+        self.detector = ChangeDetector(deadband=deadband, keyframe_interval=interval)
+
+    def add(self, value: Any, timestamp: float) -> tuple[bool, Any]:
+        return bool(self.detector.filter({'value': value}, timestamp)), value
+
+
+def createPolicy(policy: str = 'all', n: int = 1, interval: float = 60,
+                 deadband: float = 0) -> Policy:
+    """Create a policy by its name."""
+    if policy == 'all':
+        return All()
+    elif policy == 'every':
+        return Every(n)
+    elif policy == 'mean':
+        return Aggregate(np.mean, interval)
+    elif policy == 'min':
+        return Aggregate(np.min, interval)
+    elif policy == 'max':
+        return Aggregate(np.max, interval)
+    elif policy == 'change':
+        return Change(deadband, interval)
+    raise ValueError(f"Unknown storage policy '{policy}'.")
+
+
+class Decimator:
+    """Apply the storage policies of all channels.
+
+    The parameters are the defaults of all channels.
+
+    :param policy: Name of the policy.
+    :param n: Store every `n`th value for 'every'.
+    :param interval: Interval in s for the aggregating policies and the keyframes of 'change'.
+    :param deadband: Deadband for 'change'.
+    """
+
+    def __init__(self, policy: str = 'all', n: int = 1, interval: float = 60,
+                 deadband: float = 0) -> None:
+        self.defaults: dict[str, Any] = {}
+        self.parameters: dict[str, dict[str, Any]] = {}  # of specific channels
+        self.policies: dict[str, Policy] = {}  # policy instances of the channels
+        self.statistics = {'received': 0, 'stored': 0}
+        self.setDefaults(policy=policy, n=n, interval=interval, deadband=deadband)
+
+    def setDefaults(self, policy: str = 'all', n: int = 1, interval: float = 60,
+                    deadband: float = 0) -> None:
+        """Set the default parameters and restart all policies."""
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown storage policy '{policy}'.")
+        self.defaults = {'policy': policy, 'n': n, 'interval': interval, 'deadband': deadband}
+        self.policies.clear()
+
+    def configure(self, name: str, **parameters) -> None:
+        """Set the parameters of channel `name`, without parameters reset to the defaults."""
+        policy = parameters.get('policy')
+        if policy is not None and policy not in POLICIES:
+            raise ValueError(f"Unknown storage policy '{policy}'.")
+        parameters = {key: value for key, value in parameters.items() if value is not None}
+        if parameters:
+            self.parameters[name] = parameters
+        else:
+            self.parameters.pop(name, None)
+        self.policies.pop(name, None)
+
+    def getParameters(self, name: str) -> dict[str, Any]:
+        """Get the parameters of channel `name`."""
+        return {**self.defaults, **self.parameters.get(name, {})}
+
+    def process(self, data: dict[str, Any], timestamp: float) -> dict[str, Any]:
+        """Return the values of `data`, which are to be stored."""
+        result = {}
+        for name, value in data.items():
+            try:
+                policy = self.policies[name]
+            except KeyError:
+                policy = self.policies[name] = createPolicy(**self.getParameters(name))
+            store, stored = policy.add(value, timestamp)
+            if store:
+                result[name] = stored
+        self.statistics['received'] += len(data)
+        self.statistics['stored'] += len(result)
+        return result
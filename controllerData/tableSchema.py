@@ -0,0 +1,153 @@
+"""
+Handling of data keys, which are not (yet) columns of the database table.
+
+classes
+-------
+TableSchema : mode, overflow_column, retry_interval
+    Cache the columns of the table and adjust the data to them.
+
+The modes for unknown keys are:
+
+- 'drop': Drop them, with one warning per key.
+- 'add': Add nullable columns to the table.
+- 'overflow': Store them as JSON in the overflow column.
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from typing import Any, Optional
+
+log = logging.getLogger("TemperatureController")
+
+MODES = ('drop', 'add', 'overflow')
+IDENTIFIER = re.compile(r"^[A-Za-z_]\w*$")
+
+
+def columnType(value: Any) -> str:
+    """Return the SQL column type for `value`."""
+    if isinstance(value, bool):
+        return "boolean"
+    elif isinstance(value, (int, float)):
+        return "double precision"
+    return "text"
+
+
+class TableSchema:
+    """Cache the columns of the database tables and adjust the data to them.
+
+    If the columns cannot be read, all keys are inserted as before.
+
+    :param mode: What to do with unknown keys, see :data:`MODES`.
+    :param overflow_column: Name of the JSON column for the 'overflow' mode.
+    :param retry_interval: Time in s after which to read the columns again after a failure.
+    """
+
+    def __init__(self, mode: str = 'drop', overflow_column: str = "overflow",
+                 retry_interval: float = 600) -> None:
+        self.mode = mode
+        self.overflow_column = overflow_column
+        self.retry_interval = retry_interval
+        self.columns: dict[str, Optional[set[str]]] = {}  # table: columns (lower case)
+        self.failed: dict[str, float] = {}  # table: time of the failed lookup
+        self.dropped: set[tuple[str, str]] = set()  # warned about (table, key)
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @mode.setter
+    def mode(self, value: str) -> None:
+        if value not in MODES:
+            raise ValueError(f"Unknown schema mode '{value}'.")
+        self._mode = value
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Forget the cached columns of `table` or of all tables."""
+        if table is None:
+            self.columns.clear()
+            self.failed.clear()
+        else:
+            self.columns.pop(table, None)
+            self.failed.pop(table, None)
+
+    def load(self, database, table: str) -> Optional[set[str]]:
+        """Read the columns of `table` from the database, None if that fails."""
+        schema, _, name = table.rpartition(".")
+        query = ("SELECT column_name FROM information_schema.columns WHERE table_name = %s AND "
+                 + ("table_schema = %s" if schema
+                    else "table_schema = ANY(current_schemas(false))"))
+        try:
+            with database.cursor() as cursor:
+                cursor.execute(query, (name.lower(), schema.lower()) if schema else
+                               (name.lower(),))
+                columns = {row[0].lower() for row in cursor.fetchall()}
+        except Exception as exc:
+            database.rollback()
+            log.warning(f"Reading the columns of '{table}' failed, inserting all keys: {exc}")
+            return None
+        if not columns:
+            log.warning(f"Table '{table}' has no columns or does not exist.")
+            return None
+        return columns
+
+    def getColumns(self, database, table: str) -> Optional[set[str]]:
+        """Get the cached columns of `table`, reading them if necessary."""
+        try:
+            columns = self.columns[table]
+        except KeyError:
+            pass
+        else:
+            if (columns is not None
+                    or time.monotonic() - self.failed.get(table, 0) < self.retry_interval):
+                return columns
+        columns = self.columns[table] = self.load(database, table)
+        if columns is None:
+            self.failed[table] = time.monotonic()
+        return columns
+
+    def _addColumns(self, database, table: str, columns: dict[str, str]) -> set[str]:
+        """Add the `columns` (name: type) to the table and return the added ones."""
+        added = set()
+        with database.cursor() as cursor:
+            for name, typ in columns.items():
+                try:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {typ}")
+                    database.commit()
+                except Exception as exc:
+                    database.rollback()
+                    log.error(f"Adding column '{name}' to '{table}' failed: {exc}")
+                else:
+                    log.info(f"Added column '{name}' ({typ}) to table '{table}'.")
+                    added.add(name.lower())
+        return added
+
+    def adjust(self, database, table: str, data: dict[str, Any]) -> dict[str, Any]:
+        """Return the data adjusted to the columns of `table` according to the mode."""
+        columns = self.getColumns(database, table)
+        if columns is None:
+            return data  # Unknown columns, try to insert everything.
+        unknown = [key for key in data if key.lower() not in columns]
+        if not unknown:
+            return data
+        if self.mode == 'add':
+            new = {key: columnType(data[key]) for key in unknown if IDENTIFIER.match(key)}
+            columns |= self._addColumns(database, table, new)
+            unknown = [key for key in unknown if key.lower() not in columns]
+        elif self.mode == 'overflow':
+            column = self.overflow_column.lower()
+            if column not in columns:
+                columns |= self._addColumns(database, table, {column: "jsonb"})
+            if column in columns:
+                adjusted = {key: value for key, value in data.items() if key not in unknown}
+                adjusted[column] = json.dumps(
+                    {key: None if isinstance(data[key], float) and math.isnan(data[key])
+                     else data[key] for key in unknown}, default=str)
+                return adjusted
+        for key in unknown:
+            if (table, key) not in self.dropped:
+                self.dropped.add((table, key))
+                log.warning(f"Key '{key}' is not a column of table '{table}', it is not stored.")
+        return {key: value for key, value in data.items() if key not in unknown}
@@ -0,0 +1,142 @@
+"""
+Supervision of the tinkerforge connection.
+
+classes
+-------
+Supervisor : inputOutput, host, port
+    Keep the connection to the brick daemon alive and restore lost devices.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+try:
+    from tinkerforge.ip_connection import IPConnection
+except ModuleNotFoundError:
+    IPConnection = None
+
+log = logging.getLogger("TemperatureController")
+
+
+class Supervisor:
+    """Supervise the tinkerforge connection of `inputOutput` in a background thread.
+
+    The supervisor connects to the brick daemon, retrying with exponential backoff, and
+    enumerates the devices after each (re)connection.
+    If a device is lost (for example due to a timeout) or the connection is lost, the devices
+    are enumerated again, with increasing delays, until all of them have announced themselves
+    again.
+    None of this blocks the control loop.
+
+    :param inputOutput: InputOutput instance with `tfCon` and `tfMap` attributes.
+    :param host: Host name of the brick daemon.
+    :param port: Port of the brick daemon.
+    :param min_delay: Initial delay in s between retries.
+    :param max_delay: Maximum delay in s between retries.
+    """
+
+    def __init__(self, inputOutput, host: str = "localhost", port: int = 4223,
+                 min_delay: float = 1, max_delay: float = 60) -> None:
+        self.inputOutput = inputOutput
+        self.address = host, port
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+        self.missing: set[str] = set()  # names of lost mappings, not yet announced again
+        self._lock = threading.Lock()  # for `missing`, changed by several threads
+        self._enumerate = threading.Event()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        connection = inputOutput.tfCon
+        connection.register_callback(IPConnection.CALLBACK_CONNECTED, self.connected)
+        connection.register_callback(IPConnection.CALLBACK_DISCONNECTED, self.disconnected)
+
+    def start(self) -> None:
+        """Start the supervision thread."""
+        self._stop.clear()
+        self.thread = threading.Thread(target=self.run, name="TinkerforgeSupervisor",
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the supervision thread."""
+        self._stop.set()
+        self._wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    # Callbacks, called in the tinkerforge callback thread or in the control loop.
+    def connected(self, reason: int) -> None:
+        """Handle a (re)established connection."""
+        if reason == IPConnection.CONNECT_REASON_AUTO_RECONNECT:
+            log.info("Tinkerforge connection reestablished.")
+        self.delay = self.min_delay
+        self.request_enumeration()
+
+    def disconnected(self, reason: int) -> None:
+        """Handle a lost connection."""
+        if reason == IPConnection.DISCONNECT_REASON_REQUEST:
+            return
+        log.warning(f"Tinkerforge connection lost (reason {reason}).")
+        with self._lock:
+            # The mapping remains, but is valid only after the device announced itself again.
+            self.missing.update(self.inputOutput.tfMap.keys())
+        self._wakeup.set()
+
+    def device_lost(self, name: str) -> None:
+        """Register that the device mapped to `name` has been lost."""
+        log.warning(f"Tinkerforge device '{name}' lost, trying to recover it.")
+        with self._lock:
+            self.missing.add(name)
+        self.request_enumeration()
+
+    def announced(self, name: str) -> None:
+        """Register that the device mapped to `name` announced itself (again)."""
+        with self._lock:
+            self.missing.discard(name)
+
+    def request_enumeration(self) -> None:
+        """Enumerate the devices as soon as possible."""
+        self._enumerate.set()
+        self._wakeup.set()
+
+    # Thread
+    def run(self) -> None:
+        """Supervise the connection until stopped."""
+        connection = self.inputOutput.tfCon
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            timeout = None
+            try:
+                state = connection.get_connection_state()
+                if state == IPConnection.CONNECTION_STATE_DISCONNECTED:
+                    connection.connect(*self.address)  # emits the connected callback
+                    self.delay = self.min_delay
+                    continue
+                elif state == IPConnection.CONNECTION_STATE_CONNECTED:
+                    timeout = self.check_devices(connection)
+            except Exception as exc:
+                log.warning(f"Tinkerforge connection failed: {exc}")
+                timeout = self.next_delay()
+            self._wakeup.wait(timeout)
+
+    def check_devices(self, connection) -> Optional[float]:
+        """Enumerate if requested and return the time until the next check."""
+        if self._enumerate.is_set():
+            self._enumerate.clear()
+            connection.enumerate()
+            return self.min_delay if self.missing else None
+        if self.missing:
+            # Still missing after the enumeration, retry later.
+            self._enumerate.set()
+            return self.next_delay()
+        self.delay = self.min_delay
+        return None
+
+    def next_delay(self) -> float:
+        """Return the current delay and increase it for the next time."""
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.max_delay)
+        return delay
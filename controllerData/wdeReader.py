@@ -0,0 +1,140 @@
+"""
+Background reader for the ELV USB-WDE weather sensor receiver.
+
+classes
+-------
+WDEReader : resource, channels, max_age
+    Read the telegrams continuously and cache the latest values.
+
+functions
+---------
+parseTelegram : line, channels
+    Parse a telegram into a dictionary.
+
+A telegram looks like `$1;1;;T1;...;T8;H1;...;H8;Tk;Hk;wind;rain;...;0` with a decimal comma.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+log = logging.getLogger("TemperatureController")
+
+VI_ERROR_TMO = -1073807339  # error code of a pyvisa timeout
+MAX_BACKOFF = 60  # longest pause in s before reopening the resource after an error
+
+# Default channels: name: field index in the telegram
+CHANNELS = {
+    'experiment': 3,  # temperature of sensor 1
+    'outside': 7,  # temperature of sensor 5
+    'humidityout': 15,  # humidity of sensor 5
+}
+
+
+def parseTelegram(line: str, channels: dict[str, int] = CHANNELS) -> dict[str, float]:
+    """Parse the telegram `line` and return the values of the `channels` present."""
+    raw = line.strip().replace(',', '.').split(';')
+    if len(raw) < 3 or not raw[0].startswith('$1'):
+        raise ValueError(f"Invalid telegram '{line}'.")
+    data = {}
+    for name, index in channels.items():
+        try:
+            field = raw[index]
+        except IndexError:
+            continue
+        if field:
+            data[name] = float(field)
+    return data
+
+
+class WDEReader:
+    """Read the WDE telegrams in a background thread and keep the latest values.
+
+    :param resource: Opened pyvisa resource of the receiver.
+    :param channels: Dictionary of the channel names and their field index.
+    :param max_age: Values older than that (in s) are stale. The WDE sends every 3 minutes.
+    """
+
+    def __init__(self, resource, channels: dict[str, int] = CHANNELS, max_age: float = 600
+                 ) -> None:
+        self.resource = resource
+        self.channels = channels
+        self.max_age = max_age
+        self.values: dict[str, tuple[float, float]] = {}  # name: (value, timestamp)
+        self.last_telegram: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="WDEReader", daemon=True)
+
+    def start(self) -> None:
+        """Start reading in the background."""
+        self.thread.start()
+
+    def close(self) -> None:
+        """Stop reading and close the resource."""
+        self._stop.set()
+        if self.thread.is_alive():
+            self.thread.join(self.resource.timeout / 1000 + 1)
+        self.resource.close()
+
+    @staticmethod
+    def is_timeout(exc: Exception) -> bool:
+        """Whether `exc` is a read timeout."""
+        return isinstance(exc, TimeoutError) or getattr(exc, 'error_code', None) == VI_ERROR_TMO
+
+    def run(self) -> None:
+        """Read telegrams until stopped, reopen the resource after errors."""
+        backoff = 1.
+        while not self._stop.is_set():
+            try:
+                line = self.resource.read()  # blocks until a telegram or a timeout
+            except Exception as exc:
+                if self.is_timeout(exc):
+                    continue  # No telegram yet, try again.
+                log.warning(f"WDE: reading failed, reopening in {backoff:.0f} s: {exc}")
+                if self._stop.wait(backoff):
+                    break
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                self.reopen()
+                continue
+            backoff = 1.
+            self.handle_telegram(line)
+
+    def reopen(self) -> None:
+        """Close and open the resource again."""
+        try:
+            self.resource.close()
+            self.resource.open()
+        except Exception as exc:
+            log.warning(f"WDE: reopening failed: {exc}")
+
+    def handle_telegram(self, line: str, timestamp: Optional[float] = None) -> None:
+        """Store the values of the telegram `line`."""
+        try:
+            data = parseTelegram(line, self.channels)
+        except ValueError as exc:
+            log.debug(f"WDE: {exc}")
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self.last_telegram = timestamp
+            for name, value in data.items():
+                self.values[name] = value, timestamp
+
+    @property
+    def stale(self) -> bool:
+        """Whether no telegram arrived within `max_age`."""
+        return self.last_telegram is None or time.time() - self.last_telegram > self.max_age
+
+    def get_data(self) -> dict[str, float]:
+        """Return the latest values, which are not stale."""
+        limit = time.time() - self.max_age
+        with self._lock:
+            return {name: value for name, (value, timestamp) in self.values.items()
+                    if timestamp >= limit}
+
+    def get_timestamps(self) -> dict[str, float]:
+        """Return the time of the latest value of each channel."""
+        with self._lock:
+            return {name: timestamp for name, (_, timestamp) in self.values.items()}
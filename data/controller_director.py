@@ -1,12 +1,44 @@
 
-from typing import Any, List, Optional, Union
+import json
+from typing import Any, List, Optional, Sequence, Union
 
+from pyleco.core.message import MessageTypes
 from pyleco.directors.director import Director
 
 
 class ControllerDirector(Director):
     """Direct a temperature controller."""
 
+    def ask_rpc_batch(self, calls: Sequence[tuple[str, dict[str, Any]]]) -> list[Any]:
+        """Call several methods in one message exchange and return their results in order.
+
+        :param calls: Method names and their keyword arguments.
+        :raises: The error of the first failed call.
+        """
+        if not calls:
+            return []
+        batch = [self.generator.build_json_str(method=method, id=i, params=params or None)
+                 for i, (method, params) in enumerate(calls, start=1)]
+        response = self.ask_message(data=f"[{','.join(batch)}]", message_type=MessageTypes.JSON)
+        responses = json.loads(response.payload[0])
+        if isinstance(responses, dict):
+            # The whole batch failed, for example due to an invalid request.
+            return [self.generator.get_result_from_response(responses)]
+        by_id = {item.get("id"): item for item in responses}
+        return [self.generator.get_result_from_response(by_id.get(i, {}))
+                for i in range(1, len(calls) + 1)]
+
+    def get_panel_data(self, pid: Union[int, str] = 0) -> dict[str, Any]:
+        """Get the general settings, and the settings and state of `pid` in one exchange."""
+        settings, state, interval, table = self.ask_rpc_batch([
+            ("get_PID_settings", {"pid": pid}),
+            ("get_current_PID_state", {"pid": pid}),
+            ("get_readout_interval", {}),
+            ("get_database_table", {}),
+        ])
+        return {"settings": settings, "state": state, "readout_interval": interval,
+                "database_table": table}
+
     def get_current_data(self) -> dict[str, float]:
         """Get current sensor and output data."""
         return self.ask_rpc("get_current_data")
@@ -20,10 +52,69 @@ class ControllerDirector(Director):
     def send_sensor_command(self, command: str) -> Any:
         return self.ask_rpc("sendSensorCommand", command=command)
 
+    def get_rpc_statistics(self) -> dict[str, int]:
+        """Get the number of inline and pooled requests, of timeouts, and of busy methods."""
+        return self.ask_rpc("get_rpc_statistics")
+
+    def get_driver_statistics(self) -> dict[str, dict[str, float]]:
+        """Get the number of reads, errors, and the read duration of each sensor driver."""
+        return self.ask_rpc("get_driver_statistics")
+
     def set_output(self, name: str, value: float) -> None:
         """Set an output to a specific value."""
         return self.ask_rpc("setOutput", name=name, value=value)
 
+    def set_output_parameters(self, name: Optional[str] = None,
+                              deadband: Optional[float] = None,
+                              min_interval: Optional[float] = None,
+                              max_slew: Optional[float] = None) -> None:
+        """Set the write parameters of output `name` or the defaults of all outputs."""
+        self.ask_rpc("set_output_parameters", name=name, deadband=deadband,
+                     min_interval=min_interval, max_slew=max_slew)
+
+    def get_output_statistics(self) -> dict[str, dict[str, int]]:
+        """Get the number of written and suppressed writes for each output."""
+        return self.ask_rpc("get_output_statistics")
+
+    def set_storage_policy(self, name: Optional[str] = None,
+                           policy: Optional[str] = None,
+                           n: Optional[int] = None,
+                           interval: Optional[float] = None,
+                           deadband: Optional[float] = None) -> None:
+        """Set the storage policy of channel `name` or the default of all channels."""
+        self.ask_rpc("set_storage_policy", name=name, policy=policy, n=n, interval=interval,
+                     deadband=deadband)
+
+    def set_filter(self, name: str, pipeline: str = "") -> None:
+        """Set the filter pipeline of channel `name`, for example "median:5, ema:0.3"."""
+        self.ask_rpc("set_filter", name=name, pipeline=pipeline)
+
+    def set_alarm(self, name: str, kind: Optional[str] = None, channel: str = "",
+                  limit: float = 0, hysteresis: float = 0, delay: float = 0) -> None:
+        """Set the alarm rule `name` or remove it, if `kind` is None."""
+        self.ask_rpc("set_alarm", name=name, kind=kind, channel=channel, limit=limit,
+                     hysteresis=hysteresis, delay=delay)
+
+    def get_alarms(self) -> dict[str, dict[str, Any]]:
+        """Get the active alarms."""
+        return self.ask_rpc("get_alarms")
+
+    def get_storage_statistics(self) -> dict[str, int]:
+        """Get the number of received and stored values."""
+        return self.ask_rpc("get_storage_statistics")
+
+    def set_publisher_parameters(self, name: Optional[str] = None,
+                                 deadband: Optional[float] = None,
+                                 keyframe_interval: Optional[float] = None,
+                                 change_only: Optional[bool] = None) -> None:
+        """Set the publishing parameters of channel `name` or of all channels."""
+        self.ask_rpc("set_publisher_parameters", name=name, deadband=deadband,
+                     keyframe_interval=keyframe_interval, change_only=change_only)
+
+    def get_publisher_statistics(self) -> dict[str, int]:
+        """Get the number of published and suppressed values, and of keyframes."""
+        return self.ask_rpc("get_publisher_statistics")
+
     def set_PID_settings(self,
                          name: str,
                          lower_limit: Optional[float] = None,
@@ -51,9 +142,17 @@ class ControllerDirector(Director):
             last_output=last_output,
             state=state,
             sensors=sensors,
-            output=output_channel,
+            output_channel=output_channel,
         )
 
+    def set_PIDs_configuration(self, configuration: dict[str, dict[str, Any]]) -> None:
+        """Validate and apply the configuration of several PIDs at once.
+
+        :param configuration: PID names and their values, keys as in the settings, for example
+            `{"0": {"setpoint": 20, "Kp": 3}, "1": {"sensors": ["a", "b"]}}`.
+        """
+        self.ask_rpc("set_PIDs_configuration", configuration=configuration)
+
     def get_PID_settings(self, pid: Union[int, str] = 0) -> dict[str, Any]:
         return self.ask_rpc("get_PID_settings", pid=pid)
 
@@ -63,18 +162,71 @@ class ControllerDirector(Director):
     def get_current_PID_state(self, pid: Union[int, str] = 0) -> tuple[float, float, float]:
         return self.ask_rpc("get_current_PID_state", pid=pid)
 
-    def set_readout_interval(self, interval: float) -> None:
-        self.ask_rpc("set_readout_interval", interval=interval)
+    def get_full_state(self) -> dict[str, Any]:
+        """Get the settings, components and output of all PIDs, and the current data."""
+        return self.ask_rpc("get_full_state")
+
+    def start_autotune(self, pid: Union[int, str], amplitude: float,
+                       bias: Optional[float] = None, hysteresis: float = 0.1, cycles: int = 3,
+                       timeout: float = 3 * 3600) -> None:
+        """Start a relay test of `pid`, negative `amplitude` for reverse acting loops."""
+        self.ask_rpc("start_autotune", pid=pid, amplitude=amplitude, bias=bias,
+                     hysteresis=hysteresis, cycles=cycles, timeout=timeout)
+
+    def stop_autotune(self, pid: Union[int, str]) -> None:
+        self.ask_rpc("stop_autotune", pid=pid)
+
+    def get_autotune_result(self, pid: Union[int, str], rule: str = 'classic',
+                            apply: bool = False) -> dict[str, Any]:
+        """Get the state of the autotuning and, if done, the suggested gains."""
+        return self.ask_rpc("get_autotune_result", pid=pid, rule=rule, apply=apply)
+
+    def set_setpoint_schedule(self, pid: Union[int, str],
+                              points: Optional[list[tuple[Union[str, float], float]]] = None,
+                              ramp: bool = False, period: Optional[str] = None) -> None:
+        """Set the setpoint schedule of `pid` as a list of times and setpoints or remove it.
+
+        The times are "HH:MM" for `period` 'daily', "Mon HH:MM" for 'weekly' or s from now.
+        """
+        self.ask_rpc("set_setpoint_schedule", pid=pid, points=points, ramp=ramp, period=period)
+
+    def start_setpoint_ramp(self, pid: Union[int, str], target: float, rate: float) -> None:
+        """Ramp the setpoint of `pid` to `target` with `rate` per minute."""
+        self.ask_rpc("start_setpoint_ramp", pid=pid, target=target, rate=rate)
+
+    def get_setpoint_schedule(self, pid: Union[int, str]) -> Optional[dict[str, Any]]:
+        return self.ask_rpc("get_setpoint_schedule", pid=pid)
+
+    def get_sensor_health(self) -> dict[str, dict[str, Any]]:
+        """Get the validity, the time since the last change and the invalid readings of each
+        sensor used by the PIDs."""
+        return self.ask_rpc("get_sensor_health")
+
+    def set_readout_interval(self, interval: Optional[float] = None,
+                             minimum: Optional[float] = None,
+                             maximum: Optional[float] = None,
+                             adaptive: Optional[bool] = None) -> None:
+        """Set the fixed readout interval, or the bounds of the adaptive one, in s."""
+        self.ask_rpc("set_readout_interval", interval=interval, minimum=minimum, maximum=maximum,
+                     adaptive=adaptive)
 
     def get_readout_interval(self) -> float:
         return self.ask_rpc("get_readout_interval")
 
+    def get_effective_readout_interval(self) -> float:
+        """Get the current readout interval in s, which differs from the fixed one if adaptive."""
+        return self.ask_rpc("get_effective_readout_interval")
+
     def set_database_table(self, table_name: str) -> None:
         self.ask_rpc("set_database_table", table_name=table_name)
 
     def get_database_table(self) -> str:
         return self.ask_rpc("get_database_table")
 
+    def set_database_schema_mode(self, mode: str, overflow_column: Optional[str] = None) -> None:
+        """Set whether to 'drop', 'add' or 'overflow' keys, which are not columns of the table."""
+        self.ask_rpc("set_database_schema_mode", mode=mode, overflow_column=overflow_column)
+
     def shut_down_actor(self, actor: Union[bytes, str, None] = None) -> None:
         try:
             return super().shut_down_actor(actor)
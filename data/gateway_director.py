@@ -0,0 +1,32 @@
+
+from typing import Any
+
+from pyleco.directors.director import Director
+
+
+class GatewayDirector(Director):
+    """Direct a gateway of many temperature controllers."""
+
+    def get_current_data(self) -> dict[str, Any]:
+        """Get the latest data of all nodes with the keys prefixed by the node name."""
+        return self.ask_rpc("get_current_data")
+
+    def get_snapshots(self) -> dict[str, dict[str, Any]]:
+        """Get the latest data of each node."""
+        return self.ask_rpc("get_snapshots")
+
+    def get_nodes(self) -> dict[str, dict[str, Any]]:
+        """Get the state of each node."""
+        return self.ask_rpc("get_nodes")
+
+    def get_values(self, keys: list[str]) -> dict[str, Any]:
+        """Get the values of the keys 'node/key' from the nodes."""
+        return self.ask_rpc("get_values", keys=keys)
+
+    def set_values(self, data: dict[str, Any]) -> None:
+        """Set the values of the keys 'node/key' at the nodes."""
+        self.ask_rpc("set_values", data=data)
+
+    def execute(self, device: str, command: str) -> Any:
+        """Execute `command` at the `device` 'node/device name', for example 'room1/pid0'."""
+        return self.ask_rpc("execute", device=device, command=command)
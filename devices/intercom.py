@@ -193,6 +193,11 @@ class Publisher:
         for key, value in data.items():
             self.socket.send_multipart((key.encode(), pickle.dumps(value)))
 
+    def send_snapshot(self, data, topic="snapshot"):
+        """Send the dictionary `data` as a whole in one message with `topic`."""
+        assert isinstance(data, dict), "Data has to be a dictionary."
+        self.socket.send_multipart((topic.encode(), pickle.dumps(data)))
+
     def send_quantities(self, data):
         """Send the dictionay `data` containing Quantities."""
         assert isinstance(data, dict), "Data has to be a dictionary."
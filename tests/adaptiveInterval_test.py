@@ -0,0 +1,62 @@
+"""
+Test for the adaptiveInterval.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData.adaptiveInterval import AdaptiveInterval
+
+
+@pytest.fixture
+def adaptive():
+    adaptive = AdaptiveInterval(minimum=1, maximum=4, tolerance=0.1, stability=0.01, factor=2)
+    adaptive.update([0], {'a': 20}, 0)  # history
+    return adaptive
+
+
+def test_first_call_not_stable():
+    assert AdaptiveInterval(minimum=1, maximum=4, factor=2).update([0], {'a': 20}, 0) == 1
+
+
+def test_stretch(adaptive):
+    assert adaptive.update([0.05], {'a': 20}, 1) == 2
+    assert adaptive.update([0.05], {'a': 20}, 3) == 4
+    assert adaptive.update([0.05], {'a': 20}, 7) == 4  # maximum
+
+
+def test_large_error(adaptive):
+    adaptive.update([0], {'a': 20}, 1)
+    assert adaptive.update([0.5], {'a': 20}, 3) == 1
+
+
+def test_nan_error(adaptive):
+    assert adaptive.update([math.nan], {'a': 20}, 1) == 1
+
+
+def test_unstable_sensor(adaptive):
+    assert adaptive.update([0], {'a': 20.5}, 1) == 1
+
+
+def test_slow_change_is_stable(adaptive):
+    assert adaptive.update([0], {'a': 20.005}, 1) == 2
+
+
+def test_tighten(adaptive):
+    adaptive.update([0], {'a': 20}, 1)
+    assert adaptive.tighten() == 1
+    assert adaptive.interval == 1
+
+
+def test_configure_keeps_bounds(adaptive):
+    adaptive.update([0], {'a': 20}, 1)
+    adaptive.update([0], {'a': 20}, 3)
+    adaptive.configure(minimum=1, maximum=3)
+    assert adaptive.interval == 3
+
+
+@pytest.mark.parametrize("minimum, maximum", ((0, 5), (5, 4)))
+def test_invalid_bounds(minimum, maximum):
+    with pytest.raises(ValueError):
+        AdaptiveInterval(minimum=minimum, maximum=maximum)
@@ -0,0 +1,97 @@
+"""
+Test for the alarms.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData import alarms
+
+
+class Test_validateRule:
+    def test_defaults(self):
+        assert alarms.validateRule('a', {'kind': 'high', 'channel': 'x'}) == {
+            'kind': 'high', 'channel': 'x', 'limit': 0, 'hysteresis': 0, 'delay': 0}
+
+    @pytest.mark.parametrize("rule", ({'kind': 'huge', 'channel': 'x'}, {'kind': 'high'},
+                                      {'kind': 'low', 'channel': 'x', 'limit': "a"},
+                                      {'kind': 'low', 'channel': 'x', 'delay': -1}))
+    def test_invalid(self, rule):
+        with pytest.raises(ValueError):
+            alarms.validateRule('a', rule)
+
+    def test_database_without_channel(self):
+        assert alarms.validateRule('a', {'kind': 'database', 'limit': 60})['channel'] == ""
+
+
+class Test_AlarmEngine:
+    @pytest.fixture
+    def engine(self):
+        # 'S' changes in the tests of the other alarms, such that 'stuck' remains inactive.
+        return alarms.AlarmEngine({
+            'hot': {'kind': 'high', 'channel': 'T', 'limit': 30, 'hysteresis': 1},
+            'cold': {'kind': 'low', 'channel': 'T', 'limit': 10, 'delay': 5},
+            'fast': {'kind': 'rate', 'channel': 'T', 'limit': 1},
+            'stuck': {'kind': 'stale', 'channel': 'S', 'limit': 10},
+            'saturated': {'kind': 'saturation', 'channel': '0', 'limit': 0.5},
+            'database': {'kind': 'database', 'limit': 60},
+        })
+
+    def names(self, events):
+        return {event['name']: event['active'] for event in events}
+
+    def test_calm(self, engine):
+        assert engine.evaluate({'T': 20, 'S': 1}, 0) == []
+
+    def test_high_hysteresis(self, engine):
+        engine.evaluate({'T': 29.5, 'S': 0}, 0)
+        events = engine.evaluate({'T': 31, 'S': 100}, 100)
+        assert self.names(events) == {'hot': True}
+        assert events[0]['value'] == 31 and events[0]['limit'] == 30
+        assert engine.evaluate({'T': 29.5, 'S': 200}, 200) == []  # within hysteresis
+        assert self.names(engine.evaluate({'T': 28.5, 'S': 300}, 300)) == {'hot': False}
+        assert engine.active == {}
+
+    def test_low_delay(self, engine):
+        engine.evaluate({'T': 20, 'S': 0}, 0)
+        assert engine.evaluate({'T': 9, 'S': 100}, 100) == []
+        assert self.names(engine.evaluate({'T': 9, 'S': 105}, 105)) == {'cold': True}
+        assert 'cold' in engine.active
+
+    def test_low_delay_interrupted(self, engine):
+        engine.evaluate({'T': 9, 'S': 100}, 100)
+        engine.evaluate({'T': 11, 'S': 103}, 103)
+        assert engine.evaluate({'T': 9, 'S': 106}, 106) == []
+
+    def test_rate(self, engine):
+        engine.evaluate({'T': 20, 'S': 0}, 0)
+        assert self.names(engine.evaluate({'T': 25, 'S': 1}, 1)) == {'fast': True}
+
+    def test_missing_holds(self, engine):
+        engine.evaluate({'T': 31, 'S': 0}, 0)
+        assert engine.evaluate({'T': math.nan, 'S': 100}, 100) == []
+        assert 'hot' in engine.active
+
+    def test_stale(self, engine):
+        engine.evaluate({'S': 1}, 0)
+        assert engine.evaluate({'S': 1}, 5) == []
+        assert self.names(engine.evaluate({'S': 1}, 11)) == {'stuck': True}
+        assert self.names(engine.evaluate({'S': 2}, 12)) == {'stuck': False}
+
+    def test_stale_missing(self, engine):
+        engine.evaluate({}, 0)
+        assert self.names(engine.evaluate({}, 11)) == {'stuck': True}
+
+    def test_saturation_and_database(self, engine):
+        events = engine.evaluate({alarms.saturationKey('0'): 1, alarms.DATABASE_AGE: 61,
+                                  'S': 0}, 0)
+        assert self.names(events) == {'saturated': True, 'database': True}
+
+    def test_reconfigure_keeps_active(self, engine):
+        engine.evaluate({'T': 31, 'S': 0}, 0)
+        rules = dict(engine.rules)
+        del rules['cold']
+        engine.configure(rules)
+        assert list(engine.active) == ['hot']
+        assert engine.evaluate({'T': 31, 'S': 1}, 1) == []
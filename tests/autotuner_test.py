@@ -0,0 +1,93 @@
+"""
+Test for the autotuner.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData import autotuner
+from controllerData.autotuner import RelayAutotuner
+
+
+def simulate(tuner, gain=2.0, time_constant=100.0, dead_time=10.0, start=20.0, dt=1.0,
+             steps=10000):
+    """Simulate a first order process with dead time, the output in the steady state is 0."""
+    value = start
+    delayed = [0.0] * int(dead_time / dt)
+    for i in range(steps):
+        output = tuner.step(value, i * dt)
+        delayed.append(output)
+        value += (start + gain * delayed.pop(0) - value) * dt / time_constant
+        if tuner.state != 'running':
+            break
+    return tuner
+
+
+def test_gains():
+    assert autotuner.gains(10, 100) == pytest.approx({'Kp': 6, 'Ki': 0.12, 'Kd': 75})
+
+
+def test_gains_P():
+    assert autotuner.gains(10, 100, 'P')['Ki'] == 0
+
+
+def test_gains_invalid_rule():
+    with pytest.raises(ValueError):
+        autotuner.gains(1, 1, "invalid")
+
+
+class Test_relay:
+    @pytest.fixture(scope="class")
+    def tuner(self):
+        return simulate(RelayAutotuner(setpoint=21, bias=0, amplitude=2, hysteresis=0.05))
+
+    def test_done(self, tuner):
+        assert tuner.state == 'done'
+
+    def test_ultimate_period(self, tuner):
+        # The relay oscillates with about 4 dead times for a dominant time constant.
+        assert 30 < tuner.result()['Tu'] < 60
+
+    def test_ultimate_gain(self, tuner):
+        result = tuner.result()
+        assert result['Ku'] == pytest.approx(4 * 2 / (math.pi * result['amplitude']))
+
+    def test_gains(self, tuner):
+        result = tuner.result()
+        assert result['Kp'] == pytest.approx(0.6 * result['Ku'])
+        assert result['Ki'] > 0 and result['Kd'] > 0
+
+    def test_outputs(self, tuner):
+        assert {output for _, _, output in tuner.history} == {-2, 2}
+
+
+def test_reverse_acting():
+    tuner = simulate(RelayAutotuner(setpoint=19, bias=0, amplitude=-2, hysteresis=0.05),
+                     gain=-2)
+    assert tuner.state == 'done'
+    assert tuner.result()['Kp'] < 0
+
+
+def test_output_limits():
+    tuner = RelayAutotuner(setpoint=21, bias=0, amplitude=2, output_limits=(-1, 10))
+    assert (tuner.low, tuner.high) == (-1, 2)
+
+
+def test_no_room():
+    with pytest.raises(ValueError):
+        RelayAutotuner(setpoint=21, bias=5, amplitude=2, output_limits=(5, 5))
+
+
+def test_timeout():
+    tuner = simulate(RelayAutotuner(setpoint=50, bias=0, amplitude=1, timeout=100))
+    assert tuner.state == 'failed'
+    with pytest.raises(ValueError):
+        tuner.result()
+
+
+def test_max_deviation():
+    tuner = RelayAutotuner(setpoint=21, bias=0, amplitude=1, max_deviation=2)
+    tuner.step(21, 0)
+    tuner.step(24, 1)
+    assert tuner.state == 'failed'
@@ -0,0 +1,75 @@
+"""
+Test for the changeDetector.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData.changeDetector import ChangeDetector
+
+
+@pytest.fixture
+def detector():
+    detector = ChangeDetector(deadband=0.5, keyframe_interval=10)
+    detector.filter({'a': 1, 'b': 2, 'text': "x"}, timestamp=0)  # keyframe
+    return detector
+
+
+def test_first_call_is_keyframe():
+    assert ChangeDetector().filter({'a': 1}, timestamp=0) == {'a': 1}
+
+
+def test_suppressed(detector):
+    assert detector.filter({'a': 1.4, 'b': 2}, timestamp=1) == {}
+    assert detector.statistics['suppressed'] == 2
+
+
+def test_changed(detector):
+    assert detector.filter({'a': 1.6, 'b': 2}, timestamp=1) == {'a': 1.6}
+
+
+def test_deadband_from_last_passed_value(detector):
+    detector.filter({'a': 1.3}, timestamp=1)
+    assert detector.filter({'a': 1.6}, timestamp=2) == {'a': 1.6}
+
+
+def test_channel_deadband(detector):
+    detector.configure('a', 0)
+    assert detector.filter({'a': 1.1, 'b': 2.1}, timestamp=1) == {'a': 1.1}
+
+
+def test_configure_default(detector):
+    detector.configure('a', 0)
+    detector.configure('a', None)
+    assert detector.deadbands == {}
+
+
+def test_new_channel(detector):
+    assert detector.filter({'c': 5}, timestamp=1) == {'c': 5}
+
+
+def test_non_numbers(detector):
+    assert detector.filter({'text': "x"}, timestamp=1) == {}
+    assert detector.filter({'text': "y"}, timestamp=2) == {'text': "y"}
+
+
+@pytest.mark.parametrize("old, new, changed", (
+    (math.nan, math.nan, False),
+    (1, math.nan, True),
+    (math.nan, 1, True),
+))
+def test_nan(old, new, changed):
+    detector = ChangeDetector(keyframe_interval=10)
+    detector.filter({'a': old}, timestamp=0)
+    assert bool(detector.filter({'a': new}, timestamp=1)) is changed
+
+
+def test_keyframe(detector):
+    assert detector.filter({'a': 1, 'b': 2}, timestamp=10) == {'a': 1, 'b': 2}
+    assert detector.statistics['keyframes'] == 2
+
+
+def test_reset(detector):
+    detector.reset()
+    assert detector.filter({'a': 1}, timestamp=1) == {'a': 1}
@@ -0,0 +1,109 @@
+"""
+Test for the checkpoint.py.
+"""
+
+import math
+
+import pytest
+from simple_pid import PID
+
+from controllerData import checkpoint
+
+
+@pytest.fixture
+def filename(tmp_path):
+    return str(tmp_path / "test.checkpoint")
+
+
+@pytest.fixture
+def cp(filename):
+    cp = checkpoint.Checkpoint(filename, slot_size=1024)
+    yield cp
+    cp.close()
+
+
+pids = {'0': (1., 2., 3., 4.), '1': (0., math.nan, math.nan, math.nan)}
+data = {'temperature': 22.5, 'pidOutput0': 3}
+
+
+def test_empty_file(cp):
+    assert cp.read() is None
+
+
+def test_write_read(cp):
+    assert cp.write(pids, data, timestamp=5)
+    timestamp, read_pids, read_data = cp.read()
+    assert timestamp == 5
+    assert read_pids['0'] == pids['0']
+    assert math.isnan(read_pids['1'][1])
+    assert read_data == data
+
+
+def test_skip_non_numbers(cp):
+    cp.write({}, {'a': 1, 'b': "text", 'c': None})
+    assert cp.read()[2] == {'a': 1}
+
+
+def test_alternating_slots(cp):
+    cp.write(pids, data, timestamp=1)
+    first = cp.slot
+    cp.write(pids, data, timestamp=2)
+    assert cp.slot != first
+    assert cp.read()[0] == 2
+
+
+def test_reopen(cp, filename):
+    cp.write(pids, data, timestamp=1)
+    cp.write(pids, {'x': 7}, timestamp=2)
+    cp.close()
+    cp2 = checkpoint.Checkpoint(filename, slot_size=1024)
+    timestamp, read_pids, read_data = cp2.read()
+    assert (timestamp, read_pids['0'], read_data) == (2, pids['0'], {'x': 7})
+    assert cp2.sequence == 2
+    cp2.close()
+
+
+def test_torn_write_uses_previous(cp):
+    cp.write(pids, data, timestamp=1)
+    cp.write(pids, {'x': 7}, timestamp=2)
+    # Corrupt the payload of the newest slot.
+    start = cp.slot * cp.slot_size + checkpoint.HEADER.size
+    cp.map[start] = (cp.map[start] + 1) % 256
+    assert cp.read()[0] == 1
+
+
+def test_too_large(cp, caplog):
+    assert not cp.write({}, {f"channel{i}": i for i in range(100)})
+    assert "too large" in caplog.text
+
+
+def test_wrong_size_is_reset(filename):
+    with open(filename, "wb") as file:
+        file.write(b"garbage")
+    cp = checkpoint.Checkpoint(filename, slot_size=1024)
+    assert cp.read() is None
+    cp.close()
+
+
+class Test_PIDState:
+    @pytest.fixture
+    def pid(self):
+        pid = PID(Kp=1, Ki=1, setpoint=10)
+        pid(5, dt=1)
+        return pid
+
+    def test_getPIDState(self, pid):
+        assert checkpoint.getPIDState(pid) == (5, 5, 10, 5)
+
+    def test_restore(self, pid):
+        new = PID(Kp=1, Ki=1, setpoint=10)
+        checkpoint.restorePIDState(new, checkpoint.getPIDState(pid), elapsed=1)
+        assert new._integral == 5
+        assert new._last_input == 5
+        assert new(5, dt=1) == pid(5, dt=1)
+
+    def test_restore_last_time(self):
+        new = PID()
+        checkpoint.restorePIDState(new, (0, math.nan, math.nan, math.nan), elapsed=3)
+        assert new._last_input is None
+        assert new.time_fn() - new._last_time == pytest.approx(3, abs=0.1)
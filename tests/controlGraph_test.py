@@ -0,0 +1,38 @@
+"""
+Test for the controlGraph.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData import controlGraph
+
+
+class Test_evaluationOrder:
+    def test_independent(self):
+        assert controlGraph.evaluationOrder(['0', '1'], {}) == ['0', '1']
+
+    def test_cascade(self):
+        order = controlGraph.evaluationOrder(['0', '1', '2'], {'0': '1', '1': '2', '2': ""})
+        assert order == ['2', '1', '0']
+
+    def test_cycle(self):
+        with pytest.raises(ValueError, match="cycle"):
+            controlGraph.evaluationOrder(['0', '1'], {'0': '1', '1': '0'})
+
+    def test_unknown_source(self):
+        with pytest.raises(ValueError):
+            controlGraph.evaluationOrder(['0'], {'0': '5'})
+
+
+class Test_feedforward:
+    def test_add(self):
+        assert controlGraph.feedforward(1, {'out': 10}, 'out', -0.5, 4) == -2
+
+    def test_limits(self):
+        assert controlGraph.feedforward(1, {'out': 10}, 'out', 1, 0, (0, 5)) == 5
+
+    @pytest.mark.parametrize("data", ({}, {'out': math.nan}, {'out': None}))
+    def test_invalid_value(self, data):
+        assert controlGraph.feedforward(1, data, 'out', 1) == 1
@@ -0,0 +1,67 @@
+"""
+Test for the controller director.
+"""
+
+import json
+
+import pytest
+
+from pyleco.core.message import Message
+from pyleco.json_utils.errors import JSONRPCError
+from pyleco.json_utils.rpc_generator import RPCGenerator
+from pyleco.json_utils.rpc_server import RPCServer
+
+from data.controller_director import ControllerDirector
+
+
+class FakeCommunicator:
+    """Answer the requests with an RPC server and count the message exchanges."""
+
+    def __init__(self, server):
+        self.server = server
+        self.rpc_generator = RPCGenerator()
+        self.requests = []
+
+    def ask(self, receiver, data=None, **kwargs):
+        self.requests.append(json.loads(data))
+        return Message(receiver=b"director", sender=receiver,
+                       data=self.server.process_request(data), **kwargs)
+
+
+@pytest.fixture
+def director():
+    server = RPCServer()
+    server.method(name="get_PID_settings")(lambda pid=0: {"Kp": 1, "pid": pid})
+    server.method(name="get_current_PID_state")(lambda pid=0: [1, 2, 3])
+    server.method(name="get_readout_interval")(lambda: 5)
+    server.method(name="get_database_table")(lambda: "table")
+
+    def fail():
+        raise ValueError("failing")
+    server.method()(fail)
+    return ControllerDirector(actor="controller", communicator=FakeCommunicator(server))
+
+
+def test_batch(director):
+    assert director.ask_rpc_batch([("get_readout_interval", {}),
+                                   ("get_PID_settings", {"pid": "x"})]) == [
+        5, {"Kp": 1, "pid": "x"}]
+    assert len(director.communicator.requests) == 1
+    assert isinstance(director.communicator.requests[0], list)
+
+
+def test_batch_empty(director):
+    assert director.ask_rpc_batch([]) == []
+    assert director.communicator.requests == []
+
+
+def test_batch_error(director):
+    with pytest.raises(JSONRPCError):
+        director.ask_rpc_batch([("get_readout_interval", {}), ("fail", {})])
+
+
+def test_get_panel_data(director):
+    assert director.get_panel_data("x") == {
+        "settings": {"Kp": 1, "pid": "x"}, "state": [1, 2, 3], "readout_interval": 5,
+        "database_table": "table"}
+    assert len(director.communicator.requests) == 1
@@ -0,0 +1,64 @@
+"""
+Test for the conversion.py.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from controllerData import conversion
+
+
+def scalar_thermistor(voltage):
+    """The original scalar implementation."""
+    voltage /= 1024
+    voltage = voltage / (1 - voltage)
+    if voltage >= 3.277:
+        pars = [3.357042, 2.5214848, 3.3743283, -6.4957311]
+    elif voltage >= 0.06816:
+        pars = [3.354017, 2.5617244, 2.1400943, -7.2405219]
+    else:
+        pars = [3.3536166, 2.53772, 0.85433271, -8.7912262]
+    return 1 / (pars[0] * 1E-3
+                + pars[1] * 1E-4 * math.log(voltage)
+                + pars[2] * 1E-6 * (math.log(voltage))**2
+                + pars[3] * 1E-8 * (math.log(voltage))**3) - 273.15
+
+
+@pytest.fixture
+def counts():
+    return np.arange(1, 1024)
+
+
+def test_thermistor(counts):
+    expected = [scalar_thermistor(float(count)) for count in counts]
+    assert conversion.thermistor(counts) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("raw", (0, 1024, -5))
+def test_thermistor_invalid(raw):
+    assert np.isnan(conversion.thermistor(raw))
+
+
+def test_lookup_table_exact(counts):
+    table = conversion.LookupTable(conversion.thermistor)
+    assert table(counts) == pytest.approx(conversion.thermistor(counts))
+
+
+def test_lookup_table_interpolation():
+    table = conversion.LookupTable(lambda raw: 2 * raw, size=10)
+    assert table([2.5, 3]).tolist() == [5, 6]
+
+
+def test_lookup_table_outside():
+    table = conversion.LookupTable(lambda raw: raw, size=10)
+    assert np.isnan(table(10))
+
+
+def test_registry(monkeypatch):
+    monkeypatch.setattr(conversion, "curves", dict(conversion.curves))
+    conversion.register_curve("double", lambda raw: 2 * np.asarray(raw))
+    assert conversion.convert("double", [1, 2]).tolist() == [2, 4]
+    assert conversion.get_curve("thermistorTable")(512) == pytest.approx(
+        scalar_thermistor(512.))
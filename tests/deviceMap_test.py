@@ -0,0 +1,80 @@
+"""
+Test for the deviceMap.py.
+"""
+
+import pytest
+
+from controllerData.deviceMap import DeviceMap, Rule
+
+
+class Test_default_map:
+    @pytest.fixture
+    def deviceMap(self):
+        return DeviceMap()
+
+    @pytest.mark.parametrize('position, identifier, name', [
+        ('i', 111, 'HAT'),
+        ('a', 297, 'airQuality'),
+        ('a', 2115, 'out0'),
+        ('b', 2115, 'out1'),
+    ])
+    def test_assign(self, deviceMap, position, identifier, name):
+        assert deviceMap.assign("uid", position, identifier) == name
+
+    def test_unknown(self, deviceMap):
+        assert deviceMap.assign("uid", 'a', 2113) is None
+
+    def test_static_outputs(self, deviceMap):
+        assert set(deviceMap.outputs.keys()) == {'out0', 'out1'}
+
+    def test_output_factor(self, deviceMap):
+        deviceMap.assign("uid", 'a', 2115)
+        assert deviceMap.outputs['out0'].method == 'set_output_voltage'
+        assert deviceMap.outputs['out0'].factor == 1000
+
+
+class Test_precedence:
+    @pytest.fixture
+    def deviceMap(self):
+        return DeviceMap([
+            {'name': 'generic', 'type': 2113, 'kind': 'input'},
+            {'name': 'positioned', 'type': 2113, 'position': 'c', 'kind': 'input'},
+            {'name': 'special', 'uid': "xyz", 'kind': 'input', 'method': 'get_temperature'},
+        ])
+
+    def test_uid(self, deviceMap):
+        assert deviceMap.assign("xyz", 'c', 2113) == 'special'
+
+    def test_position(self, deviceMap):
+        assert deviceMap.assign("abc", 'c', 2113) == 'positioned'
+
+    def test_type(self, deviceMap):
+        assert deviceMap.assign("abc", 'd', 2113) == 'generic'
+
+
+def test_name_template():
+    deviceMap = DeviceMap([{'name': 'out_{position}', 'type': 'BrickletAnalogOutV3',
+                            'kind': 'output'}])
+    assert deviceMap.assign("abc", 'c', 2115) == 'out_c'
+    assert deviceMap.assign("def", 'd', 2115) == 'out_d'
+    assert set(deviceMap.outputs.keys()) == {'out_c', 'out_d'}
+
+
+def test_input_release():
+    deviceMap = DeviceMap([{'name': 'room', 'type': 2113, 'kind': 'input', 'factor': 1}])
+    deviceMap.assign("abc", 'c', 2113)
+    assert deviceMap.inputs['room'].factor == 1
+    deviceMap.release('room')
+    assert deviceMap.inputs == {}
+
+
+def test_missing_method(caplog):
+    deviceMap = DeviceMap([{'name': 'x', 'type': 297, 'kind': 'input'}])
+    assert deviceMap.assign("abc", 'c', 297) is None
+    assert "needs a 'method'" in caplog.text
+
+
+@pytest.mark.parametrize('parameters', [{'name': 'x'}, {'name': 'x', 'uid': "a", 'kind': 'y'}])
+def test_invalid_rule(parameters):
+    with pytest.raises(ValueError):
+        Rule(**parameters)
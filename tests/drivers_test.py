@@ -0,0 +1,110 @@
+"""
+Test for the drivers.py.
+"""
+
+import threading
+import time
+
+import pytest
+
+from controllerData import drivers
+
+
+class Constant(drivers.Driver):
+    channels = {'a': "V"}
+    outputs = ('outA',)
+
+    def read(self):
+        return {'a': 1}
+
+    def set_output(self, name, value):
+        self.output = name, value
+
+    def execute(self, command):
+        return f"executed {command}"
+
+
+class Slow(drivers.Driver):
+    channels = {'b': "V"}
+    blocking = True
+    timeout = 0.05
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+    def read(self):
+        self.release.wait(1)
+        return {'b': 2}
+
+
+class Failing(drivers.Driver):
+    def read(self):
+        raise ConnectionError("test")
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = drivers.DriverScheduler([Constant(), Slow(name="slow"), Failing()])
+    yield scheduler
+    scheduler.drivers['slow'].release.set()
+    scheduler.close()
+
+
+def test_load_drivers_path():
+    loaded = drivers.load_drivers([{'driver': f"{__name__}:Constant", 'name': "const"}])
+    assert loaded[0].name == "const"
+    assert isinstance(loaded[0], Constant)
+
+
+def test_load_drivers_unknown(caplog):
+    assert drivers.load_drivers([{'driver': "unknown"}]) == []
+    assert "Setting up driver" in caplog.text
+
+
+def test_builtin():
+    assert drivers.get_driver_class('arduino') is drivers.ArduinoDriver
+
+
+def test_read(scheduler):
+    scheduler.drivers['slow'].release.set()
+    assert scheduler.read() == {'a': 1, 'b': 2}
+    assert scheduler.statistics['Constant']['reads'] == 1
+    assert scheduler.statistics['Failing']['errors'] == 1
+
+
+def test_blocking_timeout(scheduler, caplog):
+    assert scheduler.read() == {'a': 1}
+    assert "did not answer in time" in caplog.text
+    assert 'slow' in scheduler.pending
+    scheduler.drivers['slow'].release.set()
+    scheduler.pending['slow'].result(1)
+    assert scheduler.read() == {'a': 1, 'b': 2}
+
+
+def test_hung_driver_does_not_stall(scheduler):
+    scheduler.drivers['slow'].timeout = 0.5
+    scheduler.read()
+    start = time.perf_counter()
+    assert scheduler.read() == {'a': 1}
+    assert time.perf_counter() - start < 0.2
+    assert 'slow' in scheduler.pending
+
+
+def test_interval_uses_cache(scheduler):
+    scheduler.drivers['slow'].release.set()
+    scheduler.drivers['Constant'].interval = 100
+    scheduler.read()
+    scheduler.read()
+    assert scheduler.statistics['Constant']['reads'] == 1
+
+
+def test_output(scheduler):
+    scheduler.set_output('outA', 5)
+    assert scheduler.drivers['Constant'].output == ('outA', 5)
+    with pytest.raises(KeyError):
+        scheduler.set_output('outB', 5)
+
+
+def test_execute(scheduler):
+    assert scheduler.execute("Constant: abc") == "executed abc"
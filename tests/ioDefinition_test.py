@@ -20,6 +20,7 @@ else:
 # file to test
 from controllerData import ioDefinition
 from controllerData.ioDefinition import sensors  # type: ignore
+from controllerData.deviceMap import DeviceMap
 
 
 ioDefinition.log.addHandler(logging.StreamHandler())
@@ -41,6 +42,8 @@ def skeleton(empty):
     empty.tfCon = 0
     empty.tfDevices = {}
     empty.tfMap = {}
+    empty.deviceMap = DeviceMap()
+    empty.deviceLost = lambda name: ioDefinition.InputOutput.deviceLost(empty, name)
     return empty
 
 
@@ -263,9 +266,47 @@ class Test_getSensors:
         assert "Get sensors failed." in caplog.text
 
 
+@pytest.mark.parametrize('position, name', [('a', 'out0'), ('b', 'out1')])
+def test_deviceConnected_output_position(mock_tinkerforge, skeleton, tf_device_pars, position,
+                                         name):
+    tf_device_pars[2] = position
+    tf_device_pars[5] = 2115
+    ioDefinition.InputOutput.deviceConnected(skeleton, *tf_device_pars)
+    assert skeleton.tfMap == {name: "abc"}
+
+
+def test_deviceConnected_uid_rule(mock_tinkerforge, skeleton, tf_device_pars):
+    skeleton.deviceMap = DeviceMap([{'name': 'room', 'uid': "abc", 'kind': 'input',
+                                     'method': 'get_temperature'}])
+    ioDefinition.InputOutput.deviceConnected(skeleton, *tf_device_pars)
+    assert skeleton.tfMap == {'room': "abc"}
+    assert 'room' in skeleton.deviceMap.inputs
+
+
+def test_deviceConnected_unknown_type(mock_tinkerforge, skeleton, tf_device_pars, caplog):
+    tf_device_pars[5] = 1
+    ioDefinition.InputOutput.deviceConnected(skeleton, *tf_device_pars)
+    assert skeleton.tfDevices == {}
+    assert "unknown type" in caplog.text
+
+
+class Mock_Thermometer:
+    def get_temperature(self):
+        return 2345
+
+
+def test_getSensors_inputs(skeleton, monkeypatch):
+    monkeypatch.setattr(sensors, 'getData', lambda *args: {'test': True})
+    skeleton.deviceMap = DeviceMap([{'name': 'room', 'type': 2113, 'kind': 'input'}])
+    skeleton.deviceMap.assign("xyz", 'c', 2113)
+    skeleton.tfDevices['xyz'] = Mock_Thermometer()
+    skeleton.tfMap['room'] = "xyz"
+    assert ioDefinition.InputOutput.getSensors(skeleton) == {'room': 23.45, 'test': True}
+
+
 def test_setOutput_Not_Connected(skeletonP, caplog):
     caplog.set_level(0)
-    ioDefinition.InputOutput.setOutput(skeletonP, 'out1', 100)
+    assert ioDefinition.InputOutput.setOutput(skeletonP, 'out1', 100) is False
     assert "Output 'out1' is not connected." in caplog.text
 
 
@@ -17,12 +17,13 @@ import socket
 from devices import intercom
 
 # file to test
-from controllerData import listener
+from controllerData import listener, pidConfiguration
 
 
 class Mock_Controller:
     def __init__(self):
         self.pids = {}
+        self.settingsWriter = pidConfiguration.SettingsWriter()
 
 
 class Mock_PID:
@@ -54,6 +55,7 @@ def signals():
 
 @pytest.fixture
 def ch(connection, signals, empty):
+    empty.settingsWriter = pidConfiguration.SettingsWriter()
     return listener.ConnectionHandler(connection, signals, empty)
 
 
@@ -183,6 +185,41 @@ class Test_handler_setValue:
             ch.setValue(pickle.dumps({'pid15/test': 5}))
         assert blocker.args == ["15"]
 
+    def test_pid_configuration(self, chP, qtbot, sets):
+        with qtbot.waitSignal(chP.signals.pidsConfigured) as blocker:
+            chP.setValue(pickle.dumps({'pid0/Kp': 5, 'pid0/setpoint': 3}))
+        assert blocker.args == [{'0': {'Kp': 5, 'setpoint': 3}}]
+        assert sets.value('pid0/Kp') is None  # written by the controller
+        assert chP.controller.settingsWriter.pending == {'pid0/Kp': 5, 'pid0/setpoint': 3}
+        assert message[1] == 'ACK'
+
+    def test_pid_configuration_invalid(self, chP, qtbot, sets):
+        with qtbot.assertNotEmitted(chP.signals.pidsConfigured):
+            chP.setValue(pickle.dumps({'pid0/Kp': "x", 'testing': 5}))
+        assert message[1] == 'ERR'
+        assert sets.value('testing') is None
+
+    def test_publisher_changed(self, ch, qtbot, sets):
+        with qtbot.waitSignal(ch.signals.publisherChanged):
+            ch.setValue(pickle.dumps({'publisher/deadband': 0.1}))
+
+    def test_storage_changed(self, ch, qtbot, sets):
+        with qtbot.waitSignal(ch.signals.storageChanged):
+            ch.setValue(pickle.dumps({'storage/policy': "mean"}))
+
+    def test_readout_changed(self, ch, qtbot, sets):
+        with qtbot.waitSignal(ch.signals.readoutChanged):
+            ch.setValue(pickle.dumps({'readout/adaptive': True}))
+
+    @pytest.mark.parametrize('group, signal', listener.GROUP_SIGNALS.items())
+    def test_group_changed(self, ch, qtbot, sets, group, signal):
+        with qtbot.waitSignal(getattr(ch.signals, signal)):
+            ch.setValue(pickle.dumps({f'{group}/test': 1}))
+
+    def test_group_without_key(self, ch, qtbot, sets):
+        with qtbot.assertNotEmitted(ch.signals.storageChanged):
+            ch.setValue(pickle.dumps({'storage': 1}))
+
     def test_timer_changed(self, ch, qtbot, sets):
         with qtbot.waitSignal(ch.signals.timerChanged) as blocker:
             ch.setValue(pickle.dumps({'readoutInterval': 5}))
@@ -210,6 +247,25 @@ class Test_handler_getValue:
         ch.getValue(pickle.dumps(['errors']))
         assert caplog.text == ""
 
+    def test_pending_value(self, ch, sets):
+        sets.setValue('pid0/Kp', 1)
+        ch.controller.settingsWriter.write({'pid0/Kp': 5})
+        ch.getValue(pickle.dumps(["pid0/Kp"]))
+        assert pickle.loads(message[2]) == {'pid0/Kp': 5}
+
+    def test_set_then_get(self, chP, sets):
+        sets.setValue('pid0/Kp', 1)
+        chP.setValue(pickle.dumps({'pid0/Kp': 5}))
+        chP.getValue(pickle.dumps(["pid0/Kp"]))
+        assert pickle.loads(message[2]) == {'pid0/Kp': 5}
+
+    def test_getValue_fullState(self, chP):
+        def provide(container):
+            container['fullState'] = {'version': 1}
+        chP.signals.fullStateRequested.connect(provide)
+        chP.getValue(pickle.dumps(['fullState']))
+        assert pickle.loads(message[2]) == {'fullState': {'version': 1}}
+
 
 class Test_handler_general:
     """Test the connectionHandler in general"""
@@ -0,0 +1,100 @@
+"""
+Test for the outputManager.py.
+"""
+
+import pytest
+
+from controllerData.outputManager import OutputManager
+
+
+@pytest.fixture
+def written():
+    return []
+
+
+@pytest.fixture
+def manager(written):
+    def writer(name, value):
+        written.append((name, value))
+        return True
+    return OutputManager(writer=writer)
+
+
+def test_first_write(manager, written):
+    manager.request('out0', 5)
+    manager.flush()
+    assert written == [('out0', 5)]
+
+
+def test_duplicate_suppressed(manager, written):
+    for _ in range(3):
+        manager.request('out0', 5)
+        manager.flush()
+    assert written == [('out0', 5)]
+    assert manager.statistics['out0'] == {'written': 1, 'suppressed': 2, 'failed': 0}
+
+
+def test_failed_write_retried(written):
+    manager = OutputManager(writer=lambda name, value: written.append((name, value)) or False)
+    for _ in range(2):
+        manager.request('out0', 5)
+        manager.flush()
+    assert written == [('out0', 5), ('out0', 5)]
+    assert manager.last_value == {}
+    assert manager.statistics['out0'] == {'written': 0, 'suppressed': 0, 'failed': 2}
+
+
+def test_batch_per_tick(manager, written):
+    manager.request('out0', 5)
+    manager.request('out0', 6)
+    manager.request('out1', 1)
+    manager.flush()
+    assert written == [('out0', 6), ('out1', 1)]
+
+
+class Test_deadband:
+    @pytest.fixture(autouse=True)
+    def configure(self, manager):
+        manager.configure('out0', deadband=0.5)
+        manager.record('out0', 5)
+
+    def test_within(self, manager, written):
+        manager.request('out0', 5.4)
+        manager.flush()
+        assert written == []
+
+    def test_outside(self, manager, written):
+        manager.request('out0', 5.6)
+        manager.flush()
+        assert written == [('out0', 5.6)]
+
+    def test_other_channel_default(self, manager, written):
+        manager.record('out1', 5)
+        manager.request('out1', 5.1)
+        manager.flush()
+        assert written == [('out1', 5.1)]
+
+
+def test_min_interval(manager, written):
+    manager.defaults['minInterval'] = 100
+    manager.record('out0', 0)
+    manager.request('out0', 5)
+    manager.flush()
+    assert written == []
+
+
+def test_max_slew(manager, written):
+    manager.configure('out0', max_slew=1)
+    manager.record('out0', 0, timestamp=0)
+    manager.request('out0', 1e9)
+    manager.flush()
+    name, value = written[0]
+    assert 0 < value < 1e9
+
+
+def test_invalidate(manager, written):
+    manager.record('out0', 5)
+    manager.invalidate('out0')
+    manager.request('out0', 5)
+    manager.flush()
+    assert written == [('out0', 5)]
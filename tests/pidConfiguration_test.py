@@ -0,0 +1,100 @@
+"""
+Test for the pidConfiguration.py.
+"""
+
+import math
+
+import pytest
+from qtpy import QtCore
+from simple_pid import PID
+
+from controllerData import pidConfiguration
+
+
+@pytest.fixture
+def sets(monkeypatch):
+    settings = QtCore.QSettings('NLOQO', "tests")
+    monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+    yield settings
+    settings.clear()
+
+
+class Test_validate:
+    def test_normalize(self):
+        assert pidConfiguration.validate(
+            {0: {'setpoint': "5", 'state': 2.0, 'sensor': "a, b", 'autoMode': "false",
+                 'Kp': None}}, ['0']) == {
+            '0': {'setpoint': 5.0, 'state': 2, 'sensors': ["a", "b"], 'autoMode': False}}
+
+    def test_infinite_limit(self):
+        assert pidConfiguration.validate({'0': {'lowerLimit': -math.inf}}, ['0']) == {
+            '0': {'lowerLimitNone': True}}
+
+    @pytest.mark.parametrize("configuration", (
+        {'1': {'Kp': 1}},
+        {'0': {'unknown': 1}},
+        {'0': {'Kp': "x"}},
+        {'0': {'Kp': math.nan}},
+        {'0': {'setpoint': math.inf}},
+        {'0': {'state': 3}},
+        {'0': {'lowerLimit': 5, 'upperLimit': 4}},
+        {'0': 5},
+        {'0': {'setpointSource': '0'}},
+        {'0': {'setpointSource': '5'}},
+    ))
+    def test_invalid(self, configuration):
+        with pytest.raises(ValueError):
+            pidConfiguration.validate(configuration, ['0'])
+
+
+class Test_limits:
+    @pytest.mark.parametrize("values, current, result", (
+        ({}, (1, 2), (1, 2)),
+        ({'lowerLimit': 0}, (1, 2), (0, 2)),
+        ({'lowerLimit': 0}, (None, 2), (None, 2)),  # The limit is not active.
+        ({'lowerLimitNone': True}, (1, 2), (None, 2)),
+        ({'lowerLimitNone': False}, (None, 2), (-5, 2)),  # stored value
+        ({'upperLimitNone': False, 'upperLimit': 7}, (None, None), (None, 7)),
+    ))
+    def test_limits(self, values, current, result):
+        assert pidConfiguration.limits(values, current, lambda key: -5) == result
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            pidConfiguration.limits({'lowerLimit': 3}, (1, 2), lambda key: 0)
+
+
+def test_apply():
+    pid = PID(auto_mode=False)
+    pidConfiguration.apply(pid, {'Kp': 2, 'Ki': 3, 'setpoint': 5, 'autoMode': True}, (0, 10), 4)
+    assert pid.tunings == (2, 3, 0)
+    assert pid.setpoint == 5
+    assert pid.output_limits == (0, 10)
+    assert pid.auto_mode
+    assert pid._integral == 4
+
+
+def test_toSettings():
+    assert pidConfiguration.toSettings({'sensors': ["a", "b"], 'Kp': 1}) == {
+        'sensor': "a,b", 'Kp': 1}
+
+
+class Test_SettingsWriter:
+    @pytest.fixture
+    def writer(self, sets):
+        return pidConfiguration.SettingsWriter()
+
+    def test_write_behind(self, writer, sets):
+        writer.write({'pid0/Kp': 5})
+        assert sets.value('pid0/Kp') is None
+        assert writer.value('pid0/Kp') == 5
+
+    def test_flush(self, writer, sets):
+        writer.write({'pid0/Kp': 5, 'pid1/Kp': 6})
+        assert writer.flush() == 2
+        assert sets.value('pid0/Kp', type=int) == 5
+        assert writer.pending == {}
+
+    def test_value_from_settings(self, writer, sets):
+        sets.setValue('pid0/Ki', 3)
+        assert writer.value('pid0/Ki', 0, float) == 3
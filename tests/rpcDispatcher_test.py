@@ -0,0 +1,181 @@
+"""
+Test for the rpcDispatcher.py.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from controllerData import rpcDispatcher
+from controllerData.rpcDispatcher import RPCDispatcher
+
+
+def wait_for(condition, timeout=2):
+    stop = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > stop:
+            raise TimeoutError
+        time.sleep(0.005)
+
+
+class Methods:
+    def __init__(self):
+        self.release = threading.Event()
+        self.threads = {}
+        self.running = 0
+        self.max_running = 0
+
+    def fast(self):
+        return "fast"
+
+    def slow(self):
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        self.release.wait(2)
+        self.running -= 1
+        return "slow"
+
+    def fail(self):
+        raise ValueError("failing")
+
+
+@pytest.fixture
+def methods():
+    return Methods()
+
+
+@pytest.fixture
+def dispatcher(methods):
+    sent = []
+
+    def process(payload):
+        request = json.loads(payload)
+        requests = request if isinstance(request, list) else [request]
+        results = []
+        for item in requests:
+            methods.threads[item["method"]] = threading.current_thread()
+            result = getattr(methods, item["method"])()
+            if "id" in item:
+                results.append({"jsonrpc": "2.0", "id": item["id"], "result": result})
+        if not results:
+            return None
+        return json.dumps(results if isinstance(request, list) else results[0])
+
+    dispatcher = RPCDispatcher(process=process, send=lambda response, context: sent.append(
+        (json.loads(response), context)), max_workers=3, timeout=1)
+    dispatcher.configure("fast", inline=True)
+    dispatcher.sent = sent
+    yield dispatcher
+    methods.release.set()
+    dispatcher.close()
+
+
+def request(method, id=1):
+    return json.dumps({"jsonrpc": "2.0", "id": id, "method": method})
+
+
+def test_errorResponse():
+    assert json.loads(rpcDispatcher.errorResponse({"id": 5, "method": "a"}, -1, "x")) == {
+        "jsonrpc": "2.0", "id": 5, "error": {"code": -1, "message": "x"}}
+
+
+def test_errorResponse_batch():
+    response = rpcDispatcher.errorResponse([{"id": 5}, {"method": "notification"}], -1, "x")
+    assert [item["id"] for item in json.loads(response)] == [5]
+
+
+def test_errorResponse_notification():
+    assert rpcDispatcher.errorResponse({"method": "a"}, -1, "x") is None
+
+
+def test_inline(dispatcher, methods):
+    dispatcher.dispatch(request("fast"), "context")
+    assert dispatcher.sent == [({"jsonrpc": "2.0", "id": 1, "result": "fast"}, "context")]
+    assert methods.threads["fast"] is threading.current_thread()
+
+
+def test_pooled(dispatcher, methods):
+    methods.release.set()
+    dispatcher.dispatch(request("slow"), "context")
+    wait_for(lambda: dispatcher.sent)
+    assert dispatcher.sent[0][0]["result"] == "slow"
+    assert methods.threads["slow"] is not threading.current_thread()
+
+
+def test_not_blocking(dispatcher, methods):
+    dispatcher.dispatch(request("slow", 1))
+    dispatcher.dispatch(request("fast", 2))
+    assert dispatcher.sent[0][0]["result"] == "fast"
+
+
+def test_batch_with_inline_method_is_inline(dispatcher, methods):
+    methods.release.set()
+    dispatcher.dispatch(json.dumps([json.loads(request("fast", 1)),
+                                    json.loads(request("slow", 2))]))
+    assert [item["result"] for item in dispatcher.sent[0][0]] == ["fast", "slow"]
+    assert methods.threads["fast"] is threading.current_thread()
+    assert methods.threads["slow"] is threading.current_thread()
+    assert dispatcher.statistics['inline'] == 1
+
+
+def test_batch_pooled(dispatcher, methods):
+    methods.release.set()
+    dispatcher.dispatch(json.dumps([json.loads(request("slow", 1)),
+                                    json.loads(request("slow", 2))]))
+    wait_for(lambda: dispatcher.sent)
+    assert methods.threads["slow"] is not threading.current_thread()
+
+
+def test_timeout(dispatcher, methods):
+    dispatcher.configure("slow", timeout=0.05)
+    dispatcher.dispatch(request("slow"))
+    wait_for(lambda: dispatcher.sent)
+    assert dispatcher.sent[0][0]["error"]["code"] == rpcDispatcher.TIMEOUT
+    methods.release.set()
+    wait_for(lambda: methods.running == 0)
+    time.sleep(0.01)
+    assert len(dispatcher.sent) == 1  # late result discarded
+    assert dispatcher.statistics['timeouts'] == 1
+
+
+def test_limit(dispatcher, methods):
+    dispatcher.configure("slow", limit=1)
+    for i in range(3):
+        dispatcher.dispatch(request("slow", i))
+    time.sleep(0.05)
+    methods.release.set()
+    wait_for(lambda: len(dispatcher.sent) == 3)
+    assert methods.max_running == 1
+
+
+def test_busy(dispatcher, methods):
+    dispatcher.configure("slow", limit=1, timeout=0.1)
+    dispatcher.dispatch(request("slow", 1))
+    dispatcher.dispatch(request("slow", 2))
+    wait_for(lambda: len(dispatcher.sent) == 2)
+    codes = {response["id"]: response["error"]["code"] for response, _ in dispatcher.sent}
+    assert rpcDispatcher.BUSY in codes.values() or codes == {
+        1: rpcDispatcher.TIMEOUT, 2: rpcDispatcher.TIMEOUT}
+
+
+def test_exception(dispatcher):
+    dispatcher.dispatch(request("fail"))
+    wait_for(lambda: dispatcher.sent)
+    assert dispatcher.sent[0][0]["error"] == {"code": rpcDispatcher.SERVER_ERROR,
+                                              "message": "failing"}
+
+
+def test_notification_not_answered(dispatcher, methods):
+    methods.release.set()
+    dispatcher.dispatch(json.dumps({"jsonrpc": "2.0", "method": "slow"}))
+    wait_for(lambda: dispatcher.statistics['pooled'] == 1)
+    time.sleep(0.05)
+    assert dispatcher.sent == []
+
+
+def test_invalid_json_inline(dispatcher):
+    dispatcher.process = lambda payload: json.dumps({"error": "parse"})
+    dispatcher.dispatch("{invalid")
+    assert dispatcher.sent == [({"error": "parse"}, None)]
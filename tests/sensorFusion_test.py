@@ -0,0 +1,70 @@
+"""
+Test for the sensorFusion.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData import sensorFusion
+
+
+class Test_parseSensors:
+    def test_plain(self):
+        assert sensorFusion.parseSensors(['a', 'b']) == ('first', ['a', 'b'], [1, 1])
+
+    def test_mode_and_weights(self):
+        assert sensorFusion.parseSensors(['mean:a*2', 'b']) == ('mean', ['a', 'b'], [2, 1])
+
+    def test_separate_mode(self):
+        assert sensorFusion.parseSensors(['median:', 'a']) == ('median', ['a'], [1])
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            sensorFusion.parseSensors(['vote:a'])
+
+
+class Test_fuse:
+    @pytest.fixture
+    def fusion(self):
+        return sensorFusion.SensorFusion(outlier_threshold=1)
+
+    @pytest.fixture
+    def sensors(self):
+        return {'first': ['a', 'b'], 'median': ['median:a', 'b', 'c'],
+                'mean': ['mean:a*3', 'b'], 'reject': ['reject:a', 'b', 'c'], 'empty': ['']}
+
+    def test_all_valid(self, fusion, sensors):
+        inputs = fusion.fuse({'a': 1, 'b': 2, 'c': 10}, sensors, 0)
+        assert inputs['first'] == 1
+        assert inputs['median'] == 2
+        assert inputs['mean'] == 1.25
+        assert inputs['reject'] == 1.5  # 10 is an outlier
+        assert math.isnan(inputs['empty'])
+
+    def test_invalid_skipped(self, fusion, sensors):
+        inputs = fusion.fuse({'a': math.nan, 'b': 2, 'c': 4}, sensors, 0)
+        assert inputs['first'] == 2
+        assert inputs['median'] == 3
+        assert inputs['mean'] == 2
+
+    def test_none_valid(self, fusion, sensors):
+        inputs = fusion.fuse({}, sensors, 0)
+        assert all(math.isnan(value) for value in inputs.values())
+
+    def test_out_of_range(self, fusion):
+        fusion.valid_range = (0, 100)
+        assert fusion.fuse({'a': -300, 'b': 5}, {'0': ['a', 'b']}, 0) == {'0': 5}
+        assert fusion.get_health()['a']['reason'] == "out of range"
+
+    def test_stuck(self, fusion):
+        fusion.stuck_time = 10
+        fusion.fuse({'a': 1, 'b': 5}, {'0': ['a', 'b']}, 0)
+        fusion.fuse({'a': 1, 'b': 6}, {'0': ['a', 'b']}, 5)
+        assert fusion.fuse({'a': 1, 'b': 7}, {'0': ['a', 'b']}, 11) == {'0': 7}
+        assert fusion.get_health()['a'] == {'valid': False, 'reason': "stuck", 'unchanged': 11,
+                                            'invalid': 1}
+
+    def test_recompile(self, fusion):
+        fusion.fuse({'a': 1, 'b': 5}, {'0': ['a']}, 0)
+        assert fusion.fuse({'a': 1, 'b': 5}, {'0': ['b']}, 0) == {'0': 5}
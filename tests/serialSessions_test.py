@@ -0,0 +1,107 @@
+"""
+Test for the serialSessions.py.
+"""
+
+import threading
+
+import pytest
+
+from controllerData import serialSessions
+
+
+class Mock_Resource:
+    def __init__(self):
+        self.commands = []
+        self.closed = False
+        self.block = threading.Event()
+        self.block.set()
+
+    def query(self, command):
+        self.block.wait(1)
+        if command == "fail":
+            raise ConnectionError("test")
+        self.commands.append(command)
+        return f"answer {command}"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def session():
+    session = serialSessions.SerialSession(Mock_Resource(), name="port")
+    yield session
+    if not session._closed:
+        session.close()
+
+
+def test_query(session):
+    assert session.query("r", timeout=1) == "answer r"
+
+
+def test_error(session):
+    with pytest.raises(ConnectionError):
+        session.query("fail", timeout=1)
+    assert session.statistics['errors'] == 1
+
+
+def test_timeout(session):
+    session.resource.block.clear()
+    with pytest.raises(TimeoutError):
+        session.query("r", timeout=0.01)
+    session.resource.block.set()
+
+
+def test_timeout_cancels(session):
+    session.resource.block.clear()
+    first = session.submit("busy")  # occupies the worker
+    while not first.running():
+        pass
+    with pytest.raises(TimeoutError):
+        session.query("late", timeout=0.01)
+    session.resource.block.set()
+    assert session.query("r", timeout=1) == "answer r"
+    assert session.resource.commands == ["busy", "r"]
+
+
+def test_readout_priority(session):
+    session.resource.block.clear()
+    first = session.submit("busy")  # occupies the worker
+    while not first.running():
+        pass
+    user = session.submit("user", priority=serialSessions.USER)
+    readout = session.submit("readout", priority=serialSessions.READOUT)
+    session.resource.block.set()
+    user.result(1), readout.result(1)
+    assert session.resource.commands == ["busy", "readout", "user"]
+
+
+def test_statistics(session):
+    session.query("r", timeout=1)
+    statistics = session.statistics
+    assert statistics['count'] == 1
+    assert statistics['latencyMax'] >= statistics['latencyLast'] > 0
+
+
+def test_close(session):
+    future = session.submit("r")
+    session.close()
+    assert future.result(0) == "answer r"
+    assert session.resource.closed
+    with pytest.raises(ConnectionError):
+        session.submit("r")
+
+
+def test_manager_keeps_session():
+    opened = []
+
+    def setup(resourceManager, port):
+        opened.append(port)
+        return Mock_Resource()
+    manager = serialSessions.SessionManager(None)
+    first = manager.open("/dev/a", setup)
+    assert manager.open("/dev/a", setup) is first
+    assert opened == ["/dev/a"]
+    assert manager.statistics()["/dev/a"]['count'] == 0
+    manager.close()
+    assert first.resource.closed
@@ -0,0 +1,107 @@
+"""
+Test for the setpointSchedule.py.
+"""
+
+import time
+
+import pytest
+
+from controllerData import setpointSchedule
+
+
+class Test_parseTime:
+    @pytest.mark.parametrize("value, seconds", (("06:30", 23400), ("00:00:10", 10), (90, 90),
+                                                ("120", 120)))
+    def test_daily(self, value, seconds):
+        assert setpointSchedule.parseTime(value, 'daily') == seconds
+
+    def test_weekly(self):
+        assert setpointSchedule.parseTime("Tue 01:00", 'weekly') == 86400 + 3600
+
+    @pytest.mark.parametrize("value, period", (("Tue 01:00", 'daily'), ("Foo 01:00", 'weekly'),
+                                               ("ab:cd", None), ("1:2:3:4", None)))
+    def test_invalid(self, value, period):
+        with pytest.raises(ValueError):
+            setpointSchedule.parseTime(value, period)
+
+
+class Test_Profile_invalid:
+    @pytest.mark.parametrize("times, setpoints, period", (([], [], None), ([1, 0], [1, 2], None),
+                                                          ([0], [1, 2], None),
+                                                          ([0, 90000], [1, 2], 'daily'),
+                                                          ([0], [1], 'monthly')))
+    def test_invalid(self, times, setpoints, period):
+        with pytest.raises(ValueError):
+            setpointSchedule.Profile(times, setpoints, period=period)
+
+
+class Test_Profile_single:
+    @pytest.fixture
+    def profile(self):
+        return setpointSchedule.Profile([10, 20, 30], [1, 2, 3], start=100)
+
+    def test_before(self, profile):
+        assert profile.update(105) == (None, False)
+
+    def test_steps(self, profile):
+        assert profile.update(110) == (1, True)
+        assert profile.update(115) == (1, False)
+        assert profile.update(125) == (2, True)
+
+    def test_next_event_cached(self, profile):
+        profile.update(112)
+        assert profile.next_event == 120
+        profile.times = ()  # not used until the next event
+        assert profile.update(119) == (1, False)
+
+    def test_finished(self, profile):
+        assert not profile.finished(129)
+        assert profile.update(200) == (3, True)
+        assert profile.finished(200)
+
+    def test_ramp(self):
+        profile = setpointSchedule.Profile([0, 100], [20, 30], ramp=True, start=0)
+        assert profile.update(50) == (25, True)
+        assert profile.update(75) == (27.5, False)
+        assert profile.update(150) == (30, True)
+
+    def test_dict(self, profile):
+        assert setpointSchedule.Profile.fromDict(profile.toDict()).toDict() == profile.toDict()
+
+
+class Test_Profile_daily:
+    @pytest.fixture
+    def midnight(self):
+        now = time.time()
+        return now - (now + time.localtime(now).tm_gmtoff) % 86400
+
+    @pytest.fixture
+    def profile(self):
+        return setpointSchedule.Profile([6 * 3600, 22 * 3600], [21, 17], period='daily')
+
+    def test_day(self, profile, midnight):
+        assert profile.update(midnight + 12 * 3600) == (21, True)
+        assert profile.next_event == midnight + 22 * 3600
+
+    def test_night_wraps(self, profile, midnight):
+        assert profile.update(midnight + 3600) == (17, True)
+        assert profile.next_event == midnight + 6 * 3600
+        assert profile.update(midnight + 23 * 3600) == (17, False)
+
+    def test_ramp_wraps(self, midnight):
+        profile = setpointSchedule.Profile([0, 12 * 3600], [10, 20], ramp=True, period='daily')
+        assert profile.update(midnight + 18 * 3600)[0] == pytest.approx(15)
+
+
+class Test_ramp:
+    def test_duration(self):
+        profile = setpointSchedule.ramp(20, 25, rate=1, start=0)
+        assert profile.times == (0, 300)
+        assert profile.update(60)[0] == 21
+
+    def test_no_change(self):
+        assert setpointSchedule.ramp(20, 20, rate=1, start=0).update(0) == (20, True)
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            setpointSchedule.ramp(20, 25, rate=0)
@@ -0,0 +1,71 @@
+"""
+Test for the signalFilter.py.
+"""
+
+import math
+
+import pytest
+
+from controllerData import signalFilter
+
+
+class Test_parsePipeline:
+    def test_pipeline(self):
+        assert signalFilter.parsePipeline("median:5, ema:0.3") == [('median', 5), ('ema', 0.3)]
+
+    def test_empty(self):
+        assert signalFilter.parsePipeline("") == []
+
+    @pytest.mark.parametrize("pipeline", ("mean:3", "ema", "ema:2", "median:2.5", "biquad:0.5"))
+    def test_invalid(self, pipeline):
+        with pytest.raises(ValueError):
+            signalFilter.parsePipeline(pipeline)
+
+
+def test_lowpass_unity_gain():
+    b0, b1, b2, a1, a2 = signalFilter.lowpass(0.1)
+    assert (b0 + b1 + b2) / (1 + a1 + a2) == pytest.approx(1)
+
+
+class Test_FilterBank:
+    @pytest.fixture
+    def bank(self):
+        return signalFilter.FilterBank({'a': "ema:0.5", 'b': "median:3", 'c': "biquad:0.1",
+                                        'd': "median:3, ema:0.5"})
+
+    def test_ema(self, bank):
+        bank.process({'a': 0})
+        assert bank.process({'a': 2})['a'] == 1
+
+    def test_median(self, bank):
+        for value in (1, 100, 2):
+            result = bank.process({'b': value})
+        assert result['b'] == 2
+
+    def test_biquad_steady(self, bank):
+        for _ in range(3):
+            assert bank.process({'c': 5})['c'] == pytest.approx(5)
+
+    def test_biquad_smooths(self, bank):
+        bank.process({'c': 0})
+        assert 0 < bank.process({'c': 10})['c'] < 1
+
+    def test_chain(self, bank):
+        bank.process({'d': 0})
+        assert bank.process({'d': 100})['d'] == 25  # ema of the medians 0 and 50
+
+    def test_invalid_values_pass(self, bank):
+        bank.process({'a': 0})
+        result = bank.process({'a': math.nan, 'b': "error", 'x': 7})
+        assert math.isnan(result['a'])
+        assert result['b'] == "error" and result['x'] == 7
+        assert bank.process({'a': 2})['a'] == 1  # state unchanged
+
+    def test_unfiltered_unchanged(self):
+        data = {'a': 1}
+        assert signalFilter.FilterBank().process(data) is data
+
+    def test_invalid_configuration(self, bank):
+        with pytest.raises(ValueError):
+            bank.configure({'a': "ema:5"})
+        assert bank.channels == ['a', 'b', 'c', 'd']
@@ -0,0 +1,120 @@
+"""
+Test for the storagePolicy.py.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from controllerData import storagePolicy
+from controllerData.storagePolicy import Decimator
+
+
+def test_all():
+    assert storagePolicy.All().add(5, 0) == (True, 5)
+
+
+def test_every():
+    policy = storagePolicy.Every(3)
+    assert [policy.add(i, i)[0] for i in range(7)] == [True, False, False, True, False, False,
+                                                       True]
+
+
+class Test_Aggregate:
+    @pytest.fixture
+    def mean(self):
+        return storagePolicy.Aggregate(np.mean, interval=10)
+
+    def test_waiting(self, mean):
+        assert mean.add(1, 0) == (False, None)
+        assert mean.add(2, 5) == (False, None)
+
+    def test_mean(self, mean):
+        for i in range(10):
+            mean.add(i, i)
+        assert mean.add(10, 10) == (True, 5)
+
+    def test_restart(self, mean):
+        mean.add(1, 0)
+        mean.add(3, 10)
+        assert mean.add(100, 15) == (False, None)
+        assert mean.add(200, 20) == (True, 150)
+
+    def test_ignore_nan(self, mean):
+        mean.add(math.nan, 0)
+        assert mean.add(4, 10) == (True, 4)
+
+    def test_only_nan(self, mean):
+        mean.add(math.nan, 0)
+        assert math.isnan(mean.add(math.nan, 10)[1])
+
+    def test_non_number(self, mean):
+        mean.add("a", 0)
+        assert mean.add("b", 10) == (True, "b")
+
+
+def test_createPolicy_invalid():
+    with pytest.raises(ValueError):
+        storagePolicy.createPolicy("invalid")
+
+
+class Test_Decimator:
+    def test_default_all(self):
+        decimator = Decimator()
+        assert decimator.process({'a': 1, 'b': 2}, 0) == {'a': 1, 'b': 2}
+
+    def test_invalid_default(self):
+        with pytest.raises(ValueError):
+            Decimator(policy="invalid")
+
+    def test_invalid_channel(self):
+        with pytest.raises(ValueError):
+            Decimator().configure('a', policy="invalid")
+
+    def test_channel_policy(self):
+        decimator = Decimator()
+        decimator.configure('a', policy='max', interval=2)
+        results = [decimator.process({'a': i, 'b': i}, i) for i in range(3)]
+        assert results == [{'b': 0}, {'b': 1}, {'a': 2, 'b': 2}]
+
+    def test_every_default(self):
+        decimator = Decimator(policy='every', n=2)
+        results = [decimator.process({'a': i}, i) for i in range(4)]
+        assert results == [{'a': 0}, {}, {'a': 2}, {}]
+
+    def test_change(self):
+        decimator = Decimator(policy='change', deadband=0.5, interval=100)
+        assert decimator.process({'a': 1}, 0) == {'a': 1}
+        assert decimator.process({'a': 1.2}, 1) == {}
+        assert decimator.process({'a': 2}, 2) == {'a': 2}
+        assert decimator.process({'a': 2}, 100) == {'a': 2}  # keyframe
+
+    def test_change_channel_deadband(self):
+        decimator = Decimator(policy='change', interval=100)
+        decimator.configure('a', deadband=1)
+        decimator.process({'a': 1, 'b': 1}, 0)
+        assert decimator.process({'a': 1.5, 'b': 1.5}, 1) == {'b': 1.5}
+
+    def test_change_channel_interval(self):
+        decimator = Decimator(policy='change', interval=100)
+        decimator.configure('a', interval=10)
+        decimator.process({'a': 1, 'b': 1}, 0)
+        assert decimator.process({'a': 1, 'b': 1}, 10) == {'a': 1}  # keyframe of 'a'
+
+    def test_change_cached(self):
+        decimator = Decimator(policy='change')
+        decimator.process({'a': 1}, 0)
+        assert isinstance(decimator.policies['a'], storagePolicy.Change)
+
+    def test_reset_to_default(self):
+        decimator = Decimator()
+        decimator.configure('a', policy='every', n=5)
+        decimator.configure('a')
+        assert decimator.getParameters('a')['policy'] == 'all'
+
+    def test_statistics(self):
+        decimator = Decimator(policy='every', n=2)
+        decimator.process({'a': 0, 'b': 0}, 0)
+        decimator.process({'a': 0, 'b': 0}, 1)
+        assert decimator.statistics == {'received': 4, 'stored': 2}
@@ -0,0 +1,161 @@
+"""
+Test for the tableSchema.py.
+"""
+
+import json
+import math
+
+import pytest
+
+from controllerData.tableSchema import TableSchema, columnType
+
+
+class Mock_Cursor:
+    def __init__(self, parent):
+        self.parent = parent
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, parameters=None):
+        self.parent.queries.append((query, parameters))
+        if self.parent.fail:
+            raise ValueError("fail")
+        if query.startswith("ALTER TABLE"):
+            self.parent.columns.append(query.split()[-2])
+
+    def fetchall(self):
+        return [(column,) for column in self.parent.columns]
+
+
+class Mock_Database:
+    def __init__(self, columns=("timestamp", "temperature", "pressure")):
+        self.columns = list(columns)
+        self.queries = []
+        self.fail = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return Mock_Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def database():
+    return Mock_Database()
+
+
+@pytest.mark.parametrize("value, typ", ((True, "boolean"), (5, "double precision"),
+                                        (1.5, "double precision"), ("a", "text")))
+def test_columnType(value, typ):
+    assert columnType(value) == typ
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        TableSchema(mode="invalid")
+
+
+def test_known_keys(database):
+    schema = TableSchema()
+    data = {'temperature': 5, 'Pressure': 1000}
+    assert schema.adjust(database, "room", data) == data
+
+
+def test_columns_cached(database):
+    schema = TableSchema()
+    schema.adjust(database, "room", {'temperature': 5})
+    schema.adjust(database, "room", {'temperature': 6, 'new': 7})
+    assert len(database.queries) == 1
+
+
+def test_schema_table(database):
+    TableSchema().adjust(database, "lab.Room", {'temperature': 5})
+    assert database.queries[0][1] == ("room", "lab")
+
+
+class Test_drop:
+    def test_dropped(self, database):
+        schema = TableSchema(mode='drop')
+        assert schema.adjust(database, "room", {'temperature': 5, 'new': 7}) == {
+            'temperature': 5}
+
+    def test_warn_once(self, database, caplog):
+        schema = TableSchema(mode='drop')
+        schema.adjust(database, "room", {'new': 7})
+        schema.adjust(database, "room", {'new': 7})
+        assert caplog.text.count("Key 'new'") == 1
+
+
+class Test_add:
+    def test_added(self, database):
+        schema = TableSchema(mode='add')
+        assert schema.adjust(database, "room", {'temperature': 5, 'new': 7}) == {
+            'temperature': 5, 'new': 7}
+        assert database.queries[-1][0] == (
+            "ALTER TABLE room ADD COLUMN IF NOT EXISTS new double precision")
+        assert 'new' in schema.columns['room']
+
+    def test_invalid_identifier_dropped(self, database):
+        schema = TableSchema(mode='add')
+        assert schema.adjust(database, "room", {'a b': 7}) == {}
+
+    def test_add_fails(self, database):
+        schema = TableSchema(mode='add')
+        schema.adjust(database, "room", {})
+        database.fail = True
+        assert schema.adjust(database, "room", {'new': 7}) == {}
+        assert database.rollbacks == 1
+
+
+class Test_overflow:
+    def test_overflow(self, database):
+        database.columns.append("overflow")
+        schema = TableSchema(mode='overflow')
+        result = schema.adjust(database, "room", {'temperature': 5, 'new': 7, 'x': math.nan})
+        assert result['temperature'] == 5
+        assert json.loads(result['overflow']) == {'new': 7, 'x': None}
+
+    def test_overflow_column_added(self, database):
+        schema = TableSchema(mode='overflow')
+        schema.adjust(database, "room", {'new': 7})
+        assert database.queries[-1][0].endswith("overflow jsonb")
+
+
+class Test_lookup_failure:
+    @pytest.fixture
+    def schema(self, database):
+        database.fail = True
+        schema = TableSchema(retry_interval=100)
+        return schema
+
+    def test_insert_everything(self, schema, database):
+        data = {'new': 7}
+        assert schema.adjust(database, "room", data) == data
+        assert database.rollbacks == 1
+
+    def test_no_retry(self, schema, database):
+        schema.adjust(database, "room", {})
+        schema.adjust(database, "room", {})
+        assert len(database.queries) == 1
+
+    def test_failure_time_missing(self, schema, database):
+        schema.adjust(database, "room", {})
+        schema.failed.clear()  # invalidated concurrently
+        schema.adjust(database, "room", {})
+        assert len(database.queries) == 2
+
+    def test_invalidate(self, schema, database):
+        schema.adjust(database, "room", {})
+        schema.invalidate("room")
+        schema.adjust(database, "room", {})
+        assert len(database.queries) == 2
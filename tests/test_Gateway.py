@@ -0,0 +1,172 @@
+"""
+Test for the Gateway.py file.
+"""
+
+import pickle
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from devices import intercom
+from devices.intercom import Publisher
+
+import Gateway
+from Gateway import Node
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+class FakeNodeHandler(socketserver.BaseRequestHandler):
+    """Answer like the listener of a controller."""
+
+    def handle(self):
+        typ, content = intercom.readMessage(self.request)
+        self.server.requests.append((typ, pickle.loads(content)))
+        if typ == 'GET':
+            data = {key: f"value of {key}" for key in pickle.loads(content)}
+            intercom.sendMessage(self.request, 'SET', pickle.dumps(data))
+        elif typ == 'CMD' and pickle.loads(content)[0] == 'invalid':
+            intercom.sendMessage(self.request, 'ERR', b"No pid name given.")
+        else:
+            intercom.sendMessage(self.request, 'ACK')
+
+
+@pytest.fixture
+def fake_node():
+    server = socketserver.ThreadingTCPServer(("localhost", 0), FakeNodeHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def gateway(fake_node):
+    nodes = [Node("room1", "localhost", port=fake_node.server_address[1], timeout=1),
+             Node("room2", "localhost", port=free_port(), timeout=1)]
+    gateway = Gateway.Gateway(nodes, port=None, publisher_port=None, timeout=2)
+    yield gateway
+    gateway.stop()
+
+
+def test_split_key():
+    assert Gateway.split_key("room1/pid0/Kp") == ("room1", "pid0/Kp")
+
+
+def test_split_key_invalid():
+    with pytest.raises(ValueError):
+        Gateway.split_key("room1")
+
+
+def test_parse_node():
+    node = Gateway.parse_node("room1=192.168.1.5:22005")
+    assert (node.name, node.host, node.port) == ("room1", "192.168.1.5", 22005)
+
+
+def test_node_name_without_slash():
+    with pytest.raises(ValueError):
+        Node("a/b", "localhost")
+
+
+class Test_merged_view:
+    @pytest.fixture(autouse=True)
+    def data(self, gateway):
+        gateway.handle_data(gateway.nodes['room1'], 'temperature', 21.5)
+        gateway.handle_data(gateway.nodes['room2'], 'temperature', 19)
+
+    def test_get_current_data(self, gateway):
+        assert gateway.get_current_data() == {'room1/temperature': 21.5,
+                                              'room2/temperature': 19}
+
+    def test_get_snapshots(self, gateway):
+        assert gateway.get_snapshots()['room2'] == {'temperature': 19}
+
+    def test_get_nodes(self, gateway):
+        state = gateway.get_nodes()['room1']
+        assert state['age'] < 1
+        assert state['errors'] == 0
+
+    def test_get_values_data(self, gateway):
+        assert gateway.get_values(['data'])['data'] == gateway.get_current_data()
+
+
+class Test_forwarding:
+    def test_get_values(self, gateway, fake_node):
+        result = gateway.get_values(['room1/pid0/Kp', 'room1/log'])
+        assert result == {'room1/pid0/Kp': "value of pid0/Kp", 'room1/log': "value of log"}
+        assert fake_node.requests == [('GET', ['pid0/Kp', 'log'])]
+
+    def test_unknown_node(self, gateway):
+        with pytest.raises(KeyError):
+            gateway.get_values(['room9/data'])
+
+    def test_set_values(self, gateway, fake_node):
+        gateway.set_values({'room1/pid0/setpoint': 20})
+        assert fake_node.requests == [('SET', {'pid0/setpoint': 20})]
+
+    def test_execute(self, gateway, fake_node):
+        gateway.execute('room1/pid0', 'reset')
+        assert fake_node.requests == [('CMD', ('pid0', 'reset'))]
+
+    def test_execute_error(self, gateway):
+        with pytest.raises(ConnectionError, match="No pid name"):
+            gateway.execute('room1/invalid', 'reset')
+
+    def test_unreachable_node(self, gateway):
+        with pytest.raises(ConnectionError):
+            gateway.set_values({'room2/pid0/setpoint': 20})
+        assert gateway.nodes['room2'].errors == 1
+
+    def test_fan_out_parallel(self, gateway, fake_node):
+        gateway.nodes['room2'].port = fake_node.server_address[1]
+        responses = gateway.fan_out('GET', {'room1': ['a'], 'room2': ['b']})
+        assert responses == {'room1': ('SET', {'a': "value of a"}),
+                             'room2': ('SET', {'b': "value of b"})}
+
+
+class Test_intercom_server:
+    @pytest.fixture
+    def server(self, fake_node):
+        nodes = [Node("room1", "localhost", port=fake_node.server_address[1], timeout=1)]
+        gateway = Gateway.Gateway(nodes, port=free_port(), publisher_port=None)
+        gateway.handle_data(nodes[0], 'temperature', 21.5)
+        gateway.start()
+        yield intercom.Intercom("localhost", gateway.server.server_address[1], timeout=2)
+        gateway.stop()
+
+    def test_get_data(self, server):
+        assert server.sendObject('GET', ['data']) == ('SET',
+                                                      {'data': {'room1/temperature': 21.5}})
+
+    def test_forward(self, server, fake_node):
+        assert server.sendObject('SET', {'room1/readoutInterval': 1000}) == ('ACK', b"")
+        assert fake_node.requests == [('SET', {'readoutInterval': 1000})]
+
+    def test_error(self, server):
+        typ, content = server.sendObject('SET', {'room9/readoutInterval': 1000})
+        assert typ == 'ERR'
+
+
+def test_subscribe():
+    port = free_port()
+    publisher = Publisher(port=port, standalone=True)
+    node = Node("room1", "localhost", publisher_port=port)
+    gateway = Gateway.Gateway([node], port=None, publisher_port=None)
+    gateway.start()
+    try:
+        for _ in range(50):
+            publisher({'temperature': 20.5})
+            time.sleep(0.05)
+            if node.data:
+                break
+        assert node.data == {'temperature': 20.5}
+    finally:
+        gateway.stop()
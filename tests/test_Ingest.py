@@ -0,0 +1,170 @@
+"""
+Test for the Ingest.py file.
+"""
+
+import datetime
+import math
+import pickle
+import socket
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from devices.intercom import Publisher
+
+import Ingest
+
+
+class Mock_Cursor:
+    def __init__(self, parent):
+        self.parent = parent
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def copy_expert(self, sql, file):
+        if "fail" in sql:
+            raise psycopg2.errors.UndefinedTable("fail")
+        if "lost" in sql:
+            raise psycopg2.OperationalError("lost")
+        self.parent.copied.append((sql, file.read()))
+
+
+class Mock_Database:
+    def __init__(self):
+        self.copied = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return Mock_Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.copied.clear()
+
+    def close(self):
+        pass
+
+
+timestamp = datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+
+def snapshot(table="room", data={'temperature': 20.5}):
+    return pickle.dumps({'table': table, 'timestamp': timestamp, 'data': data})
+
+
+@pytest.fixture
+def ingest():
+    ingest = Ingest.Ingest({}, batch_size=3, flush_interval=0, max_queue=5)
+    ingest.database = Mock_Database()
+    return ingest
+
+
+def test_toCSV():
+    text = Ingest.toCSV([{'timestamp': timestamp, 'a': 1.5, 'b': None, 'c': math.nan}],
+                        ("timestamp", "a", "b", "c"))
+    assert text.read() == "2024-01-02T03:04:05,1.5,,NaN\r\n"
+
+
+def test_parse_address():
+    assert Ingest.parse_address("host") == "host:11097"
+    assert Ingest.parse_address("host:123") == "host:123"
+
+
+class Test_handle_snapshot:
+    def test_queued(self, ingest):
+        ingest.handle_snapshot(snapshot())
+        assert ingest.queue.get_nowait() == ("room", timestamp, {'temperature': 20.5})
+
+    def test_invalid(self, ingest):
+        ingest.handle_snapshot(pickle.dumps({'data': 5}))
+        assert ingest.statistics['invalid'] == 1
+
+    def test_backpressure(self, ingest):
+        for _ in range(7):
+            ingest.handle_snapshot(snapshot())
+        assert ingest.get_statistics()['queued'] == 5
+        assert ingest.statistics['dropped'] == 2
+
+
+def test_collect_batch_size(ingest):
+    for _ in range(4):
+        ingest.handle_snapshot(snapshot())
+    assert len(ingest.collect()) == 3
+    assert len(ingest.collect()) == 1
+
+
+def test_group():
+    batch = [("a", timestamp, {'x': 1}), ("b", timestamp, {'x': 2}),
+             ("a", timestamp, {'x': 3}), ("a", timestamp, {'x': 4, 'y': 5})]
+    groups = Ingest.Ingest.group(batch)
+    assert len(groups[("a", ("timestamp", "x"))]) == 2
+    assert len(groups) == 3
+
+
+class Test_writeBatch:
+    def test_one_transaction(self, ingest):
+        ingest.writeBatch([("a", timestamp, {'x': 1}), ("b", timestamp, {'x': 2}),
+                           ("a", timestamp, {'x': 3})])
+        assert ingest.database.commits == 1
+        assert ingest.database.copied == [
+            ("COPY a (timestamp, x) FROM STDIN WITH (FORMAT csv)",
+             "2024-01-02T03:04:05,1\r\n2024-01-02T03:04:05,3\r\n"),
+            ("COPY b (timestamp, x) FROM STDIN WITH (FORMAT csv)", "2024-01-02T03:04:05,2\r\n"),
+        ]
+        assert ingest.statistics['written'] == 3
+
+    def test_failing_table(self, ingest, caplog):
+        ingest.writeBatch([("fail", timestamp, {'x': 1}), ("b", timestamp, {'x': 2})])
+        assert ingest.database.copied[0][1] == "2024-01-02T03:04:05,2\r\n"
+        assert ingest.statistics['written'] == 1
+        assert ingest.statistics['errors'] == 1
+        assert "'fail' failed" in caplog.text
+
+    def test_invalid_identifier(self, ingest):
+        ingest.writeBatch([("a; DROP TABLE b", timestamp, {'x': 1})])
+        assert ingest.database.copied == []
+        assert ingest.statistics['errors'] == 1
+
+    def test_connection_lost(self, ingest, monkeypatch):
+        monkeypatch.setattr(ingest, "connectDatabase", lambda: False)
+        batch = [("lost", timestamp, {'x': 1})]
+        ingest.writeBatch(batch)
+        assert ingest.pending == batch
+        assert ingest.statistics['written'] == 0
+
+
+def test_write_thread(ingest):
+    ingest.handle_snapshot(snapshot())
+    ingest._stop.set()
+    ingest.write()  # writes the remaining rows and returns
+    assert ingest.statistics['written'] == 1
+
+
+def test_receive():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        port = s.getsockname()[1]
+    publisher = Publisher(port=port, standalone=True)
+    ingest = Ingest.Ingest({}, addresses=[f"localhost:{port}"])
+    thread = threading.Thread(target=ingest.receive, daemon=True)
+    thread.start()
+    try:
+        for _ in range(50):
+            publisher.send_snapshot({'table': "room", 'timestamp': timestamp, 'data': {'x': 1}})
+            time.sleep(0.05)
+            if ingest.statistics['received']:
+                break
+        assert ingest.queue.get_nowait() == ("room", timestamp, {'x': 1})
+    finally:
+        ingest._stop.set()
+        thread.join()
@@ -6,6 +6,10 @@ Test for the TemperatureController.py file.
 Created on Sat Jun 19 08:17:59 2021 by Benedikt Moneke
 """
 
+import math
+import threading
+import time
+
 # the test framework
 import pytest
 
@@ -14,7 +18,7 @@ from qtpy import QtCore
 import psycopg2
 from simple_pid import PID
 
-from controllerData import listener
+from controllerData import changeDetector, listener, storagePolicy
 from controllerData.ioDefinition import tf
 try:
     from controllerData import connectionData
@@ -31,12 +35,14 @@ class Mock_Controller(TemperatureController):
         self.test_output = {}
 
         self.publisher = lambda v: v
+        self.alarmPublisher = Mock_Publisher()
 
     def __del__(self):
         pass
 
     def setOutput(self, name, value):
         self.test_output[name] = value
+        return True
 
     def writeDatabase(self, data):
         self.test_database = data
@@ -50,6 +56,13 @@ class Mock_Controller(TemperatureController):
     def connectDatabase(self):
         return
 
+    def connectDatabaseInBackground(self):
+        return
+
+    def setupCheckpoint(self):
+        self.checkpoint = None
+        self.last_checkpoint = 0
+
 
 class Mock_App:
     def __init__(self):
@@ -112,6 +125,7 @@ class Mock_InputOutput:
 
     def setOutput(self, name, value):
         self.test_output[name] = value
+        return True
 
 
 class Cursor:
@@ -223,6 +237,36 @@ class Test_connectDatabase:
         assert not hasattr(controller, 'database')
 
 
+class Test_connectDatabaseInBackground:
+    def test_not_replaced_in_thread(self, controller, connection, monkeypatch):
+        new = type(connection)()
+        monkeypatch.setattr('psycopg2.connect', lambda **kwargs: new)
+        controller.database = connection
+        TemperatureController.connectDatabaseInBackground(controller)
+        while controller._database_lock.locked():
+            time.sleep(0.001)
+        assert controller.database is connection
+        assert connection.open
+
+    def test_swapped_in_qt_thread(self, controller, connection, monkeypatch, qtbot):
+        new = type(connection)()
+        monkeypatch.setattr('psycopg2.connect', lambda **kwargs: new)
+        controller.database = connection
+        TemperatureController.connectDatabaseInBackground(controller)
+        qtbot.waitUntil(lambda: controller.database is new)
+        assert not connection.open
+        assert new.open
+
+    def test_failed(self, controller, connection, monkeypatch, qtbot):
+        def raising(**kwargs):
+            raise TypeError('test')
+        monkeypatch.setattr('psycopg2.connect', raising)
+        controller.database = connection
+        with qtbot.assertNotEmitted(controller.databaseConnected, wait=50):
+            TemperatureController.connectDatabaseInBackground(controller)
+        assert controller.database is connection
+
+
 class Test_setupPID_defaults:
     @pytest.fixture(autouse=True)
     def pid(self, controller: TemperatureController, caplog):
@@ -311,6 +355,117 @@ class Test_setupPID_settings:
         assert controller.pidSensor['0'] == ["sensor0", "sensor1"]
 
 
+class Test_set_PIDs_configuration:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.pids = {'0': PID(output_limits=(0, 10)), '1': PID()}
+        controller.pidState = {'0': 0, '1': 0}
+        self.settings = settings
+        yield
+        settings.clear()
+
+    def test_apply(self, controller, qtbot):
+        with qtbot.waitSignal(controller.pidsChanged) as blocker:
+            controller.set_PIDs_configuration({'0': {'Kp': 5, 'upperLimit': 20, 'state': 2},
+                                               '1': {'sensors': ["a"], 'setpoint': 3}})
+        assert blocker.args == [['0', '1']]
+        assert controller.pids['0'].Kp == 5
+        assert controller.pids['0'].output_limits == (0, 20)
+        assert controller.pidState['0'] == 2
+        assert controller.pids['1'].setpoint == 3
+        assert controller.pidSensor['1'] == ["a"]
+
+    def test_write_behind(self, controller):
+        controller.set_PIDs_configuration({'0': {'Kp': 5}, '1': {'sensors': ["a", "b"]}})
+        assert self.settings.value('pid0/Kp') is None
+        controller.settingsWriter.flush()
+        assert self.settings.value('pid0/Kp', type=float) == 5
+        assert self.settings.value('pid1/sensor') == "a,b"
+
+    def test_invalid_changes_nothing(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_PIDs_configuration({'0': {'Kp': 5}, '1': {'state': 7}})
+        assert controller.pids['0'].Kp == 1
+        assert controller.settingsWriter.pending == {}
+
+    def test_invalid_limits_changes_nothing(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_PIDs_configuration({'1': {'Kp': 5}, '0': {'lowerLimit': 11}})
+        assert controller.pids['1'].Kp == 1
+
+    def test_set_PID_settings(self, controller):
+        controller.set_PID_settings('0', lower_limit=-math.inf, Kp=2)
+        assert controller.pids['0'].output_limits == (None, 10)
+        assert controller.pids['0'].Kp == 2
+
+
+class Test_autotune:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.settings = settings
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids = {'0': PID(setpoint=1, output_limits=(-5, 5))}
+        controller.pidSensor = {'0': ['1']}
+        controller.pidState = {'0': 2}
+        controller.pidOutput = {'0': 'out0'}
+        yield
+        settings.clear()
+
+    def test_relay_output(self, controller):
+        controller.start_autotune(0, amplitude=2, bias=0)
+        controller.inputOutput.getSensors = lambda: {'1': 0}  # below setpoint: heat
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output['out0'] == 2
+        controller.inputOutput.getSensors = lambda: {'1': 2}
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output['out0'] == -2
+
+    def test_not_controlling(self, controller):
+        controller.pidState['0'] = 1
+        with pytest.raises(ValueError):
+            controller.start_autotune(0, amplitude=2)
+
+    def test_stop(self, controller):
+        controller.start_autotune(0, amplitude=2, bias=0)
+        TemperatureController.readTimeout(controller)
+        controller.stop_autotune(0)
+        assert controller.get_autotune_result(0)['state'] == 'aborted'
+        assert controller.pids['0'].auto_mode
+
+    def test_result_apply(self, controller, monkeypatch):
+        controller.start_autotune(0, amplitude=2, bias=0)
+        tuner = controller.autotuners['0']
+        tuner.state = 'done'
+        monkeypatch.setattr(tuner, "result",
+                            lambda rule: {'Ku': 1, 'Tu': 2, 'Kp': 3, 'Ki': 4, 'Kd': 5})
+        result = controller.get_autotune_result(0, apply=True)
+        assert result['Kp'] == 3
+        assert controller.pids['0'].tunings == (3, 4, 5)
+
+    def test_result_unknown(self, controller):
+        with pytest.raises(ValueError):
+            controller.get_autotune_result(0)
+
+
+def test_rpc_mutators_inline(controller, empty):
+    empty.message_handler = empty
+    empty.rpc = empty
+    empty.process_request = lambda request: None
+    controller.leco_listener = empty
+    controller.setup_rpc_dispatcher()
+    try:
+        for name in ("reset_PID", "setOutput", "set_output_parameters", "set_storage_policy",
+                     "set_publisher_parameters", "set_database_table",
+                     "set_database_schema_mode"):
+            assert name in controller.rpcDispatcher.inline
+    finally:
+        controller.rpcDispatcher.close()
+
+
 def test_sendSensorCommand(controller, mock_io):
     TemperatureController.sendSensorCommand(controller, 'valid')
     # assert no error
@@ -345,26 +500,486 @@ class Test_readoutTimeout:
         TemperatureController.readTimeout(controller)
         assert controller.test_output['out0'] == 0
 
+    def test_pid_output_unchanged(self, controller, pid_sensor):
+        controller.pidState['0'] = 2
+        controller.pidOutput['0'] = 'out0'
+        TemperatureController.readTimeout(controller)
+        controller.test_output.clear()
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output == {}
+        assert controller.outputManager.statistics['out0']['suppressed'] == 1
+
     def test_pid_second_sensor(self, controller, pid):
         controller.pidSensor['0'] = ['missing', '1']
         TemperatureController.readTimeout(controller)
         assert controller.test_database['pidOutput0'] == 1
 
 
+class Test_readoutTimeout_controlGraph:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.settings = settings
+        controller.inputOutput = Mock_InputOutput()
+        # '1' is the outer PID, setting the setpoint of '0'.
+        controller.pids = {'0': PID(1, 0, 0, setpoint=0, sample_time=None),
+                           '1': PID(2, 0, 0, setpoint=3, sample_time=None)}
+        controller.pidSensor = {'0': ['0'], '1': ['1']}
+        controller.pidState = {'0': 2, '1': 0}
+        controller.pidOutput = {'0': 'out0', '1': 'out1'}
+        yield
+        settings.clear()
+
+    def test_cascade(self, controller):
+        controller.set_PIDs_configuration({'0': {'setpointSource': '1'}})
+        TemperatureController.readTimeout(controller)
+        assert controller.pids['0'].setpoint == 4  # 2 * (3 - 1)
+        assert controller.test_output == {'out0': 4}  # 1 * (4 - 0)
+
+    def test_cycle(self, controller):
+        controller.set_PIDs_configuration({'0': {'setpointSource': '1'}})
+        with pytest.raises(ValueError):
+            controller.set_PIDs_configuration({'1': {'setpointSource': '0'}})
+        assert controller.pidSetpointSource['1'] == ""
+
+    def test_feedforward(self, controller):
+        controller.set_PIDs_configuration({'0': {'feedforward': '1', 'feedforwardGain': -2,
+                                                 'feedforwardReference': 0.5}})
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output == {'out0': -1}  # 1 * (0 - 0) - 2 * (1 - 0.5)
+
+
+class Test_readoutTimeout_sensorFusion:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.settings = settings
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids = {'0': PID(1, 0, 0, setpoint=0, sample_time=None)}
+        controller.pidState = {'0': 2}
+        controller.pidOutput = {'0': 'out0'}
+        yield
+        settings.clear()
+
+    def test_mean(self, controller):
+        controller.set_PIDs_configuration({'0': {'sensors': "mean: 0, 1*3"}})
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output == {'out0': -0.75}
+
+    def test_fallback(self, controller):
+        controller.pidSensor = {'0': ['5', '1']}
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output == {'out0': -1}
+        assert controller.get_sensor_health()['5']['reason'] == "missing"
+
+    def test_out_of_range(self, controller):
+        QtCore.QSettings().setValue('fusion/minimum', 0.5)
+        controller.setupFusion()
+        controller.pidSensor = {'0': ['median:0', '1']}
+        TemperatureController.readTimeout(controller)
+        assert controller.test_output == {'out0': -1}
+
+    def test_invalid_mode(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_PIDs_configuration({'0': {'sensors': "vote:0,1"}})
+
+
+class Test_readoutTimeout_filters:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.inputOutput = Mock_InputOutput()
+        yield
+        settings.clear()
+
+    def test_filtered(self, controller):
+        controller.set_filter('1', "ema:0.5")
+        controller.filterBank.process({'1': 3})
+        TemperatureController.readTimeout(controller)
+        assert controller.data['1'] == 2
+
+    def test_raw(self, controller):
+        QtCore.QSettings().setValue('filters/raw', True)
+        controller.set_filter('1', "ema:0.5")
+        controller.filterBank.process({'1': 3})
+        TemperatureController.readTimeout(controller)
+        assert controller.data['raw1'] == 1
+
+    def test_remove(self, controller):
+        controller.set_filter('1', "ema:0.5")
+        controller.set_filter('1')
+        assert controller.filterBank.channels == []
+
+    def test_invalid(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_filter('1', "ema:5")
+
+
+class Mock_Publisher:
+    def __init__(self):
+        self.data = []
+        self.snapshots = []
+
+    def __call__(self, data):
+        self.data.append(data)
+
+    def send_snapshot(self, data, topic="snapshot"):
+        self.snapshots.append((topic, data))
+
+
+class Test_readoutTimeout_alarms:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.settings = settings
+        controller.inputOutput = Mock_InputOutput()
+        controller.publisher = Mock_Publisher()
+        controller.alarmPublisher = Mock_Publisher()
+        yield
+        settings.clear()
+
+    def test_raised(self, controller):
+        controller.set_alarm('hot', 'high', channel='1', limit=0.5)
+        TemperatureController.readTimeout(controller)
+        assert controller.get_alarms()['hot']['value'] == 1
+        assert controller.alarmPublisher.snapshots[0][0] == "alarm"
+
+    def test_data_stream_numeric(self, controller):
+        controller.set_alarm('hot', 'high', channel='1', limit=0.5)
+        TemperatureController.readTimeout(controller)
+        assert controller.alarmPublisher.snapshots
+        assert controller.publisher.snapshots == []
+        for data in controller.publisher.data:
+            assert all(isinstance(value, (int, float)) for value in data.values())
+
+    def test_saturation(self, controller):
+        controller.pids = {'0': PID(1, 0, 0, setpoint=5, sample_time=None,
+                                    output_limits=(0, 2))}
+        controller.pidSensor = {'0': ['0']}
+        controller.pidState = {'0': 2}
+        controller.pidOutput = {'0': 'out0'}
+        controller.set_alarm('sat', 'saturation', channel='0', limit=0.5)
+        TemperatureController.readTimeout(controller)
+        assert 'sat' in controller.get_alarms()
+
+    def test_removed(self, controller):
+        controller.set_alarm('hot', 'high', channel='1', limit=0.5)
+        controller.set_alarm('hot')
+        TemperatureController.readTimeout(controller)
+        assert controller.get_alarms() == {}
+        assert controller.alarmPublisher.snapshots == []
+
+    def test_invalid(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_alarm('hot', 'hot', channel='1')
+
+
+class Test_readoutTimeout_schedules:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        controller.settings = settings
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids = {'0': PID(1, 0, 0, setpoint=0, sample_time=None)}
+        controller.pidSensor = {'0': ['0']}
+        controller.pidState = {'0': 2}
+        controller.pidOutput = {'0': 'out0'}
+        yield
+        settings.clear()
+
+    def test_single_run(self, controller):
+        controller.set_setpoint_schedule('0', [[0, 5], [3600, 6]])
+        TemperatureController.readTimeout(controller)
+        assert controller.pids['0'].setpoint == 5
+        assert controller.test_output == {'out0': 5}
+        assert controller.settingsWriter.value('pid0/setpoint') == 5
+
+    def test_restored(self, controller):
+        controller.set_setpoint_schedule('0', [["00:00", 7]], period='daily')
+        controller.schedules.clear()
+        controller.setupSchedules()
+        TemperatureController.readTimeout(controller)
+        assert controller.pids['0'].setpoint == 7
+
+    def test_removed(self, controller):
+        controller.set_setpoint_schedule('0', [[0, 5]], period='daily')
+        controller.set_setpoint_schedule('0')
+        controller.setupSchedules()
+        assert controller.get_setpoint_schedule('0') is None
+
+    def test_ramp(self, controller):
+        controller.start_setpoint_ramp('0', target=10, rate=1)
+        TemperatureController.readTimeout(controller)
+        assert 0 <= controller.pids['0'].setpoint < 0.1
+        assert controller.get_setpoint_schedule('0')['setpoints'] == [0, 10]
+
+    def test_finished(self, controller):
+        controller.start_setpoint_ramp('0', target=10, rate=1)
+        controller.schedules['0'].start -= 3600
+        TemperatureController.readTimeout(controller)
+        assert controller.pids['0'].setpoint == 10
+        assert controller.schedules == {}
+        assert not QtCore.QSettings().contains('schedules/0')
+
+    def test_unknown_pid(self, controller):
+        with pytest.raises(ValueError):
+            controller.set_setpoint_schedule('5', [[0, 5]])
+
+
+class Test_readoutTimeout_storage:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller):
+        controller.inputOutput = Mock_InputOutput()
+
+    def test_stored(self, controller):
+        controller.storage = storagePolicy.Decimator(policy='every', n=2)
+        TemperatureController.readTimeout(controller)
+        assert controller.test_database == {'0': 0, '1': 1}
+
+    def test_not_stored(self, controller):
+        controller.storage = storagePolicy.Decimator(policy='every', n=2)
+        TemperatureController.readTimeout(controller)
+        controller.test_database = None
+        TemperatureController.readTimeout(controller)
+        assert controller.test_database is None
+
+
+class Test_readoutTimeout_adaptive:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, monkeypatch):
+        settings = QtCore.QSettings('NLOQO', "tests")
+        monkeypatch.setattr('qtpy.QtCore.QSettings', lambda: settings)
+        settings.setValue('readoutInterval', 1000)
+        settings.setValue('readout/adaptive', True)
+        settings.setValue('readout/maxInterval', 4)
+        settings.setValue('readout/factor', 2)
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids = {'0': PID(setpoint=1)}
+        controller.pidSensor = {'0': ['1']}
+        controller.pidState = {'0': 2}
+        controller.pidOutput = {'0': 'out0'}
+        controller.setupReadout()
+        yield
+        settings.clear()
+
+    def test_stretch(self, controller):
+        for i in range(3):
+            TemperatureController.readTimeout(controller)
+        assert controller.get_effective_readout_interval() == 4  # maximum
+
+    def test_large_error(self, controller):
+        controller.pids['0'].setpoint = 5
+        for i in range(3):
+            TemperatureController.readTimeout(controller)
+        assert controller.get_effective_readout_interval() == 1
+
+    def test_setpoint_change_tightens(self, controller):
+        for i in range(3):
+            TemperatureController.readTimeout(controller)
+        controller.set_PIDs_configuration({'0': {'setpoint': 1.05}})
+        assert controller.get_effective_readout_interval() == 1
+
+    def test_disable(self, controller):
+        for i in range(3):
+            TemperatureController.readTimeout(controller)
+        controller.set_readout_interval(adaptive=False)
+        assert controller.adaptiveInterval is None
+        assert controller.get_effective_readout_interval() == 1
+
+    def test_set_bounds(self, controller):
+        controller.set_readout_interval(0.5, minimum=0.2, maximum=10)
+        assert controller.adaptiveInterval.minimum == 0.2
+        assert controller.adaptiveInterval.maximum == 10
+        assert controller.get_readout_interval() == 0.5
+
+
+class Test_readoutTimeout_changeOnly:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller):
+        controller.inputOutput = Mock_InputOutput()
+        controller.published = []
+        controller.publisher = controller.published.append
+        controller.publishDetector = changeDetector.ChangeDetector(keyframe_interval=1000)
+
+    def test_keyframe(self, controller):
+        TemperatureController.readTimeout(controller)
+        assert controller.published[0] == {'0': 0, '1': 1}
+
+    def test_unchanged(self, controller):
+        TemperatureController.readTimeout(controller)
+        controller.inputOutput.getSensors = lambda: {'0': 0, '1': 2}
+        TemperatureController.readTimeout(controller)
+        assert controller.published[-1] == {'1': 2}
+
+
+class Test_lastOutput:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller, mock_settings):
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids['0'] = lambda value: value
+        controller.pidSensor['0'] = ['1']
+        controller.pidState['0'] = 2
+        controller.pidOutput['0'] = 'out0'
+        controller.last_value_set = 0
+
+    def test_stored(self, controller):
+        TemperatureController.readTimeout(controller)
+        assert controller.settings.data['pid0/lastOutput'] == 1
+
+    def test_stored_only_once_a_minute(self, controller):
+        TemperatureController.readTimeout(controller)
+        controller.inputOutput.getSensors = lambda: {'1': 5}
+        TemperatureController.readTimeout(controller)
+        assert controller.settings.data['pid0/lastOutput'] == 1
+
+
+class Test_get_full_state:
+    @pytest.fixture(autouse=True)
+    def setup(self, controller):
+        controller.inputOutput = Mock_InputOutput()
+        controller.pids = {'0': PID(2, 0, 0, setpoint=1, output_limits=(None, 10))}
+        controller.pidSensor['0'] = ['1']
+        controller.pidState['0'] = 2
+        controller.pidOutput['0'] = 'out0'
+
+    def test_state(self, controller):
+        TemperatureController.readTimeout(controller)
+        state = controller.get_full_state()
+        assert state['version'] == 1
+        assert state['tick'] == controller.tick
+        assert state['data'] == {'0': 0, '1': 1, 'pidOutput0': 0}
+        assert state['pids']['0'] == {
+            'setpoint': 1, 'Kp': 2, 'Ki': 0, 'Kd': 0, 'lowerLimit': None, 'upperLimit': 10,
+            'autoMode': True, 'sensors': ['1'], 'output': 'out0', 'state': 2,
+            'components': (0, 0, 0), 'value': 0, 'setpointSource': "",
+            'feedforward': ("", 0, 0)}
+
+    def test_cached_during_tick(self, controller):
+        TemperatureController.readTimeout(controller)
+        assert controller.get_full_state() is controller.get_full_state()
+
+    def test_renewed_at_tick(self, controller):
+        TemperatureController.readTimeout(controller)
+        state = controller.get_full_state()
+        TemperatureController.readTimeout(controller)
+        assert controller.get_full_state()['tick'] == state['tick'] + 1
+
+
+class Test_provideFullState:
+    def test_from_listener_thread(self, controller, qtbot):
+        signals = listener.Listener.ListenerSignals()
+        signals.fullStateRequested.connect(controller.provideFullState,
+                                           QtCore.Qt.ConnectionType.BlockingQueuedConnection)
+        threads = []
+        original = controller.get_full_state
+
+        def get_full_state():
+            threads.append(threading.current_thread())
+            return original()
+        controller.get_full_state = get_full_state
+        container = {}
+        thread = threading.Thread(target=signals.fullStateRequested.emit, args=(container,))
+        thread.start()
+        qtbot.waitUntil(lambda: not thread.is_alive())
+        assert container['fullState']['version'] == 1
+        assert threads == [threading.main_thread()]
+
+
+class Mock_Checkpoint_Settings(Mock_Settings):
+    def __init__(self, data):
+        super().__init__(data)
+        self.group = ""
+
+    def beginGroup(self, group):
+        self.group = group + "/"
+
+    def value(self, key, defaultValue=None, type=None):
+        return super().value(self.group + key, defaultValue, type)
+
+    def fileName(self):
+        return self.data.get('fileName', "")
+
+
+class Test_checkpoint:
+    @pytest.fixture
+    def settings(self, monkeypatch, tmp_path):
+        data = {'checkpoint/file': str(tmp_path / "test.checkpoint")}
+        monkeypatch.setattr(QtCore, "QSettings", lambda: Mock_Checkpoint_Settings(data))
+        return data
+
+    @pytest.fixture
+    def pid(self, controller):
+        pid = PID(Kp=1, Ki=1, setpoint=10)
+        pid(5, dt=1)
+        controller.pids = {'0': pid}
+        return pid
+
+    def test_write_and_restore(self, controller, settings, pid):
+        TemperatureController.setupCheckpoint(controller)
+        controller.data = {'sensor': 5}
+        TemperatureController.writeCheckpoint(controller)
+        controller.checkpoint.close()
+        controller.pids['0'] = PID(Kp=1, Ki=1, setpoint=10)
+        controller.data = {}
+        TemperatureController.setupCheckpoint(controller)
+        assert controller.pids['0']._integral == pid._integral
+        assert controller.pids['0']._last_output == pid._last_output
+        assert controller.data == {'sensor': 5}
+        controller.checkpoint.close()
+
+    def test_too_old(self, controller, settings, pid, caplog):
+        caplog.set_level(0)
+        TemperatureController.setupCheckpoint(controller)
+        controller.checkpoint.write({'0': (9, 9, 9, 9)}, {}, timestamp=0)
+        controller.checkpoint.close()
+        TemperatureController.setupCheckpoint(controller)
+        assert controller.pids['0']._integral == pid._integral
+        assert "is not restored" in caplog.text
+        controller.checkpoint.close()
+
+    def test_default_file(self, controller, settings, tmp_path):
+        del settings['checkpoint/file']
+        settings['fileName'] = str(tmp_path / "new" / "controller1.conf")
+        TemperatureController.setupCheckpoint(controller)
+        controller.checkpoint.close()
+        assert (tmp_path / "new" / "controller1.checkpoint").exists()
+
+    def test_disabled(self, controller, settings):
+        settings['checkpoint/enabled'] = False
+        TemperatureController.setupCheckpoint(controller)
+        assert controller.checkpoint is None
+        TemperatureController.writeCheckpoint(controller)  # does nothing
+
+
+class Test_invalidateOutput:
+    def test_from_other_thread(self, controller, qtbot):
+        controller.outputManager.record('out0', 5)
+        thread = threading.Thread(target=controller.outputReconnected.emit, args=('out0',))
+        thread.start()
+        thread.join()
+        assert 'out0' in controller.outputManager.last_value  # not yet in the Qt thread
+        qtbot.waitUntil(lambda: 'out0' not in controller.outputManager.last_value)
+
+
 class Test_setOutput:
     def test_invalid_name(self, controller, caplog):
         class Raising_IO:
             def setOutput(self, *args):
                 raise KeyError
         controller.inputOutput = Raising_IO()
-        TemperatureController.setOutput(controller, 'out3', 5)
+        assert TemperatureController.setOutput(controller, 'out3', 5) is False
         assert "Output 'out3' is unknown." in caplog.text
 
     def test_setOutput(self, mock_io):
         controller = mock_io
         controller.pidState['0'] = True
         controller.pidOutput['0'] = "out0"
-        TemperatureController.setOutput(controller, 'out0', 5)
+        assert TemperatureController.setOutput(controller, 'out0', 5) is True
         assert controller.inputOutput.test_output['out0'] == 5
 
 
@@ -430,3 +1045,58 @@ class Test_writeDatabase:
     def test_write_value(self, controller, fill_database):
         _, *value = controller.database.executed[1]
         assert value == [0, 1]
+
+
+class Test_writeDatabase_schema:
+    class Columns_Cursor(Cursor):
+        def execute(self, text, data):
+            if text.startswith("SELECT column_name"):
+                return
+            super().execute(text, data)
+
+        def fetchall(self):
+            return [("timestamp",), ("known",)]
+
+    class Columns_Database(Mock_Database):
+        def cursor(self):
+            return Test_writeDatabase_schema.Columns_Cursor(self)
+
+    def test_drop_unknown(self, controller, caplog):
+        controller.settings = Mock_Settings({'database/table': "table"})
+        controller.database = self.Columns_Database()
+        TemperatureController.writeDatabase(controller, {'known': 1, 'unknown': 2})
+        assert controller.database.executed == [
+            "INSERT INTO table (timestamp, known) VALUES (%s, %s)",
+            (controller.database.executed[1][0], 1)]
+        assert "Key 'unknown' is not a column" in caplog.text
+
+
+class Test_writeDatabase_ingest:
+    class Mock_Publisher:
+        def __init__(self):
+            self.sent = []
+
+        def send_snapshot(self, data):
+            self.sent.append(data)
+
+    @pytest.fixture(autouse=True)
+    def publisher(self, controller):
+        controller.settings = Mock_Settings({})
+        controller.ingestPublisher = self.Mock_Publisher()
+        return controller.ingestPublisher
+
+    def test_publish(self, controller, publisher):
+        controller.settings.setValue('database/table', "table")
+        TemperatureController.writeDatabase(controller, {'0': 0})
+        snapshot = publisher.sent[0]
+        assert (snapshot['table'], snapshot['data']) == ("table", {'0': 0})
+
+    def test_no_database_used(self, controller, publisher):
+        controller.settings.setValue('database/table', "table")
+        TemperatureController.writeDatabase(controller, {'0': 0})
+        assert controller.tries == 0
+
+    def test_no_table(self, controller, publisher, caplog):
+        TemperatureController.writeDatabase(controller, {'0': 0})
+        assert publisher.sent == []
+        assert "No database table" in caplog.text
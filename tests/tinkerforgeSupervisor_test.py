@@ -0,0 +1,137 @@
+"""
+Test for the tinkerforgeSupervisor.py.
+"""
+
+import time
+
+import pytest
+
+from controllerData import tinkerforgeSupervisor
+from controllerData.tinkerforgeSupervisor import Supervisor
+
+
+class Mock_IPConnection:
+    CALLBACK_CONNECTED = 0
+    CALLBACK_DISCONNECTED = 1
+    CONNECT_REASON_REQUEST = 0
+    CONNECT_REASON_AUTO_RECONNECT = 1
+    DISCONNECT_REASON_REQUEST = 0
+    DISCONNECT_REASON_ERROR = 1
+    CONNECTION_STATE_DISCONNECTED = 0
+    CONNECTION_STATE_CONNECTED = 1
+    CONNECTION_STATE_PENDING = 2
+
+    def __init__(self):
+        self.callbacks = {}
+        self.state = self.CONNECTION_STATE_DISCONNECTED
+        self.enumerated = 0
+        self.fail = False
+
+    def register_callback(self, callback_id, function):
+        self.callbacks[callback_id] = function
+
+    def get_connection_state(self):
+        return self.state
+
+    def connect(self, host, port):
+        if self.fail:
+            raise ConnectionRefusedError("test")
+        self.state = self.CONNECTION_STATE_CONNECTED
+        self.callbacks[self.CALLBACK_CONNECTED](self.CONNECT_REASON_REQUEST)
+
+    def enumerate(self):
+        self.enumerated += 1
+
+
+class Mock_IO:
+    def __init__(self):
+        self.tfCon = Mock_IPConnection()
+        self.tfMap = {}
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    monkeypatch.setattr(tinkerforgeSupervisor, "IPConnection", Mock_IPConnection)
+    return Supervisor(Mock_IO())
+
+
+def test_callbacks_registered(supervisor):
+    callbacks = supervisor.inputOutput.tfCon.callbacks
+    assert callbacks[Mock_IPConnection.CALLBACK_CONNECTED] == supervisor.connected
+    assert callbacks[Mock_IPConnection.CALLBACK_DISCONNECTED] == supervisor.disconnected
+
+
+def test_connect_requests_enumeration(supervisor):
+    supervisor.inputOutput.tfCon.connect("localhost", 4223)
+    assert supervisor._enumerate.is_set()
+
+
+class Test_check_devices:
+    def test_enumerate(self, supervisor):
+        supervisor.request_enumeration()
+        assert supervisor.check_devices(supervisor.inputOutput.tfCon) is None
+        assert supervisor.inputOutput.tfCon.enumerated == 1
+
+    def test_missing_retry(self, supervisor):
+        supervisor.device_lost('out0')
+        supervisor.check_devices(supervisor.inputOutput.tfCon)
+        assert supervisor.check_devices(supervisor.inputOutput.tfCon) == 1
+        assert supervisor.check_devices(supervisor.inputOutput.tfCon) == 1
+        assert supervisor.inputOutput.tfCon.enumerated == 2
+
+    def test_restored(self, supervisor):
+        supervisor.device_lost('out0')
+        supervisor.announced('out0')
+        supervisor.check_devices(supervisor.inputOutput.tfCon)
+        assert supervisor.missing == set()
+
+    def test_disconnect_partial_enumeration(self, supervisor):
+        connection = supervisor.inputOutput.tfCon
+        supervisor.inputOutput.tfMap.update({'HAT': "uid1", 'out0': "uid2"})
+        supervisor.disconnected(Mock_IPConnection.DISCONNECT_REASON_ERROR)
+        supervisor.connected(Mock_IPConnection.CONNECT_REASON_AUTO_RECONNECT)
+        assert supervisor.check_devices(connection) == 1
+        supervisor.announced('HAT')
+        assert supervisor.check_devices(connection) == 1  # 'out0' is still missing
+        assert supervisor.missing == {'out0'}
+        supervisor.check_devices(connection)
+        assert connection.enumerated == 2
+        supervisor.announced('out0')
+        supervisor.check_devices(connection)
+        assert supervisor.check_devices(connection) is None
+
+
+def test_disconnected_marks_missing(supervisor):
+    supervisor.inputOutput.tfMap['HAT'] = "uid"
+    supervisor.disconnected(Mock_IPConnection.DISCONNECT_REASON_ERROR)
+    assert supervisor.missing == {'HAT'}
+
+
+def test_backoff(supervisor):
+    assert [supervisor.next_delay() for _ in range(4)] == [1, 2, 4, 8]
+    supervisor.connected(Mock_IPConnection.CONNECT_REASON_AUTO_RECONNECT)
+    assert supervisor.delay == 1
+
+
+def wait_for(condition, timeout=1):
+    stop = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < stop:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_thread_connects(supervisor):
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.inputOutput.tfCon.enumerated == 1)
+    finally:
+        supervisor.stop()
+
+
+def test_thread_connect_failure(supervisor, caplog):
+    supervisor.inputOutput.tfCon.fail = True
+    supervisor.start()
+    try:
+        assert wait_for(lambda: "Tinkerforge connection failed" in caplog.text)
+    finally:
+        supervisor.stop()
@@ -0,0 +1,121 @@
+"""
+Test for the wdeReader.py.
+"""
+
+import time
+
+import pytest
+
+from controllerData import wdeReader
+
+
+TELEGRAM = "$1;1;;21,5;;;;-3,2;;;;;;;;85;;;;;;;;;0\r\n"
+
+
+def test_parseTelegram():
+    assert wdeReader.parseTelegram(TELEGRAM) == {
+        'experiment': 21.5, 'outside': -3.2, 'humidityout': 85}
+
+
+def test_parseTelegram_empty_fields():
+    assert wdeReader.parseTelegram("$1;1;;;;;;;") == {}
+
+
+def test_parseTelegram_invalid():
+    with pytest.raises(ValueError):
+        wdeReader.parseTelegram("garbage")
+
+
+class Mock_Resource:
+    timeout = 10
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.closed = False
+
+    def read(self):
+        if self.lines:
+            return self.lines.pop(0)
+        time.sleep(self.timeout / 1000)
+        raise TimeoutError
+
+    def close(self):
+        self.closed = True
+
+    def open(self):
+        self.closed = False
+
+
+@pytest.fixture
+def reader():
+    return wdeReader.WDEReader(Mock_Resource([]))
+
+
+def test_initially_stale(reader):
+    assert reader.stale
+    assert reader.get_data() == {}
+
+
+def test_newest_telegram(reader):
+    reader.handle_telegram(TELEGRAM)
+    reader.handle_telegram(TELEGRAM.replace("21,5", "22,5"))
+    assert reader.get_data()['experiment'] == 22.5
+    assert not reader.stale
+
+
+def test_stale_values(reader):
+    reader.handle_telegram(TELEGRAM, timestamp=time.time() - 1000)
+    reader.handle_telegram("$1;1;;20;;;;;;;;;;;;;;;;;;;;;0")
+    assert reader.get_data() == {'experiment': 20}
+    assert set(reader.get_timestamps()) == {'experiment', 'outside', 'humidityout'}
+
+
+def test_background_reading():
+    reader = wdeReader.WDEReader(Mock_Resource(["invalid", TELEGRAM]))
+    reader.start()
+    stop = time.perf_counter() + 1
+    while reader.stale and time.perf_counter() < stop:
+        time.sleep(0.01)
+    reader.close()
+    assert reader.get_data()['outside'] == -3.2
+    assert reader.resource.closed
+
+
+class Failing_Resource(Mock_Resource):
+    def __init__(self, lines):
+        super().__init__(lines)
+        self.reads = 0
+        self.opened = 0
+
+    def read(self):
+        self.reads += 1
+        if self.opened:
+            return super().read()
+        raise OSError("port closed")
+
+    def open(self):
+        super().open()
+        self.opened += 1
+
+
+def test_error_reopens(caplog):
+    resource = Failing_Resource([TELEGRAM])
+    reader = wdeReader.WDEReader(resource)
+    reader._stop.wait = lambda timeout: reader._stop.is_set()  # no pause in the test
+    reader.start()
+    stop = time.perf_counter() + 1
+    while reader.stale and time.perf_counter() < stop:
+        time.sleep(0.01)
+    reader.close()
+    assert resource.opened >= 1
+    assert reader.get_data()['outside'] == -3.2
+    assert "reading failed" in caplog.text
+
+
+def test_error_pauses():
+    resource = Failing_Resource([])
+    reader = wdeReader.WDEReader(resource)
+    reader.start()
+    time.sleep(0.2)
+    reader.close()
+    assert resource.reads == 1  # waiting before reopening instead of spinning